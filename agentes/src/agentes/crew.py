@@ -1,14 +1,19 @@
+import logging
 import os
-from crewai import Agent, Task, Crew, Process
+from crewai import Agent, Task
 from langchain.agents import Tool
 from tools.custom_tool import PredictToolMain
 from tools.geracao_imagens import FerramentaGeracaoImagensMarketing
 from tools.analise_inventario import FerramentaAnaliseInventario
 from tools.estrategia_marketing import FerramentaEstrategiaMarketing
 from tools.analise_dados import FerramentaAnaliseDados
+from tools.consulta_previsao import FerramentaConsultaPrevisao
+from utils.agendador import carregar_dependencias, executar_dag
 
 
 os.environ["OPENAI_API_KEY"] = ""
+# Mostrar o andamento das tasks registrado pelo utils.agendador
+logging.basicConfig(level=logging.INFO, format="%(message)s")
 predict = PredictToolMain()
 
 # Criar o agente de treinamento
@@ -38,7 +43,7 @@ inventory_agent = Agent(
     role='Gerente de Inventário',
     goal='Analisar o inventário e prever necessidades de reposição.',
     verbose=True,
-    tools=[FerramentaAnaliseInventario()],
+    tools=[FerramentaAnaliseInventario(), FerramentaConsultaPrevisao()],
     backstory="""
     Como Gerente de Inventário, você é o guardião das prateleiras da empresa. Com um olhar atento, você monitora 
     de perto o estoque e garante que produtos essenciais nunca estejam em falta. Sua experiência garante que a 
@@ -65,7 +70,7 @@ marketing_agent = Agent(
     role='Especialista em Marketing',
     goal='Criar estratégias de marketing para impulsionar vendas de produtos.',
     verbose=True,
-    tools=[FerramentaEstrategiaMarketing()],
+    tools=[FerramentaEstrategiaMarketing(), FerramentaConsultaPrevisao()],
     backstory="""
     Você é um estrategista de marketing talentoso, conhecido por sua habilidade em criar campanhas que capturam a 
     atenção do público. Com uma vasta experiência em campanhas digitais e marketing de produto, você é responsável 
@@ -130,12 +135,15 @@ data_analysis_task = Task(
     agent=data_analysis_agent
 )
 
-# Criar a crew
-equipe = Crew(
-    agents=[training_agent, inventory_agent, marketing_agent, data_analysis_agent],
-    tasks=[train_model_task, inventory_task, marketing_task, data_analysis_task],
-    process=Process.sequential  # ou outro processo, como parallel
-)
+# Tasks do crew pelo nome usado no config/tasks.yaml, onde estão declaradas as dependências
+tarefas = {
+    'previsao_vendas_task': train_model_task,
+    'inventario_task': inventory_task,
+    'estrategia_marketing_task': marketing_task,
+    'analise_dados_task': data_analysis_task,
+}
+dependencias = carregar_dependencias(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', 'tasks.yaml'))
 
-# Executar o processo com os inputs
-equipe.kickoff()
+# Executar as tasks seguindo o grafo de dependências: inventário e marketing rodam em paralelo
+# assim que a previsão termina, e a análise de dados assim que previsão e inventário terminam
+resultados = executar_dag(tarefas, dependencias)
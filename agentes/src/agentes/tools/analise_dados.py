@@ -1,9 +1,37 @@
+import os
 import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_pdf import PdfPages
 from pydantic import BaseModel, Field
-from typing import Type
+from typing import Optional, Type
 from crewai_tools import BaseTool
+from utils.cache_dados import ler_dados
+from utils.assincrono import executar_em_executor
+from utils.graficos import renderizar_em_paralelo
+
+# Função para calcular a receita esperada por produto e por categoria
+def calcular_receitas(vendas_df, previsoes_df):
+    """
+    Agrupa as vendas por produto_id antes da junção com as previsões (uma linha por produto),
+    então o custo é linear no número de vendas e a junção não replica as linhas de vendas.
+    Produtos diferentes com o mesmo nome continuam separados.
+
+    Retorna (receitas por produto com produto_id, nome_produto, categoria, quantidade_vendida,
+    yhat e receita_esperada = quantidade_vendida * yhat; receita_esperada por categoria).
+    """
+    vendas_produto = vendas_df.groupby('produto_id', observed=True, sort=False).agg(
+        nome_produto=('nome_produto', 'first'),
+        categoria=('categoria', 'first'),
+        quantidade_vendida=('quantidade_vendida', 'sum')
+    ).reset_index()
+
+    # Uma previsão por produto (a mais recente, se houver repetidas)
+    previsoes = previsoes_df.drop_duplicates('produto_id', keep='last')[['produto_id', 'yhat']]
+    receitas_produto = vendas_produto.astype({'produto_id': str}).merge(
+        previsoes.astype({'produto_id': str}), on='produto_id', how='inner'
+    )
+    receitas_produto['receita_esperada'] = receitas_produto['quantidade_vendida'] * receitas_produto['yhat']
+
+    receitas_categoria = receitas_produto.groupby('categoria', observed=True, sort=False)['receita_esperada'].sum()
+    return receitas_produto, receitas_categoria
 
 # Esquema Pydantic para validar os campos de entrada
 class AnaliseDadosSchema(BaseModel):
@@ -21,6 +49,11 @@ class FerramentaAnaliseDados(BaseTool):
     # Caminhos padrão para os arquivos
     vendas: str = "../data/dados_vendas.csv"
     previsoes: str = "../resultados/previsoes/previsoes_vendas.csv"
+    diretorio_graficos: str = "."
+
+    # Um conjunto de gráficos e PDF por categoria, além do geral, renderizados em processos separados
+    graficos_por_categoria: bool = False
+    max_workers: Optional[int] = None  # None usa a quantidade de CPUs disponíveis
     
     # Esquema de argumentos para validação
     args_schema: Type[BaseModel] = AnaliseDadosSchema
@@ -30,100 +63,53 @@ class FerramentaAnaliseDados(BaseTool):
         Executa a análise de dados com base nos arquivos de vendas e previsões fornecidos.
         Gera gráficos e relatórios consolidando as informações.
         """
-        # Carregar e preparar os dados
-        vendas_df = pd.read_csv(self.vendas)
-        previsoes_df = pd.read_csv(self.previsoes)
-
-        # Mesclar os dados de vendas e previsões com base no produto_id
-        dados_analise = pd.merge(vendas_df, previsoes_df, on="produto_id")
+        # Carregar e preparar os dados; 'nome_produto' e 'categoria' vêm apenas das vendas
+        vendas_df = ler_dados(self.vendas, ['produto_id', 'nome_produto', 'categoria', 'quantidade_vendida'])
+        previsoes_df = ler_dados(self.previsoes, ['produto_id', 'yhat'])
 
-        # Resolver colunas duplicadas: manter a versão correta de 'nome_produto' e 'categoria'
-        dados_analise['nome_produto'] = dados_analise['nome_produto_x'].fillna(dados_analise['nome_produto_y'])
-        dados_analise['categoria'] = dados_analise['categoria_x'].fillna(dados_analise['categoria_y'])
-        
-        # Remover as colunas duplicadas desnecessárias
-        dados_analise = dados_analise.drop(columns=['nome_produto_x', 'nome_produto_y', 'categoria_x', 'categoria_y'])
+        # Receita esperada por produto (vendas agregadas por produto_id e unidas às previsões) e por categoria
+        receitas_produto, receitas_categoria = calcular_receitas(vendas_df, previsoes_df)
 
-        # Preparar as análises por produto e categoria
-        receitas = []
-        produtos = dados_analise['nome_produto'].unique()
-        categorias_agrupadas = {}
+        # Rótulos únicos por produto: nomes repetidos recebem o produto_id
+        repetidos = receitas_produto['nome_produto'].duplicated(keep=False)
+        produtos = receitas_produto['nome_produto'].astype(str).where(
+            ~repetidos, receitas_produto['nome_produto'].astype(str) + ' (' + receitas_produto['produto_id'] + ')'
+        ).to_numpy()
+        receitas = receitas_produto['receita_esperada'].tolist()
+        categorias_agrupadas = receitas_categoria.to_dict()
 
-        for produto in produtos:
-            produto_df = dados_analise[dados_analise['nome_produto'] == produto]
-            receita_esperada = produto_df['quantidade_vendida'].sum() * produto_df['yhat'].iloc[0]
-            receitas.append(receita_esperada)
-            
-            # Agrupar por categoria
-            categoria = produto_df['categoria'].iloc[0]
-            if categoria not in categorias_agrupadas:
-                categorias_agrupadas[categoria] = receita_esperada
-            else:
-                categorias_agrupadas[categoria] += receita_esperada
-
-        # Gerar gráficos de análise e relatório
-        self.gerar_graficos(produtos, receitas, categorias_agrupadas)
-        self.gerar_relatorio_pdf(produtos, receitas, categorias_agrupadas)
+        # Gerar gráficos de análise e relatório (cada figura é desenhada uma vez para o PNG e o PDF)
+        self.gerar_graficos(produtos, receitas, categorias_agrupadas, receitas_produto)
 
         return "Gráficos e relatório PDF gerados com sucesso."
 
-    def gerar_graficos(self, produtos, receitas, categorias_agrupadas):
-        # Gráfico 1: Receita Estimada por Produto
-        plt.figure(figsize=(10, 6))
-        plt.bar(produtos, receitas, color='blue')
-        plt.xlabel('Produto')
-        plt.ylabel('Receita Estimada')
-        plt.title('Análise de Receitas Estimadas por Produto')
-        plt.grid(True)
-        plt.savefig('grafico_receitas_por_produto.png')
-
-        # Gráfico 2: Receita Estimada por Categoria
-        plt.figure(figsize=(10, 6))
-        categorias = list(categorias_agrupadas.keys())
-        receitas_por_categoria = list(categorias_agrupadas.values())
-        plt.bar(categorias, receitas_por_categoria, color='green')
-        plt.xlabel('Categoria')
-        plt.ylabel('Receita Estimada')
-        plt.title('Análise de Receitas Estimadas por Categoria')
-        plt.grid(True)
-        plt.savefig('grafico_receitas_por_categoria.png')
-
-    def gerar_relatorio_pdf(self, produtos, receitas, categorias_agrupadas):
-        # Gera um relatório consolidado em PDF
-        with PdfPages('relatorio_analise.pdf') as pdf:
-            # Gráfico de Receita por Produto
-            plt.figure(figsize=(10, 6))
-            plt.bar(produtos, receitas, color='blue')
-            plt.xlabel('Produto')
-            plt.ylabel('Receita Estimada')
-            plt.title('Análise de Receitas Estimadas por Produto')
-            plt.grid(True)
-            pdf.savefig()  # Salva o gráfico no PDF
-            plt.close()
-
-            # Gráfico de Receita por Categoria
-            plt.figure(figsize=(10, 6))
-            categorias = list(categorias_agrupadas.keys())
-            receitas_por_categoria = list(categorias_agrupadas.values())
-            plt.bar(categorias, receitas_por_categoria, color='green')
-            plt.xlabel('Categoria')
-            plt.ylabel('Receita Estimada')
-            plt.title('Análise de Receitas Estimadas por Categoria')
-            plt.grid(True)
-            pdf.savefig()  # Salva o gráfico no PDF
-            plt.close()
-
-            # Adicionar outras informações no PDF (resumo dos dados)
-            plt.figure(figsize=(8, 6))
-            plt.text(0.1, 0.8, 'Relatório de Análise de Dados', fontsize=18, ha='left')
-            plt.text(0.1, 0.6, f'Total de Produtos Analisados: {len(produtos)}', fontsize=12, ha='left')
-            plt.text(0.1, 0.5, f'Receita Estimada Total: R$ {sum(receitas):,.2f}', fontsize=12, ha='left')
-            plt.text(0.1, 0.4, 'Categorias Analisadas:', fontsize=12, ha='left')
-            for i, (categoria, receita) in enumerate(categorias_agrupadas.items()):
-                plt.text(0.1, 0.3 - i * 0.05, f'  - {categoria}: R$ {receita:,.2f}', fontsize=10, ha='left')
-            plt.axis('off')  # Remove eixos do texto
-            pdf.savefig()
-            plt.close()
+    def gerar_graficos(self, produtos, receitas, categorias_agrupadas, receitas_produto=None):
+        """
+        Gera o conjunto geral (PNGs e PDF em diretorio_graficos) e, com graficos_por_categoria,
+        um conjunto por categoria em diretorio_graficos/categorias/<categoria>/, renderizados em
+        paralelo. Retorna os caminhos gravados de cada conjunto.
+        """
+        conjuntos = [{
+            'produtos': list(produtos),
+            'receitas': list(receitas),
+            'categorias_agrupadas': categorias_agrupadas,
+            'diretorio': self.diretorio_graficos,
+        }]
+        if self.graficos_por_categoria and receitas_produto is not None:
+            rotulos = pd.Series(produtos, index=receitas_produto.index)
+            for categoria, linhas in receitas_produto.groupby('categoria', observed=True, sort=False):
+                conjuntos.append({
+                    'produtos': rotulos.loc[linhas.index].tolist(),
+                    'receitas': linhas['receita_esperada'].tolist(),
+                    'categorias_agrupadas': {categoria: categorias_agrupadas[categoria]},
+                    'diretorio': os.path.join(self.diretorio_graficos, 'categorias', str(categoria)),
+                    'titulo': f'Relatório de Análise - {categoria}',
+                })
+        return renderizar_em_paralelo(conjuntos, max_workers=self.max_workers)
 
-    def _arun(self, inputs: dict):
-        raise NotImplementedError("Execução assíncrona não implementada.")
+    async def _arun(self, name: str, description: str, vendas: str, previsoes: str):
+        """
+        Versão assíncrona de _run: a leitura dos dados, as agregações e a geração dos gráficos e
+        do PDF rodam no executor das ferramentas, sem bloquear o event loop.
+        """
+        return await executar_em_executor(self._run, name, description, vendas, previsoes)
@@ -1,7 +1,15 @@
+import os
 import pandas as pd
 from pydantic import BaseModel, Field
 from typing import Type
 from crewai_tools import BaseTool
+from utils.cache_dados import ler_dados
+from utils.ranking import top_n
+from utils.reposicao import (
+    NIVEL_SERVICO_PADRAO, PRAZO_ENTREGA_PADRAO_DIAS, CICLO_REVISAO_PADRAO_DIAS, calcular_plano_reposicao
+)
+from utils.particoes import colunas_com_loja
+from utils.assincrono import executar_em_executor
 
 # Esquema de validação de entradas para a ferramenta de inventário
 class FerramentaAnaliseInventarioSchema(BaseModel):
@@ -17,6 +25,21 @@ class FerramentaAnaliseInventario(BaseTool):
 
     # Caminho padrão para o arquivo de inventário
     inventario: str = "../data/inventario.csv"
+
+    # Previsões do próximo mês geradas pelo PredictToolMain; sem o arquivo (ou para produtos sem
+    # previsão) a demanda vem da coluna predicted_demand do inventário
+    previsoes: str = "../resultados/previsoes/previsoes_vendas.csv"
+
+    # Diretório onde _run grava o plano de reposição e o ranking
+    diretorio_resultados: str = "../resultados/inventario"
+
+    # Política de reposição (utils.reposicao)
+    nivel_servico: float = NIVEL_SERVICO_PADRAO
+    prazo_entrega_dias: float = PRAZO_ENTREGA_PADRAO_DIAS
+    ciclo_revisao_dias: float = CICLO_REVISAO_PADRAO_DIAS
+
+    # Quantidade de produtos no ranking de reposição urgente
+    tamanho_top: int = 10
     
     # Esquema de argumentos para validação
     args_schema: Type[BaseModel] = FerramentaAnaliseInventarioSchema
@@ -24,35 +47,60 @@ class FerramentaAnaliseInventario(BaseTool):
     def _run(self, name: str, description: str, inventario: str):
         """
         Executa a análise de inventário com base nos dados do arquivo CSV fornecido.
-        Gera um relatório das necessidades de reposição com base na demanda prevista e nos níveis de estoque.
+        Gera o plano de reposição de todos os itens (ponto de pedido, estoque de segurança,
+        dias de cobertura e quantidade sugerida) a partir das previsões de vendas e um
+        relatório com os itens mais urgentes.
         """
-        # Carregar o arquivo de inventário
-        inventario_df = pd.read_csv(self.inventario)
+        # Carregar o arquivo de inventário; com loja_id (partições e consolidados) a junção com as
+        # previsões usa loja e produto
+        inventario_df = ler_dados(self.inventario, colunas_com_loja(self.inventario, [
+            'produto_id', 'nome_produto', 'quantidade', 'predicted_demand', 'data_vencimento', 'localizacao'
+        ]))
+        previsoes_df = ler_dados(self.previsoes) if os.path.exists(self.previsoes) else None
 
-        # Verificar se o estoque atual é menor que a demanda prevista
-        # Consideramos que a quantidade atual deve ser maior ou igual à demanda prevista (predicted_demand)
-        reposicao = inventario_df[inventario_df['quantidade'] < inventario_df['predicted_demand']]
+        # Plano de reposição completo, calculado para todos os itens de uma vez
+        plano = calcular_plano_reposicao(
+            inventario_df, previsoes_df,
+            nivel_servico=self.nivel_servico,
+            prazo_entrega_dias=self.prazo_entrega_dias,
+            ciclo_revisao_dias=self.ciclo_revisao_dias
+        )
+        os.makedirs(self.diretorio_resultados, exist_ok=True)
+        plano.to_csv(os.path.join(self.diretorio_resultados, 'plano_reposicao.csv'), index=False)
 
         # Gerar os Top 10 produtos que precisam de reposição urgente
-        top_10_reposicao = reposicao.sort_values(by='quantidade').head(10)
-        top_10_reposicao.to_csv('../resultados/inventario/top_10_reposicao.csv', index=False)
+        # (menos dias de cobertura primeiro; empates pelo nome do produto)
+        top_10_reposicao = top_n(plano[plano['repor']], 'dias_cobertura', self.tamanho_top, maior=False, desempate='nome_produto')
+        top_10_reposicao.to_csv(os.path.join(self.diretorio_resultados, 'top_10_reposicao.csv'), index=False)
 
         # Gerar o relatório em Markdown
-        markdown_relatorio = self.gerar_relatorio_markdown(top_10_reposicao)
+        markdown_relatorio = self.gerar_relatorio_markdown(top_10_reposicao, plano)
         
         return markdown_relatorio
 
-    def gerar_relatorio_markdown(self, top_10_reposicao):
+    def gerar_relatorio_markdown(self, top_10_reposicao, plano):
         # Gerar o conteúdo do relatório em Markdown
+        repor = plano[plano['repor']]
         markdown = "# Relatório de Reposição de Estoque\n\n"
-        markdown += "## Top 10 Produtos que precisam de reposição urgente:\n"
-        for i, row in top_10_reposicao.iterrows():
-            markdown += (f"{i+1}. **{row['nome_produto']}** - Quantidade em estoque: {row['quantidade']} "
-                         f"- Demanda prevista: {row['predicted_demand']} - Data de vencimento: {row['data_vencimento']} "
-                         f"- Localização: {row['localizacao']}\n")
+        markdown += (f"Itens analisados: {len(plano)} - Itens a repor: {len(repor)} - "
+                     f"Quantidade total sugerida: {int(repor['quantidade_sugerida'].sum())} unidades - "
+                     f"Itens com demanda prevista pelo modelo: {int((plano['fonte_demanda'] == 'previsao').sum())}\n\n")
+        markdown += (f"_Plano completo em {os.path.join(self.diretorio_resultados, 'plano_reposicao.csv')} "
+                     f"(nível de serviço {self.nivel_servico:.0%}, prazo de entrega {self.prazo_entrega_dias:g} dias, "
+                     f"revisão a cada {self.ciclo_revisao_dias:g} dias)._\n\n")
+        markdown += f"## Top {len(top_10_reposicao)} Produtos que precisam de reposição urgente:\n"
+        for i, row in enumerate(top_10_reposicao.itertuples(index=False)):
+            markdown += (f"{i+1}. **{row.nome_produto}** - Quantidade em estoque: {row.quantidade} "
+                         f"- Demanda mensal: {row.demanda_mensal:.0f} - Cobertura: {row.dias_cobertura:.1f} dias "
+                         f"- Ponto de pedido: {row.ponto_pedido:.0f} - Pedir: {row.quantidade_sugerida} unidades "
+                         f"- Data de vencimento: {row.data_vencimento:%Y-%m-%d} - Localização: {row.localizacao}\n")
         
         markdown += "\n_Gerado automaticamente pela ferramenta de análise de inventário._\n"
         return markdown
 
-    def _arun(self, inputs: dict):
-        raise NotImplementedError("Execução assíncrona não implementada.")
+    async def _arun(self, name: str, description: str, inventario: str):
+        """
+        Versão assíncrona de _run: a leitura do inventário, a seleção com pandas e a gravação do
+        CSV rodam no executor das ferramentas, sem bloquear o event loop.
+        """
+        return await executar_em_executor(self._run, name, description, inventario)
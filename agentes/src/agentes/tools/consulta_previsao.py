@@ -0,0 +1,59 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Type
+from crewai_tools import BaseTool
+from utils.servico_previsao import URL_PADRAO, ClientePrevisao
+from utils.assincrono import executar_em_executor
+
+# Esquema de validação para a ferramenta de consulta de previsões
+class FerramentaConsultaPrevisaoSchema(BaseModel):
+    """Esquema de entrada para a Ferramenta de Consulta de Previsões"""
+    consulta: str = Field(..., description="Tipo de consulta: 'produto', 'categoria' ou 'top'")
+    chave: Optional[str] = Field(None, description="produto_id ou nome da categoria (consultas 'produto' e 'categoria')")
+    n: int = Field(10, description="Quantidade de itens na consulta 'top'")
+    por: str = Field("produto", description="Ranking da consulta 'top': 'produto' ou 'categoria'")
+
+# Cliente leve do serviço de previsão (utils.servico_previsao), que mantém as previsões em memória
+class FerramentaConsultaPrevisao(BaseTool):
+    name: str = "consulta_previsao"
+    description: str = "Consulta a previsão de vendas do próximo mês de um produto, de uma categoria ou o top-N no serviço de previsão."
+    url_servico: str = URL_PADRAO
+
+    # Esquema de argumentos para validação
+    args_schema: Type[BaseModel] = FerramentaConsultaPrevisaoSchema
+
+    def _run(self, consulta: str, chave: Optional[str] = None, n: int = 10, por: str = "produto"):
+        """
+        Consulta o serviço de previsão e retorna o resultado em Markdown.
+        """
+        cliente = ClientePrevisao(self.url_servico)
+        try:
+            if consulta == 'produto':
+                previsao = cliente.produto(chave)
+                if previsao is None:
+                    return f"Não há previsão para o produto {chave}."
+                markdown = (f"**{previsao['nome_produto']}** ({previsao['produto_id']}, {previsao['categoria']}) - "
+                            f"Previsão de vendas para {previsao['ds'][:10]}: {previsao['yhat']:.2f} unidades\n")
+                for passo in previsao.get('previsoes', [])[1:]:
+                    markdown += (f"- {passo['ds'][:7]}: {passo['yhat']:.2f} unidades "
+                                 f"(intervalo {passo['yhat_lower']:.2f} a {passo['yhat_upper']:.2f})\n")
+                return markdown
+            if consulta == 'categoria':
+                previsao = cliente.categoria(chave)
+                if previsao is None:
+                    return f"Não há previsão para a categoria {chave}."
+                return (f"**{previsao['categoria']}** - Previsão de vendas: {previsao['yhat']:.2f} unidades "
+                        f"({previsao['produtos']} produtos)")
+            if consulta == 'top':
+                ranking = cliente.top(n, por)
+                markdown = f"## Top {n} {'produtos' if por == 'produto' else 'categorias'} por previsão de vendas:\n"
+                for i, item in enumerate(ranking):
+                    nome = item['nome_produto'] if por == 'produto' else item['categoria']
+                    markdown += f"{i+1}. **{nome}** - Previsão de vendas: {item['yhat']:.2f} unidades\n"
+                return markdown
+        except ConnectionError as e:
+            return f"{e}. Inicie o serviço com: python -m utils.servico_previsao"
+        raise ValueError("A consulta deve ser 'produto', 'categoria' ou 'top'.")
+
+    async def _arun(self, consulta: str, chave: Optional[str] = None, n: int = 10, por: str = "produto"):
+        # A requisição HTTP é bloqueante e roda no executor das ferramentas
+        return await executar_em_executor(self._run, consulta, chave, n, por)
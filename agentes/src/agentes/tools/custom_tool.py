@@ -1,7 +1,11 @@
 from crewai_tools import BaseTool
-from typing import Dict, List, Type
+from typing import Any, Dict, List, Optional, Type
 from pydantic.v1 import BaseModel, Field
-from prophet import Prophet
+from utils.agregacao_mensal import AgregacaoMensal
+from utils.modelo_global import NIVEL_INTERVALO_PADRAO
+from utils.previsores import criar_previsor
+from utils.ranking import top_n
+from utils.assincrono import executar_em_executor
 
 import pandas as pd
 import os
@@ -20,6 +24,40 @@ class PredictToolMain(BaseTool):
     # Caminhos padrão
     vendas: str = "../data/dados_vendas.csv"
     historico: str = "../data/historico_vendas.csv"
+
+    # Diretório dos totais mensais por produto, atualizados incrementalmente a cada execução
+    diretorio_agregados: str = "../data/.agregados"
+    tamanho_chunk: int = 500_000  # Linhas lidas por vez dos CSVs; limita o pico de memória da ingestão
+
+    # O mês da venda mais recente ainda está aberto; com True ele fica fora das séries, já que seu
+    # total parcial puxaria o último ponto para baixo. O modelo prevê um mês a mais e a previsão
+    # do mês aberto é descartada, então o horizonte 1 continua sendo o próximo mês
+    excluir_mes_aberto: bool = True
+
+    # Diretório onde _run grava as previsões e os rankings
+    diretorio_resultados: str = "../resultados/previsoes"
+
+    # Modelo de previsão (utils.previsores): 'prophet' (um modelo por produto, séries com pelo menos
+    # 6 meses), 'suavizacao' (suavização exponencial vetorizada para todas as séries) ou 'global'
+    # (um único modelo para todos os produtos, inclusive os de histórico curto)
+    modelo: str = "prophet"
+
+    # Meses previstos a partir de um único ajuste por série e cobertura dos intervalos de previsão
+    # (gravada na coluna nivel_intervalo das previsões, lida pelo plano de reposição)
+    horizonte: int = 6
+    nivel_intervalo: float = NIVEL_INTERVALO_PADRAO
+
+    # Configuração do ajuste paralelo dos modelos (um Prophet por produto)
+    max_workers: Optional[int] = None  # None usa a quantidade de CPUs disponíveis
+    chunksize: int = 1  # Produtos enviados a cada processo por tarefa
+    timeout_ajuste: Optional[float] = None  # Tempo limite (s) por ajuste; None espera indefinidamente
+
+    # Quantidade de produtos e categorias nos rankings do relatório
+    tamanho_top: int = 10
+
+    # Hiperparâmetros repassados ao modelo escolhido e cache das previsões do Prophet (None desativa o cache)
+    parametros_modelo: Dict[str, Any] = {}
+    cache_previsoes: Optional[str] = "../resultados/previsoes/.cache_previsoes.json"
     
     args_schema: Type[BaseModel] = PredictTool
     
@@ -27,76 +65,97 @@ class PredictToolMain(BaseTool):
         """
         Executa o modelo de previsão de vendas, unindo os dados de vendas atuais e históricos, e retorna as previsões.
         """
-        # Carregar e preparar os dados
-        vendas_df = pd.read_csv(self.vendas)
-        historico_df = pd.read_csv(self.historico)
-        
-        # Combinar os datasets
-        dados = pd.concat([vendas_df, historico_df])
-        dados['data'] = pd.to_datetime(dados['data'])
-
-        # Agrupar as vendas mensais por produto
-        dados_mensais = dados.groupby([pd.Grouper(key='data', freq='M'), 'produto_id', 'nome_produto', 'categoria']).agg({
-            'quantidade_vendida': 'sum'
-        }).reset_index()
-
-        previsoes = []
-        for produto_id in dados_mensais['produto_id'].unique():
-            df_produto = dados_mensais[dados_mensais['produto_id'] == produto_id].copy()
-            df_produto.rename(columns={'data': 'ds', 'quantidade_vendida': 'y'}, inplace=True)
-            
-            # Verificar se há dados suficientes para o Prophet (mínimo de 6 observações)
-            if len(df_produto) < 6:
-                continue
-            
-            # Treinar o modelo Prophet
-            modelo = Prophet()
-            modelo.fit(df_produto)
-            
-            # Previsão para o próximo mês
-            futuro = modelo.make_future_dataframe(periods=1, freq='M')
-            previsao = modelo.predict(futuro)
-            
-            # Extração dos valores previstos e atributos do produto
-            previsao_mes_seguinte = previsao[['ds', 'yhat']].iloc[-1].to_dict()  # Previsão para o próximo mês
-            previsao_mes_seguinte['produto_id'] = produto_id
-            previsao_mes_seguinte['nome_produto'] = df_produto['nome_produto'].iloc[0]
-            previsao_mes_seguinte['categoria'] = df_produto['categoria'].iloc[0]
-            
-            # Adiciona todas as colunas esperadas no DataFrame
-            previsoes.append(previsao_mes_seguinte)
-
-        # Converter previsões para DataFrame e garantir que todas as colunas estejam incluídas
-        previsoes_df = pd.DataFrame(previsoes, columns=['ds', 'yhat', 'produto_id', 'nome_produto', 'categoria'])
-        
-        # Salvar previsões completas em um arquivo CSV
-        previsoes_df.to_csv('../resultados/previsoes/previsoes_vendas.csv', index=False)
-
-        # Calcular o Top 5 produtos e categorias
-        top_produtos = previsoes_df.groupby(['produto_id', 'nome_produto']).agg({
+        previsoes_horizonte, falhas = self.calcular_previsoes()
+        os.makedirs(self.diretorio_resultados, exist_ok=True)
+
+        # Salvar todas as previsões do horizonte, em formato longo (uma linha por produto e mês)
+        previsoes_horizonte.to_csv(os.path.join(self.diretorio_resultados, 'previsoes_horizonte.csv'), index=False)
+
+        # Salvar as previsões do próximo mês, usadas pelas demais ferramentas
+        previsoes_df = previsoes_horizonte[previsoes_horizonte['horizonte'] == 1]
+        previsoes_df.to_csv(os.path.join(self.diretorio_resultados, 'previsoes_vendas.csv'), index=False)
+
+        # Calcular o Top N produtos e categorias (seleção parcial, sem ordenar todos os produtos)
+        top_produtos = top_n(previsoes_df.groupby(['produto_id', 'nome_produto'], observed=True).agg({
             'yhat': 'sum'
-        }).reset_index().sort_values(by='yhat', ascending=False).head(10)
-        top_produtos.to_csv('../resultados/previsoes/top_10_produtos.csv', index=False)
+        }).reset_index(), 'yhat', self.tamanho_top, desempate='produto_id')
+        top_produtos.to_csv(os.path.join(self.diretorio_resultados, 'top_10_produtos.csv'), index=False)
 
-        top_categorias = previsoes_df.groupby('categoria').agg({
+        top_categorias = top_n(previsoes_df.groupby('categoria', observed=True).agg({
             'yhat': 'sum'
-        }).reset_index().sort_values(by='yhat', ascending=False).head(10) 
-        top_categorias.to_csv('../resultados/previsoes/top_10_categorias.csv', index=False)
+        }).reset_index(), 'yhat', self.tamanho_top, desempate='categoria')
+        top_categorias.to_csv(os.path.join(self.diretorio_resultados, 'top_10_categorias.csv'), index=False)
 
         # Gerar o relatório em Markdown
-        markdown_relatorio = self.gerar_relatorio_markdown(top_produtos, top_categorias)
+        markdown_relatorio = self.gerar_relatorio_markdown(top_produtos, top_categorias, falhas, previsoes_horizonte)
         return markdown_relatorio
 
-    def gerar_relatorio_markdown(self, top_produtos, top_categorias):
+    def calcular_previsoes(self):
+        """
+        Calcula as previsões dos próximos 'horizonte' meses de cada produto com dados
+        suficientes, com intervalos, a partir de um único ajuste por série. Retorna
+        (previsoes_df em formato longo, falhas), sem gravar arquivos; é usado pelo _run e pelo
+        serviço de previsão (utils.servico_previsao), que mantém o resultado em memória.
+        A coluna nivel_intervalo registra a cobertura dos intervalos yhat_lower/yhat_upper.
+        """
+        # Vendas mensais por produto dos dados atuais e históricos: apenas as linhas
+        # acrescentadas aos CSVs desde a última execução são lidas, em chunks, e agregadas
+        agregacao = AgregacaoMensal(self.diretorio_agregados, tamanho_chunk=self.tamanho_chunk)
+        dados_mensais = agregacao.atualizar([self.vendas, self.historico])
+        mes_aberto = agregacao.mes_aberto() if self.excluir_mes_aberto else None
+        if mes_aberto is not None:
+            dados_mensais = dados_mensais[dados_mensais['data'] < mes_aberto]
+
+        # Previsão dos próximos meses de cada produto pelo modelo escolhido (utils.previsores)
+        previsor = criar_previsor(
+            self.modelo,
+            parametros_modelo=self.parametros_modelo,
+            max_workers=self.max_workers,
+            chunksize=self.chunksize,
+            timeout_ajuste=self.timeout_ajuste,
+            cache_previsoes=self.cache_previsoes
+        )
+        if mes_aberto is None:
+            previsoes_df, falhas = previsor.prever(dados_mensais, horizonte=self.horizonte, nivel_intervalo=self.nivel_intervalo)
+        else:
+            # Sem o mês aberto nas séries, o primeiro mês previsto é ele: prever um mês a mais, descartar
+            # os meses até o aberto e renumerar o horizonte a partir do próximo mês
+            previsoes_df, falhas = previsor.prever(dados_mensais, horizonte=self.horizonte + 1, nivel_intervalo=self.nivel_intervalo)
+            previsoes_df = previsoes_df[previsoes_df['ds'] > mes_aberto]
+            previsoes_df = previsoes_df.assign(horizonte=previsoes_df.groupby('produto_id', sort=False).cumcount() + 1)
+            previsoes_df = previsoes_df[previsoes_df['horizonte'] <= self.horizonte].reset_index(drop=True)
+        return previsoes_df.assign(nivel_intervalo=self.nivel_intervalo), falhas
+
+    async def _arun(self, name: str, description: str, vendas: str, historico: str):
+        """
+        Versão assíncrona de _run: a ingestão dos CSVs e a gravação dos resultados rodam no
+        executor das ferramentas e os ajustes dos modelos continuam no pool de processos.
+        """
+        return await executar_em_executor(self._run, name, description, vendas, historico)
+
+    def gerar_relatorio_markdown(self, top_produtos, top_categorias, falhas=None, previsoes_horizonte=None):
         # Gerar o conteúdo do relatório
         markdown = "# Relatório de Previsão de Vendas para o Próximo Mês\n\n"
-        markdown += "## Top 5 Produtos que podem ser mais vendidos:\n"
-        for i, row in top_produtos.iterrows():
-            markdown += f"{i+1}. **{row['nome_produto']}** - Previsão de vendas: {row['yhat']:.2f} unidades\n"
+        markdown += f"## Top {len(top_produtos)} Produtos que podem ser mais vendidos:\n"
+        for i, (_, row) in enumerate(top_produtos.iterrows(), start=1):
+            markdown += f"{i}. **{row['nome_produto']}** - Previsão de vendas: {row['yhat']:.2f} unidades\n"
+
+        markdown += f"\n## Top {len(top_categorias)} Categorias que podem ser mais vendidas:\n"
+        for i, (_, row) in enumerate(top_categorias.iterrows(), start=1):
+            markdown += f"{i}. **{row['categoria']}** - Previsão de vendas: {row['yhat']:.2f} unidades\n"
+
+        if previsoes_horizonte is not None and previsoes_horizonte['horizonte'].max() > 1:
+            totais = previsoes_horizonte.groupby('ds')[['yhat', 'yhat_lower', 'yhat_upper']].sum()
+            markdown += f"\n## Previsão total de vendas para os próximos {len(totais)} meses:\n"
+            markdown += "| Mês | Previsão | Soma dos limites inferiores | Soma dos limites superiores |\n"
+            markdown += "|-----|----------|-----------------------------|-----------------------------|\n"
+            for ds, row in totais.iterrows():
+                markdown += f"| {ds:%Y-%m} | {row['yhat']:.2f} | {row['yhat_lower']:.2f} | {row['yhat_upper']:.2f} |\n"
 
-        markdown += "\n## Top 5 Categorias que podem ser mais vendidas:\n"
-        for i, row in top_categorias.iterrows():
-            markdown += f"{i+1}. **{row['categoria']}** - Previsão de vendas: {row['yhat']:.2f} unidades\n"
+        if falhas:
+            markdown += "\n## Produtos sem previsão (falha no ajuste do modelo):\n"
+            for falha in falhas:
+                markdown += f"- **{falha['produto_id']}** - {falha['erro']}\n"
 
         markdown += "\n_Gerado automaticamente pela ferramenta de previsão de vendas._\n"
         return markdown
@@ -1,8 +1,19 @@
 import datetime
+import logging
+import os
+import numpy as np
 import pandas as pd
 from pydantic import BaseModel, Field
 from typing import Type
 from crewai_tools import BaseTool
+from utils.cache_dados import ler_dados
+from utils.assincrono import executar_em_executor
+from utils.regras import carregar_regras, formatar_estatisticas
+
+# Arquivo padrão com as regras de marketing, ao lado do config/tasks.yaml
+REGRAS_PADRAO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'regras_marketing.yaml')
+
+logger = logging.getLogger(__name__)
 
 # Esquema de validação para a ferramenta de estratégia de marketing
 class FerramentaEstrategiaMarketingSchema(BaseModel):
@@ -18,6 +29,7 @@ class FerramentaEstrategiaMarketing(BaseTool):
     description: str = "Gera estratégias de marketing com base no inventário e previsão de vendas."
     inventario: str = "../data/inventario.csv"
     previsoes_vendas: str = "../data/previsoes_vendas.csv"
+    regras: str = REGRAS_PADRAO
     
     # Esquema de argumentos para validação
     args_schema: Type[BaseModel] = FerramentaEstrategiaMarketingSchema
@@ -28,76 +40,66 @@ class FerramentaEstrategiaMarketing(BaseTool):
         O inventário e as previsões de vendas são carregados a partir de arquivos CSV.
         """
         # Carregar o inventário a partir do CSV
-        inventario_df = pd.read_csv(self.inventario)
+        inventario_df = ler_dados(self.inventario, [
+            'produto_id', 'nome_produto', 'quantidade', 'predicted_demand', 'data_vencimento'
+        ])
         
         # Carregar as previsões de vendas a partir do CSV
-        previsoes_df = pd.read_csv(self.previsoes_vendas)
+        previsoes_df = ler_dados(self.previsoes_vendas, ['produto_id', 'yhat'])
 
-        # Criar um dicionário de previsões com base no produto_id para fácil acesso
-        previsoes_dict = {row['produto_id']: row['yhat'] for _, row in previsoes_df.iterrows()}
+        # Avaliar todas as regras como operações de coluna e gerar as estratégias apenas para os sinalizados
+        sinalizados, estatisticas = self.avaliar_regras(inventario_df, previsoes_df)
+        logger.info("Avaliação das regras de marketing:\n%s", formatar_estatisticas(estatisticas))
+        return self.gerar_estrategias(sinalizados)
 
-        # Processar os dados do inventário e gerar estratégias
-        estrategias = []
-        for _, row in inventario_df.iterrows():
-            produto_id = row['produto_id']
-            quantidade = row['quantidade']
-            demanda_prevista = row['predicted_demand']
-            data_vencimento = datetime.datetime.strptime(row['data_vencimento'], '%Y-%m-%d')
-            dias_para_vencimento = (data_vencimento - datetime.datetime.now()).days
-            vendas_previstas = previsoes_dict.get(produto_id, 0)
+    def avaliar_regras(self, inventario_df, previsoes_df, agora=None):
+        """
+        Avalia as regras de marketing (config/regras_marketing.yaml) sobre o inventário inteiro
+        de uma só vez, após uma única junção com as previsões pelo produto_id. Retorna
+        (sinalizados, estatisticas): um DataFrame com uma linha por (produto, regra) sinalizado,
+        na mesma ordem do inventário e das regras, e as contagens e tempos de cada regra.
+        """
+        # Previsão de cada produto (a última, se houver repetidas); produtos sem previsão ficam com 0
+        previsoes = previsoes_df.drop_duplicates('produto_id', keep='last')[['produto_id', 'yhat']]
+        dados = inventario_df.reset_index(drop=True).merge(previsoes, on='produto_id', how='left', sort=False)
+        dados['vendas_previstas'] = dados['yhat'].fillna(0)
 
-            # Estratégias para produtos próximos da validade
-            if dias_para_vencimento < 30:
-                estrategia = self.gerar_prompt_estrategia(
-                    produto_id=produto_id,
-                    nome_produto=row['nome_produto'],
-                    quantidade=quantidade,
-                    dias_para_vencimento=dias_para_vencimento,
-                    contexto="Produto com menos de 30 dias para vencer. Necessidade de escoar o estoque."
-                )
-                estrategias.append(estrategia)
+        agora = pd.Timestamp(agora if agora is not None else datetime.datetime.now())
+        dados['dias_para_vencimento'] = (dados['data_vencimento'] - agora).dt.days
 
-            # Estratégias para produtos com estoque alto e baixa demanda
-            if quantidade > demanda_prevista:
-                estrategia = self.gerar_prompt_estrategia(
-                    produto_id=produto_id,
-                    nome_produto=row['nome_produto'],
-                    quantidade=quantidade,
-                    contexto="Estoque alto em relação à demanda prevista."
-                )
-                estrategias.append(estrategia)
+        # As regras são compiladas uma única vez por versão do arquivo
+        plano = carregar_regras(self.regras)
+        mascaras, estatisticas = plano.avaliar(dados)
 
-            # Estratégias para vendas previstas menores que a demanda
-            if vendas_previstas < demanda_prevista:
-                estrategia = self.gerar_prompt_estrategia(
-                    produto_id=produto_id,
-                    nome_produto=row['nome_produto'],
-                    quantidade=quantidade,
-                    contexto="Vendas previstas menores que a demanda esperada."
-                )
-                estrategias.append(estrategia)
+        # Matriz linhas x regras: o np.nonzero percorre por linha e, dentro dela, pela ordem das regras
+        linhas, ordem_regras = np.nonzero(mascaras)
 
-        return estrategias
+        sinalizados = dados.iloc[linhas][['produto_id', 'nome_produto', 'quantidade', 'dias_para_vencimento']]
+        sinalizados = sinalizados.reset_index(drop=True)
+        informa_vencimento = np.array([regra.informa_vencimento for regra in plano.regras], dtype=bool)[ordem_regras]
+        sinalizados['dias_para_vencimento'] = sinalizados['dias_para_vencimento'].where(informa_vencimento)
+        sinalizados['contexto'] = np.array([regra.contexto for regra in plano.regras], dtype=object)[ordem_regras]
+        sinalizados['regra'] = np.array([regra.nome for regra in plano.regras], dtype=object)[ordem_regras]
+        return sinalizados, estatisticas
 
-    def gerar_prompt_estrategia(self, produto_id: str, nome_produto: str, quantidade: int, contexto: str, dias_para_vencimento: int = None):
+    def gerar_estrategias(self, sinalizados):
         """
-        Função para criar o prompt que será enviado ao modelo de IA, estruturado para gerar estratégias de marketing.
+        Monta os registros de estratégia de todos os produtos sinalizados, formatando o texto
+        uma única vez por quantidade distinta.
         """
-        prompt = f"Produto: {nome_produto} (ID: {produto_id})\n"
-        prompt += f"Quantidade em estoque: {quantidade}\n"
-        if dias_para_vencimento is not None:
-            prompt += f"Dias para vencimento: {dias_para_vencimento}\n"
-        prompt += f"Contexto: {contexto}\n"
-        prompt += "Crie uma estratégia de marketing para aumentar as vendas deste produto, levando em consideração as informações acima.\n"
-        prompt += "A estratégia deve incluir ações promocionais, canais de divulgação e incentivos para os clientes.\n"
-
-        # Simulação de retorno da estratégia gerada pela IA (essa parte seria substituída pela chamada ao modelo de IA)
-        estrategia = {
-            "produto": nome_produto,
-            "estrategia": f"Gerar uma campanha no Instagram e WhatsApp, destacando que há apenas {quantidade} unidades restantes. Oferecer descontos de 20% para vendas rápidas."
+        quantidades = sinalizados['quantidade'].to_numpy()
+        textos = {
+            quantidade: f"Gerar uma campanha no Instagram e WhatsApp, destacando que há apenas {quantidade} unidades restantes. Oferecer descontos de 20% para vendas rápidas."
+            for quantidade in pd.unique(quantidades)
         }
+        return [
+            {"produto": nome_produto, "estrategia": textos[quantidade]}
+            for nome_produto, quantidade in zip(sinalizados['nome_produto'].tolist(), quantidades)
+        ]
 
-        return estrategia
-
-    def _arun(self, inputs: dict):
-        raise NotImplementedError("Execução assíncrona não implementada.")
+    async def _arun(self, name: str, description: str, inventario: str, previsoes_vendas: str):
+        """
+        Versão assíncrona de _run: a leitura dos CSVs e a avaliação das regras rodam no executor
+        das ferramentas, sem bloquear o event loop.
+        """
+        return await executar_em_executor(self._run, name, description, inventario, previsoes_vendas)
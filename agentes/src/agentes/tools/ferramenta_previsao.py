@@ -1,8 +1,17 @@
+from statistics import NormalDist
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_squared_error
 from crewai_tools import BaseTool
+from utils.regressao_lote import calcular_meses_venda, regressao_linear_em_lote, prever_em_lote
+from utils.indice_vendas import IndiceVendas
+from utils.cache_dados import ler_dados
+from utils.hierarquia import Hierarquia
+from utils.ranking import top_n_itens
+from utils.assincrono import executar_em_executor
+from utils.modelo_global import NIVEL_INTERVALO_PADRAO
 
 import os
 
@@ -34,32 +43,82 @@ def preparar_dados_categoria(df, categoria):
     y = vendas_agrupadas['quantidade_vendida']
     return X, y
 
+# Função para prever, numa única passada, todas as séries de uma coluna de agrupamento
+def prever_vendas_em_lote(df, coluna_grupo, forecast_period=3):
+    """
+    Versão em lote de preparar_dados_* + prever_vendas: ajusta a regressão de todas as
+    séries de uma vez e prevê o ponto len(X) + forecast_period de cada uma.
+    Retorna um DataFrame indexado pelo grupo com as colunas 'previsao' e 'erro'.
+    """
+    meses_venda = calcular_meses_venda(df, coluna_grupo)
+    coeficientes = regressao_linear_em_lote(df[coluna_grupo], meses_venda, df['quantidade_vendida'])
+
+    # Verifica se há dados suficientes
+    coeficientes = coeficientes[coeficientes['n_observacoes'] >= 2]
+    return pd.DataFrame({
+        'previsao': prever_em_lote(coeficientes, coeficientes['n_observacoes'] + forecast_period),
+        'erro': coeficientes['mse']
+    })
+
+# Função para prever, com um único ajuste por série, todos os meses de 1 a 'horizonte'
+def prever_horizonte_em_lote(df, coluna_grupo, horizonte=6, nivel_intervalo=NIVEL_INTERVALO_PADRAO):
+    """
+    Usa as mesmas retas de prever_vendas_em_lote para os pontos x_max + 1..horizonte de cada
+    série (x em meses desde a primeira venda, como em utils/previsao.py), com intervalo
+    previsão ± z * raiz(mse) (distribuição normal com 'nivel_intervalo' de cobertura).
+    Previsões e limites negativos viram 0.
+
+    Retorna um DataFrame em formato longo no mesmo esquema do previsoes_horizonte.csv do
+    PredictToolMain: ds (fim do mês previsto), horizonte, yhat, yhat_lower, yhat_upper, a
+    coluna do grupo (para 'produto_id', também nome_produto e categoria) e nivel_intervalo.
+    """
+    meses_venda = calcular_meses_venda(df, coluna_grupo)
+    coeficientes = regressao_linear_em_lote(df[coluna_grupo], meses_venda, df['quantidade_vendida'])
+    coeficientes = coeficientes[coeficientes['n_observacoes'] >= 2]
+
+    passos = np.arange(1, horizonte + 1)
+    previsoes = coeficientes['intercepto'].to_numpy()[:, None] + coeficientes['inclinacao'].to_numpy()[:, None] * (
+        coeficientes['x_max'].to_numpy()[:, None] + passos[None, :]
+    )
+    margem = NormalDist().inv_cdf(0.5 + nivel_intervalo / 2) * np.sqrt(coeficientes['mse'].to_numpy())[:, None]
+
+    # Meses previstos: 1..horizonte meses depois do mês da última venda de cada grupo
+    ultimo_mes = df.groupby(coluna_grupo, observed=True)['data'].max().dt.to_period('M').reindex(coeficientes.index)
+    meses = pd.PeriodIndex(np.repeat(ultimo_mes.array, horizonte)) + np.tile(passos, len(coeficientes))
+
+    colunas = ['ds', 'horizonte', 'yhat', 'yhat_lower', 'yhat_upper', coluna_grupo]
+    resultado = pd.DataFrame({
+        'ds': meses.to_timestamp(how='end').normalize(),
+        'horizonte': np.tile(passos, len(coeficientes)),
+        'yhat': np.clip(previsoes.ravel(), 0, None),
+        'yhat_lower': np.clip((previsoes - margem).ravel(), 0, None),
+        'yhat_upper': np.clip((previsoes + margem).ravel(), 0, None),
+        coluna_grupo: np.repeat(coeficientes.index.to_numpy(), horizonte),
+    })
+    if coluna_grupo == 'produto_id':
+        atributos = df.groupby('produto_id', observed=True)[['nome_produto', 'categoria']].first()
+        resultado = resultado.join(atributos, on='produto_id')
+        colunas += ['nome_produto', 'categoria']
+    return resultado[colunas].assign(nivel_intervalo=nivel_intervalo)
+
 # Função para gerar relatório de previsão de vendas
 def gerar_relatorio_previsoes(df, forecast_period=3):
     # Prever vendas para todos os produtos
-    previsoes_produtos = {}
-    for produto_id in df['produto_id'].unique():
-        X, y = preparar_dados_produto(df, produto_id)
-        if len(X) >= 2:  # Verifica se há dados suficientes
-            previsao, erro = prever_vendas(X, y, forecast_period)
-            previsoes_produtos[produto_id] = previsao
-
-    # Prever vendas para todas as categorias
-    previsoes_categorias = {}
-    for categoria in df['categoria'].unique():
-        X, y = preparar_dados_categoria(df, categoria)
-        if len(X) >= 2:  # Verifica se há dados suficientes
-            previsao, erro = prever_vendas(X, y, forecast_period)
-            previsoes_categorias[categoria] = previsao
+    previsoes_produtos = prever_vendas_em_lote(df, 'produto_id', forecast_period)['previsao'].to_dict()
+
+    # Categorias como soma das previsões dos produtos, sem ajustar modelos próprios
+    agregadas = Hierarquia.de_dados(df).agregar(pd.Series(previsoes_produtos, dtype=float))
+    previsoes_categorias = Hierarquia.nivel(agregadas, 'categoria').to_dict()
 
     # Top 10 Produtos e Categorias
-    top_10_produtos = sorted(previsoes_produtos.items(), key=lambda x: x[1], reverse=True)[:10]
-    top_10_categorias = sorted(previsoes_categorias.items(), key=lambda x: x[1], reverse=True)[:10]
+    top_10_produtos = top_n_itens(previsoes_produtos, 10)
+    top_10_categorias = top_n_itens(previsoes_categorias, 10)
 
     # Gerar o conteúdo do relatório
     relatorio = {
         "top_10_produtos": top_10_produtos,
-        "top_10_categorias": top_10_categorias
+        "top_10_categorias": top_10_categorias,
+        "total": sum(previsoes_categorias.values())
     }
     
     return relatorio
@@ -76,9 +135,10 @@ def salvar_relatorio_em_markdown(relatorio, caminho_arquivo, df):
         file.write("## Top 10 Produtos com Maiores Previsões de Vendas\n")
         file.write("| Produto ID | Nome do Produto | Categoria | Previsão de Vendas |\n")
         file.write("|------------|-----------------|-----------|--------------------|\n")
+        indice = IndiceVendas(df, 'produto_id')
         for produto_id, previsao in relatorio['top_10_produtos']:
-            nome_produto = df[df['produto_id'] == produto_id]['nome_produto'].iloc[0]
-            categoria_produto = df[df['produto_id'] == produto_id]['categoria'].iloc[0]
+            nome_produto = indice.primeiro(produto_id, 'nome_produto')
+            categoria_produto = indice.primeiro(produto_id, 'categoria')
             file.write(f"| {produto_id} | {nome_produto} | {categoria_produto} | {previsao:.2f} |\n")
 
         # Detalhes do Top 10 Categorias
@@ -88,7 +148,10 @@ def salvar_relatorio_em_markdown(relatorio, caminho_arquivo, df):
         for categoria, previsao in relatorio['top_10_categorias']:
             file.write(f"| {categoria} | {previsao:.2f} |\n")
 
+        file.write(f"\n**Previsão total:** {relatorio['total']:.2f}\n")
+
         file.write("\n\n> **Nota:** As previsões são baseadas em modelos de regressão linear usando dados históricos de vendas.\n")
+        file.write("> As previsões de categoria e o total são as somas das previsões dos produtos.\n")
         file.write("> Relatório gerado automaticamente.\n")
 
 # Ferramenta de previsão em lote
@@ -102,7 +165,7 @@ class FerramentaPrevisaoDemanda(BaseTool):
             raise ValueError("O caminho do arquivo CSV de vendas ('caminho_csv') é obrigatório.")
 
         # Carregar os dados
-        df = pd.read_csv(inputs['caminho_csv'], parse_dates=['data'])
+        df = ler_dados(inputs['caminho_csv'], ['data', 'produto_id', 'nome_produto', 'categoria', 'quantidade_vendida'])
 
         # Gerar o relatório de previsões
         relatorio = gerar_relatorio_previsoes(df)
@@ -110,9 +173,15 @@ class FerramentaPrevisaoDemanda(BaseTool):
         # Salvar o relatório em Markdown
         caminho_relatorio = inputs.get('caminho_relatorio', 'results/relatorio_previsao.md')
         salvar_relatorio_em_markdown(relatorio, caminho_relatorio, df)
+
+        # Previsões de 1 a 'horizonte' meses por produto, em formato longo, ao lado do relatório
+        if 'horizonte' in inputs:
+            caminho_horizonte = os.path.join(os.path.dirname(caminho_relatorio), 'previsoes_horizonte.csv')
+            prever_horizonte_em_lote(df, 'produto_id', int(inputs['horizonte'])).to_csv(caminho_horizonte, index=False)
         
         print(f"Relatório gerado e salvo em {caminho_relatorio}.")
         return {"relatorio_markdown": relatorio, "caminho_relatorio": caminho_relatorio}
 
-    def _arun(self, inputs: dict):
-        raise NotImplementedError("Este agente não suporta execução assíncrona.")
+    async def _arun(self, inputs: dict):
+        # Leitura do CSV, ajustes dos modelos e gravação do relatório rodam no executor das ferramentas
+        return await executar_em_executor(self._run, inputs)
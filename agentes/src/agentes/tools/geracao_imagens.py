@@ -1,4 +1,5 @@
 from crewai_tools import BaseTool
+from utils.assincrono import executar_em_executor
 
 
 class FerramentaGeracaoImagensMarketing(BaseTool):
@@ -17,5 +18,6 @@ class FerramentaGeracaoImagensMarketing(BaseTool):
 
         return result
 
-    def _arun(self, inputs: dict):
-        raise NotImplementedError("Execução assíncrona não implementada.")
+    async def _arun(self, inputs: dict):
+        # A chamada de geração da imagem é bloqueante e roda no executor das ferramentas
+        return await executar_em_executor(self._run, inputs)
@@ -1,4 +1,5 @@
 from crewai_tools import BaseTool
+from utils.assincrono import executar_em_executor
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression
@@ -51,5 +52,6 @@ class FerramentaPrevisaoDemanda(BaseTool):
             "erro": erro
         }
 
-    def _arun(self, inputs: dict):
-        raise NotImplementedError("Este agente não suporta execução assíncrona.")
+    async def _arun(self, inputs: dict):
+        # O ajuste da regressão roda no executor das ferramentas, sem bloquear o event loop
+        return await executar_em_executor(self._run, inputs)
@@ -2,11 +2,137 @@ from pydantic import BaseModel, Field
 from typing import Any, Type
 from crewai_tools import tool
 import os
+import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_squared_error
-import joblib
+from utils.cache_dados import ler_dados
+from utils.registro_modelos import RegistroModelos, impressao_digital_dados
+from utils.codificacao import CodificadorCategorico
+from utils.treinamento import carregar_configuracoes_treino, comparar_configuracoes, gerar_relatorio_comparacao, treinar_e_medir
+
+# Nome do modelo no registro
+NOME_MODELO = 'sales_forecast_rf'
+
+# Configurações de treino do RandomForestRegressor (n_jobs, max_samples, max_depth...), ao lado do config/tasks.yaml
+CONFIG_TREINAMENTO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'treinamento.yaml')
+
+# Previsões do modelo registrado para as vendas atuais
+CAMINHO_PREVISOES = "../resultados/previsoes/previsoes_random_forest.csv"
+
+# Colunas categóricas e como codificá-las: 'ordinal' (um inteiro por coluna) ou 'onehot' (matriz esparsa)
+COLUNAS_CATEGORICAS = ['produto_id', 'nome_produto', 'categoria']
+MODO_CODIFICACAO = 'ordinal'
+
+# Função para obter a configuração de treino ativa e os parâmetros guardados no registro
+def parametros_treino():
+    """
+    Retorna (nome da configuração ativa, parâmetros do RandomForest, parâmetros registrados
+    com o modelo: os do RandomForest mais o modo de codificação).
+    """
+    ativa, configuracoes = carregar_configuracoes_treino(CONFIG_TREINAMENTO)
+    parametros_modelo = configuracoes[ativa]
+    return ativa, parametros_modelo, {**parametros_modelo, 'codificacao': MODO_CODIFICACAO}
+
+# Função para listar as colunas numéricas que preparar_features monta a partir das vendas
+def listar_colunas_numericas(vendas):
+    colunas = [c for c in vendas.columns if c not in COLUNAS_CATEGORICAS + ['quantidade_vendida', 'data']]
+    return colunas + [c for c in ('mes', 'ano') if c not in colunas]
+
+# Função para montar as variáveis de entrada do modelo a partir das vendas
+def preparar_features(vendas, codificador, colunas_numericas=None):
+    """
+    Junta as colunas numéricas das vendas, o mês e o ano da data e as colunas categóricas
+    codificadas pelo CodificadorCategorico (utils.codificacao). Retorna (X, nomes das colunas):
+    um DataFrame no modo ordinal ou uma matriz esparsa CSR no modo onehot.
+    Na previsão, 'colunas_numericas' alinha as colunas numéricas às usadas no treino.
+    """
+    numericas = vendas.drop(columns=COLUNAS_CATEGORICAS + ['quantidade_vendida', 'data'], errors='ignore')
+    numericas = numericas.assign(mes=vendas['data'].dt.month, ano=vendas['data'].dt.year).reset_index(drop=True)
+    if colunas_numericas is not None:
+        numericas = numericas.reindex(columns=colunas_numericas, fill_value=0)
+
+    codificadas = codificador.transformar(vendas)
+    nomes = list(numericas.columns) + codificador.nomes_colunas()
+    if codificador.modo == 'ordinal':
+        return pd.concat([numericas, codificadas], axis=1), nomes
+    return sparse.hstack([sparse.csr_matrix(numericas.to_numpy(dtype=np.float32)), codificadas], format='csr'), nomes
+
+# Função para encontrar a versão mais recente do modelo compatível com a configuração e as vendas
+def buscar_modelo_compativel(registro, vendas, impressao_digital=None):
+    """
+    Compatível: registrada com a configuração de treino ativa e o mesmo modo de codificação,
+    as mesmas colunas categóricas e as mesmas colunas numéricas das vendas informadas e, se
+    'impressao_digital' for informada, treinada com os mesmos dados (hash do conteúdo).
+    Retorna os metadados da versão ou None.
+    """
+    _, _, parametros = parametros_treino()
+    numericas = set(listar_colunas_numericas(vendas))
+    return next((
+        metadados for metadados in registro.versoes(NOME_MODELO)
+        if metadados['parametros'] == parametros
+        and metadados['codificacao']['colunas'] == COLUNAS_CATEGORICAS
+        and set(metadados['colunas_numericas']) == numericas
+        and (impressao_digital is None or metadados['impressao_digital'] == impressao_digital)
+    ), None)
+
+# Função para prever vendas com a versão mais recente compatível do modelo registrado, sem retreinar
+def prever_com_modelo_registrado(vendas, diretorio_modelos="../data/modelos", impressao_digital=None):
+    """
+    Usa a versão de buscar_modelo_compativel. Sem versão compatível, levanta ValueError em
+    vez de prever com um modelo de outra configuração.
+    """
+    registro = RegistroModelos(diretorio_modelos)
+    compativel = buscar_modelo_compativel(registro, vendas, impressao_digital)
+    if compativel is None:
+        ativa, _, _ = parametros_treino()
+        raise ValueError(
+            f"Nenhuma versão do modelo '{NOME_MODELO}' em {diretorio_modelos} é compatível com a configuração "
+            f"'{ativa}', a codificação '{MODO_CODIFICACAO}' e as colunas das vendas; treine o modelo com o "
+            "TrainSalesForecastTool."
+        )
+
+    modelo, metadados = registro.carregar(NOME_MODELO, versao=compativel['versao'])
+    codificador = CodificadorCategorico.de_dict(metadados['codificacao'])
+    X, _ = preparar_features(vendas, codificador, metadados['colunas_numericas'])
+    return modelo.predict(X)
+
+# Função para carregar e concatenar os dados de vendas históricos e atuais
+def carregar_vendas(arquivos):
+    return pd.concat([ler_dados(caminho) for caminho in arquivos], ignore_index=True)
+
+# Função para montar as bases de treino e teste a partir das vendas
+def preparar_treino(all_sales):
+    """
+    Retorna ((X_train, X_test, y_train, y_test), colunas, codificador).
+    """
+    # Codificar produto e categoria com um vocabulário fixo, sem uma coluna densa por produto
+    codificador = CodificadorCategorico(COLUNAS_CATEGORICAS, modo=MODO_CODIFICACAO).ajustar(all_sales)
+
+    # Definir as variáveis independentes (X) e a variável dependente (y)
+    X, colunas = preparar_features(all_sales, codificador)
+    y = all_sales['quantidade_vendida'].to_numpy()
+
+    # Dividir os dados em treino e teste
+    return train_test_split(X, y, test_size=0.2, random_state=42), colunas, codificador
+
+# Função para comparar as configurações do config/treinamento.yaml e salvar o relatório
+def comparar_configuracoes_treino(source_path="../data", caminho_relatorio="../resultados/treinamento/comparacao_configuracoes.md"):
+    """
+    Treina o modelo com cada configuração sobre a mesma divisão treino/teste e grava um
+    relatório com o tempo de ajuste, o pico de memória e o MSE de cada uma.
+    """
+    _, configuracoes = carregar_configuracoes_treino(CONFIG_TREINAMENTO)
+    (X_train, X_test, y_train, y_test), _, _ = preparar_treino(carregar_vendas(
+        [f'{source_path}/current_sales.csv', f'{source_path}/historical_sales_data.csv']
+    ))
+    comparacao = comparar_configuracoes(configuracoes, X_train, y_train, X_test, y_test)
+
+    relatorio = gerar_relatorio_comparacao(comparacao, X_train.shape[0])
+    os.makedirs(os.path.dirname(caminho_relatorio), exist_ok=True)
+    with open(caminho_relatorio, 'w', encoding='utf-8') as arquivo:
+        arquivo.write(relatorio)
+    return relatorio
 
 # Esquema de entrada da tool usando Pydantic
 class TrainSalesForecastToolSchema(BaseModel):
@@ -26,49 +152,63 @@ class TrainSalesForecastTool:
     def _run(self) -> str:
         """
         Função responsável por treinar o modelo de previsão de vendas e salvar no diretório 'models'.
+        Reaproveita a versão registrada compatível (mesma configuração, colunas e conteúdo dos
+        dados de treino) e só treina quando não há nenhuma; em seguida prevê as vendas atuais
+        com o modelo registrado e grava as previsões em CAMINHO_PREVISOES.
         """
         source_path = "../data"
         destination_model_path = "../data"
         # Verificar se o diretório de destino existe, se não, criar
         os.makedirs(destination_model_path, exist_ok=True)
 
-        # Carregar os dados de vendas históricos e atuais do caminho de origem
-        current_sales = pd.read_csv(f'{source_path}/current_sales.csv')
-        historical_sales = pd.read_csv(f'{source_path}/historical_sales_data.csv')
-
-        # Concatenar os dois datasets
-        all_sales = pd.concat([current_sales, historical_sales])
-
-        # Converter a coluna 'data' para o formato datetime
-        all_sales['data'] = pd.to_datetime(all_sales['data'])
-
-        # Extração de informações de tempo (mês e ano)
-        all_sales['mes'] = all_sales['data'].dt.month
-        all_sales['ano'] = all_sales['data'].dt.year
-
-        # Criar dummies para variáveis categóricas (produto e categoria)
-        all_sales = pd.get_dummies(all_sales, columns=['produto_id', 'nome_produto', 'categoria'], drop_first=True)
-
-        # Definir as variáveis independentes (X) e a variável dependente (y)
-        X = all_sales.drop(columns=['quantidade_vendida', 'data'])
-        y = all_sales['quantidade_vendida']
-
-        # Dividir os dados em treino e teste
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-        # Treinar o modelo Random Forest
-        model = RandomForestRegressor()
-        model.fit(X_train, y_train)
-
-        # Fazer previsões no conjunto de teste
-        y_pred = model.predict(X_test)
-
-        # Avaliar o modelo
-        mse = mean_squared_error(y_test, y_pred)
-        print(f'Mean Squared Error: {mse}')
-
-        # Salvar o modelo treinado no diretório 'models'
-        model_path = f'{destination_model_path}/sales_model.pkl'
-        joblib.dump(model, model_path)
-
-        return f"Modelo salvo em: {model_path}"
+        # Parâmetros do RandomForest da configuração ativa do config/treinamento.yaml
+        ativa, parametros_modelo, parametros = parametros_treino()
+
+        # Reaproveitar o modelo registrado se o conteúdo dos dados de treino e os parâmetros não mudaram
+        arquivos = [f'{source_path}/current_sales.csv', f'{source_path}/historical_sales_data.csv']
+        all_sales = carregar_vendas(arquivos)
+        registro = RegistroModelos(f'{destination_model_path}/modelos')
+        impressao_digital = impressao_digital_dados(all_sales)
+        existente = buscar_modelo_compativel(registro, all_sales, impressao_digital)
+        if existente is not None:
+            mensagem = f"Modelo reaproveitado (dados de treino inalterados): {registro.diretorio}/{NOME_MODELO} versão {existente['versao']}"
+        else:
+            mensagem = self._treinar(registro, all_sales, impressao_digital, ativa, parametros_modelo, parametros)
+
+        # Previsão das vendas atuais com o modelo registrado, sem retreinar
+        vendas_atuais = ler_dados(arquivos[0])
+        previsoes = prever_com_modelo_registrado(vendas_atuais, registro.diretorio, impressao_digital)
+        os.makedirs(os.path.dirname(CAMINHO_PREVISOES), exist_ok=True)
+        vendas_atuais[['data', 'produto_id']].assign(previsao=previsoes).to_csv(CAMINHO_PREVISOES, index=False)
+        return f"{mensagem}. Previsões das vendas atuais em {CAMINHO_PREVISOES}"
+
+    def _treinar(self, registro, all_sales, impressao_digital, ativa, parametros_modelo, parametros):
+        (X_train, X_test, y_train, y_test), colunas, codificador = preparar_treino(all_sales)
+
+        # Treinar o modelo Random Forest medindo tempo de ajuste, pico de memória e MSE no conjunto de teste
+        model, metricas = treinar_e_medir(parametros_modelo, X_train, y_train, X_test, y_test)
+        print(f"Configuração '{ativa}': ajuste em {metricas['tempo_ajuste_s']:.2f}s, "
+              f"pico de memória {metricas['pico_memoria_mb']:.1f} MB, Mean Squared Error: {metricas['mse']}")
+
+        # Registrar o modelo treinado com a impressão digital dos dados, as colunas, as métricas e o vocabulário
+        metadados = registro.registrar(
+            NOME_MODELO, model, colunas, metricas=metricas,
+            impressao_digital=impressao_digital, parametros=parametros,
+            extras={
+                'configuracao': ativa,
+                'codificacao': codificador.para_dict(),
+                'colunas_numericas': colunas[:len(colunas) - len(codificador.nomes_colunas())],
+            }
+        )
+
+        return f"Modelo salvo em: {registro.diretorio}/{NOME_MODELO} versão {metadados['versao']}"
+
+
+if __name__ == "__main__":
+    # Executar a partir de src/agentes: python -m tools.sales_forecast_tool --comparar
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Treino do modelo RandomForest de previsão de vendas.")
+    parser.add_argument("--comparar", action="store_true", help="Comparar todas as configurações do config/treinamento.yaml")
+    argumentos = parser.parse_args()
+    print(comparar_configuracoes_treino() if argumentos.comparar else TrainSalesForecastTool()._run())
@@ -0,0 +1,94 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+
+# Função para ler as dependências declaradas no config/tasks.yaml
+def carregar_dependencias(caminho_tasks):
+    """
+    Retorna um dicionário {nome da task: [nomes das tasks das quais ela depende]}.
+    """
+    with open(caminho_tasks, 'r', encoding='utf-8') as arquivo:
+        configuracao = yaml.safe_load(arquivo) or {}
+    return {nome: list((definicao or {}).get('dependencies') or []) for nome, definicao in configuracao.items()}
+
+
+# Função para montar o grafo restrito às tasks que serão executadas e verificar ciclos
+def montar_grafo(nomes, dependencias):
+    """
+    Retorna {task: dependências} apenas com as tasks de 'nomes'. Dependências de tasks que não
+    fazem parte da execução (por exemplo, declaradas no YAML mas desativadas no crew) são
+    ignoradas. Gera ValueError se houver um ciclo.
+    """
+    nomes = list(nomes)
+    grafo = {nome: [dep for dep in dependencias.get(nome, []) if dep in nomes] for nome in nomes}
+
+    # Ordenação topológica (Kahn): sobram tasks sem ordem apenas se houver ciclo
+    pendentes = {nome: len(deps) for nome, deps in grafo.items()}
+    prontas = [nome for nome, quantidade in pendentes.items() if quantidade == 0]
+    visitadas = 0
+    while prontas:
+        atual = prontas.pop()
+        visitadas += 1
+        for nome, deps in grafo.items():
+            if atual in deps:
+                pendentes[nome] -= 1
+                if pendentes[nome] == 0:
+                    prontas.append(nome)
+    if visitadas != len(grafo):
+        ciclo = sorted(nome for nome, quantidade in pendentes.items() if quantidade > 0)
+        raise ValueError(f"As dependências das tasks formam um ciclo: {ciclo}")
+    return grafo
+
+
+# Função padrão para executar uma task do crewAI com a saída das dependências como contexto
+def executar_task(tarefa, contexto):
+    # Assim como no Crew, a task usa as próprias ferramentas ou, na falta delas, as do agente
+    return tarefa.execute_sync(agent=tarefa.agent, context=contexto, tools=tarefa.tools or tarefa.agent.tools)
+
+
+# Função para executar as tasks em paralelo respeitando as dependências
+def executar_dag(tarefas, dependencias, max_workers=None, executar=executar_task):
+    """
+    Executa as tasks de 'tarefas' ({nome: Task}) em um ThreadPoolExecutor. Cada task é
+    submetida assim que todas as suas dependências terminam, recebendo como contexto as saídas
+    delas; tasks independentes rodam ao mesmo tempo e o tempo total fica limitado ao caminho
+    crítico do grafo, e não à soma das tasks.
+
+    Se uma task falhar, nenhuma nova task é iniciada, as que já estão em execução terminam e
+    a exceção é repassada. Retorna {nome: saída} na ordem de 'tarefas'.
+    """
+    grafo = montar_grafo(tarefas, dependencias)
+    saidas = {}
+    erro = None
+    inicio = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(grafo) or 1) as executor:
+        em_execucao = {}
+
+        def submeter_prontas():
+            for nome, deps in grafo.items():
+                if nome not in saidas and nome not in em_execucao.values() and all(dep in saidas for dep in deps):
+                    contexto = "\n\n".join(str(getattr(saidas[dep], 'raw', saidas[dep])) for dep in deps) or None
+                    em_execucao[executor.submit(executar, tarefas[nome], contexto)] = nome
+
+        submeter_prontas()
+        while em_execucao:
+            concluidos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                nome = em_execucao.pop(futuro)
+                try:
+                    saidas[nome] = futuro.result()
+                    logger.info("Task '%s' concluída em %.1fs.", nome, time.perf_counter() - inicio)
+                except Exception as e:
+                    erro = erro or e
+            if erro is None:
+                submeter_prontas()
+
+    if erro is not None:
+        raise erro
+    return {nome: saidas[nome] for nome in tarefas}
@@ -0,0 +1,179 @@
+import csv
+import hashlib
+import json
+import os
+import threading
+import uuid
+import pandas as pd
+
+from utils.ingestao import (
+    COLUNAS_CHAVE, TAMANHO_CHUNK_PADRAO, agregar_chunks, combinar_agregados,
+    fim_ultima_linha_completa, ler_csv_em_chunks
+)
+
+# Quantidade de bytes do início do arquivo usada para detectar que o CSV foi reescrito
+BYTES_ASSINATURA = 4096
+
+# Uma trava por diretório: atualizações concorrentes no mesmo processo são feitas uma de cada vez
+_travas_diretorio = {}
+_trava_travas = threading.Lock()
+
+
+def _trava_do_diretorio(diretorio):
+    with _trava_travas:
+        return _travas_diretorio.setdefault(os.path.abspath(diretorio), threading.Lock())
+
+
+class AgregacaoMensal:
+    """
+    Totais mensais de vendas por produto persistidos em disco e atualizados de forma incremental.
+
+    Para cada CSV de origem guarda-se a marca d'água de ingestão: a posição (em bytes) até onde
+    o arquivo já foi agregado. A cada atualização apenas as linhas acrescentadas depois dessa
+    posição são lidas, agregadas por mês e somadas aos totais existentes, de modo que o custo é
+    proporcional às linhas novas e não ao histórico inteiro. As linhas são lidas em chunks de
+    'tamanho_chunk' linhas (utils.ingestao), então nem a primeira construção nem uma
+    reconstrução carregam o CSV inteiro em memória.
+
+    O mês ainda aberto (o da data mais recente já vista) não recebe tratamento especial na
+    gravação: como os totais são somas, as vendas novas desse mês são simplesmente acumuladas
+    no total parcial já guardado. O método mes_aberto() informa qual é esse mês, para quem
+    precisar descartá-lo.
+
+    Se um CSV encolher, tiver o início alterado ou se o conjunto de arquivos mudar, os totais
+    são reconstruídos do zero.
+
+    Cada versão dos totais é gravada em um arquivo próprio e o estado.json (posições, marca
+    d'água e nome do arquivo de totais) é substituído atomicamente por último: ele é o ponto de
+    confirmação, e uma execução interrompida nunca deixa posições e totais inconsistentes.
+    """
+
+    def __init__(self, diretorio, tamanho_chunk=TAMANHO_CHUNK_PADRAO):
+        self.diretorio = diretorio
+        self.tamanho_chunk = tamanho_chunk
+        self.caminho_estado = os.path.join(diretorio, 'estado.json')
+        self.estado = None
+
+    def atualizar(self, caminhos_csv):
+        """
+        Incorpora aos totais as linhas novas dos CSVs e retorna os totais mensais atualizados.
+        """
+        caminhos_csv = [os.path.abspath(caminho) for caminho in caminhos_csv]
+        with _trava_do_diretorio(self.diretorio):
+            return self._atualizar(caminhos_csv)
+
+    def _atualizar(self, caminhos_csv):
+        estado, totais = self._carregar()
+
+        if estado is None or set(estado['fontes']) != set(caminhos_csv) or any(
+                not self._continua_valido(caminho, estado['fontes'][caminho]) for caminho in caminhos_csv):
+            # O arquivo de totais anterior é mantido no estado apenas para ser removido ao salvar
+            estado = {'fontes': {}, 'marca_dagua': None, 'arquivo_totais': (estado or {}).get('arquivo_totais')}
+            totais = None
+
+        novos = []
+        for caminho in caminhos_csv:
+            fonte = estado['fontes'].get(caminho)
+            if fonte is None:
+                fonte = {'cabecalho': self._ler_cabecalho(caminho), 'posicao': None, 'assinatura': None}
+                estado['fontes'][caminho] = fonte
+
+            agregado, ultima_data = self._agregar_novas_linhas(caminho, fonte)
+            if agregado is not None:
+                novos.append(agregado)
+                if estado['marca_dagua'] is None or ultima_data > pd.Timestamp(estado['marca_dagua']):
+                    estado['marca_dagua'] = ultima_data.isoformat()
+
+        if totais is None or novos:
+            totais = combinar_agregados(([totais] if totais is not None else []) + novos)
+            self._salvar(estado, totais)
+        else:
+            self._salvar_estado(estado)
+
+        self.estado = estado
+        return totais
+
+    def mes_aberto(self):
+        """
+        Retorna o mês (rótulo de fim de mês, como no pd.Grouper mensal) da venda mais
+        recente já agregada, cujo total ainda pode receber vendas.
+        """
+        marca = self.estado.get('marca_dagua') if self.estado else None
+        if marca is None:
+            return None
+        return pd.Timestamp(marca) + pd.offsets.MonthEnd(0)
+
+    def _carregar(self):
+        if not os.path.exists(self.caminho_estado):
+            return None, None
+        with open(self.caminho_estado, 'r', encoding='utf-8') as arquivo:
+            estado = json.load(arquivo)
+        caminho_totais = os.path.join(self.diretorio, estado['arquivo_totais'])
+        if not os.path.exists(caminho_totais):
+            return None, None
+        totais = pd.read_csv(caminho_totais, parse_dates=['data'])
+        return estado, totais
+
+    def _continua_valido(self, caminho, fonte):
+        # O arquivo só pode ter crescido: mesmo cabeçalho, mesmo início e tamanho >= posição
+        if not os.path.exists(caminho) or os.path.getsize(caminho) < fonte['posicao']:
+            return False
+        if self._ler_cabecalho(caminho) != fonte['cabecalho']:
+            return False
+        return self._assinatura(caminho, fonte['posicao']) == fonte['assinatura']
+
+    @staticmethod
+    def _ler_cabecalho(caminho):
+        with open(caminho, 'r', encoding='utf-8') as arquivo:
+            return arquivo.readline().rstrip('\r\n')
+
+    @staticmethod
+    def _assinatura(caminho, posicao):
+        with open(caminho, 'rb') as arquivo:
+            return hashlib.sha256(arquivo.read(min(posicao, BYTES_ASSINATURA))).hexdigest()
+
+    def _agregar_novas_linhas(self, caminho, fonte):
+        """
+        Agrega, em chunks, as linhas completas acrescentadas ao CSV depois da posição registrada
+        e avança a posição. Uma última linha sem quebra de linha (ainda sendo gravada) fica para
+        a próxima vez. Retorna (totais mensais das linhas novas, maior data) ou (None, None).
+        """
+        with open(caminho, 'rb') as arquivo:
+            if fonte['posicao'] is None:
+                arquivo.readline()  # Cabeçalho
+                inicio = arquivo.tell()
+            else:
+                inicio = fonte['posicao']
+            fim = fim_ultima_linha_completa(arquivo, inicio)
+
+        colunas = next(csv.reader([fonte['cabecalho']]))
+        agregado, ultima_data = agregar_chunks(ler_csv_em_chunks(
+            caminho, colunas, inicio, fim,
+            usecols=COLUNAS_CHAVE + ['quantidade_vendida'],
+            tamanho_chunk=self.tamanho_chunk
+        ))
+
+        fonte['posicao'] = fim
+        fonte['assinatura'] = self._assinatura(caminho, fim)
+        return agregado, ultima_data
+
+    def _salvar(self, estado, totais):
+        os.makedirs(self.diretorio, exist_ok=True)
+        anterior = estado.get('arquivo_totais')
+        estado['arquivo_totais'] = f"totais_mensais.{uuid.uuid4().hex}.csv"
+        totais.to_csv(os.path.join(self.diretorio, estado['arquivo_totais']), index=False)
+        self._salvar_estado(estado)
+
+        # Só depois da confirmação do novo estado a versão anterior dos totais pode ser removida
+        if anterior and anterior != estado['arquivo_totais']:
+            try:
+                os.remove(os.path.join(self.diretorio, anterior))
+            except FileNotFoundError:
+                pass
+
+    def _salvar_estado(self, estado):
+        os.makedirs(self.diretorio, exist_ok=True)
+        temporario = f"{self.caminho_estado}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(estado, arquivo)
+        os.replace(temporario, self.caminho_estado)
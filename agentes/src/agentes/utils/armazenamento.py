@@ -0,0 +1,116 @@
+import csv
+import os
+import threading
+import pandas as pd
+
+# pyarrow é opcional: sem ele os dados continuam sendo lidos do CSV, já com os tipos abaixo
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_DISPONIVEL = True
+except ImportError:
+    PARQUET_DISPONIVEL = False
+
+# Tipos das colunas conhecidas dos arquivos de vendas, histórico, inventário e previsões
+TIPOS_COLUNAS = {
+    'produto_id': 'category',
+    'nome_produto': 'category',
+    'categoria': 'category',
+    'quantidade_vendida': 'int32',
+    'quantidade': 'int32',
+    'predicted_demand': 'int32',
+    'preco_unitario': 'float64',
+    'yhat': 'float64',
+}
+COLUNAS_DATA = ['data', 'data_vencimento', 'ds']
+
+# Subdiretório (ao lado do CSV) onde ficam as versões colunares
+DIRETORIO_COLUNAR = '.colunar'
+
+# Chave dos metadados do Parquet que guarda o mtime do CSV de origem
+CHAVE_MTIME = b'agentes_mtime_csv'
+
+
+# Função para obter o caminho do arquivo colunar correspondente a um CSV
+def caminho_colunar(caminho_csv):
+    pasta, arquivo = os.path.split(os.path.abspath(caminho_csv))
+    nome = os.path.splitext(arquivo)[0]
+    return os.path.join(pasta, DIRETORIO_COLUNAR, f"{nome}.parquet")
+
+
+# Função para verificar se as linhas do CSV têm mais campos que o cabeçalho
+def _tem_campos_excedentes(caminho_csv):
+    with open(caminho_csv, newline='', encoding='utf-8') as arquivo:
+        linhas = csv.reader(arquivo)
+        cabecalho = next(linhas, [])
+        primeira = next(linhas, [])
+    return len(primeira) > len(cabecalho)
+
+
+# Função para ler um CSV aplicando os tipos de TIPOS_COLUNAS e COLUNAS_DATA
+def ler_csv_tipado(caminho_csv, colunas=None):
+    """
+    Lê o CSV já com os tipos definidos (categorias, int32, datas).
+
+    Quando as linhas têm mais campos que o cabeçalho (ex.: localizacao "Corredor 1, Prateleira C"
+    gravada sem aspas no inventário), o excedente é reunido na última coluna, em vez de
+    deslocar as colunas como faria o pd.read_csv padrão.
+    """
+    cabecalho = list(pd.read_csv(caminho_csv, nrows=0).columns)
+    selecionadas = cabecalho if colunas is None else list(colunas)
+    datas = [coluna for coluna in COLUNAS_DATA if coluna in selecionadas]
+    tipos = {coluna: tipo for coluna, tipo in TIPOS_COLUNAS.items() if coluna in selecionadas}
+
+    if not _tem_campos_excedentes(caminho_csv):
+        return pd.read_csv(caminho_csv, usecols=selecionadas, dtype=tipos, parse_dates=datas)[selecionadas]
+
+    # O parser C não aceita usecols com nomes a mais, então o arquivo é lido inteiro
+    ultima = cabecalho[-1]
+    df = pd.read_csv(caminho_csv, header=None, skiprows=1, names=cabecalho + ['_excedente'],
+                     index_col=False, dtype={'_excedente': object, ultima: object})
+    excedente = df.pop('_excedente')
+    df[ultima] = df[ultima].where(excedente.isna(), df[ultima] + ',' + excedente)
+
+    df = df[selecionadas]
+    for coluna in datas:
+        df[coluna] = pd.to_datetime(df[coluna])
+    return df.astype(tipos)
+
+
+# Função para converter um CSV para Parquet quando não existe versão atualizada
+def atualizar_colunar(caminho_csv):
+    """
+    Garante que a versão colunar do CSV exista e corresponda ao mtime atual do CSV,
+    refazendo a conversão quando o CSV foi alterado. Retorna o caminho do Parquet.
+    """
+    destino = caminho_colunar(caminho_csv)
+    mtime = str(os.stat(caminho_csv).st_mtime_ns).encode()
+
+    if os.path.exists(destino):
+        metadados = pq.read_schema(destino).metadata or {}
+        if metadados.get(CHAVE_MTIME) == mtime:
+            return destino
+
+    tabela = pa.Table.from_pandas(ler_csv_tipado(caminho_csv), preserve_index=False)
+    tabela = tabela.replace_schema_metadata({**(tabela.schema.metadata or {}), CHAVE_MTIME: mtime})
+
+    # Escrita em arquivo temporário + os.replace para que leitores nunca vejam um arquivo parcial
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporario = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+    pq.write_table(tabela, temporario)
+    os.replace(temporario, destino)
+    return destino
+
+
+# Função principal de leitura de dados usada pelas ferramentas
+def carregar_dados(caminho_csv, colunas=None):
+    """
+    Carrega os dados de um CSV pela sua versão colunar (Parquet), convertendo-o apenas na
+    primeira leitura ou quando o CSV muda. 'colunas' limita as colunas lidas do disco.
+    Sem pyarrow instalado, lê o próprio CSV com os mesmos tipos.
+    """
+    if not PARQUET_DISPONIVEL:
+        return ler_csv_tipado(caminho_csv, colunas)
+
+    colunas = None if colunas is None else list(colunas)
+    return pd.read_parquet(atualizar_colunar(caminho_csv), columns=colunas)
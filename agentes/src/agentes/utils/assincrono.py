@@ -0,0 +1,21 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Quantidade de threads para o trabalho bloqueante das ferramentas, configurável pela variável de ambiente AGENTES_THREADS_ASYNC
+THREADS_PADRAO = int(os.environ.get("AGENTES_THREADS_ASYNC", str(min(32, (os.cpu_count() or 1) + 4))))
+
+# Executor único do processo, compartilhado pelos _arun de todas as ferramentas
+executor_ferramentas = ThreadPoolExecutor(max_workers=THREADS_PADRAO, thread_name_prefix="ferramenta")
+
+
+# Função para executar uma função bloqueante (pandas, modelos, leitura e escrita de arquivos) fora do event loop
+async def executar_em_executor(funcao, *args, **kwargs):
+    """
+    Executa funcao(*args, **kwargs) no executor das ferramentas e aguarda o resultado sem
+    bloquear o event loop, de modo que várias chamadas podem ser atendidas ao mesmo tempo
+    no mesmo processo. Exceções da função são repassadas a quem aguarda.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor_ferramentas, functools.partial(funcao, *args, **kwargs))
@@ -0,0 +1,140 @@
+import os
+import threading
+from collections import OrderedDict
+
+from utils.armazenamento import carregar_dados
+
+# Orçamento de memória padrão do cache, configurável pela variável de ambiente AGENTES_CACHE_DADOS_MB
+ORCAMENTO_PADRAO_MB = int(os.environ.get("AGENTES_CACHE_DADOS_MB", "512"))
+
+
+class CacheDados:
+    """
+    Cache em memória, compartilhado pelo processo, dos DataFrames lidos pelas ferramentas.
+
+    A chave de cada entrada é (caminho absoluto, mtime do arquivo, opções de leitura); assim um
+    arquivo alterado em disco é relido automaticamente. Cada entrada guarda só as colunas já
+    pedidas: o carregador lê do disco apenas as colunas que faltam (projeção de colunas do
+    Parquet) e elas são acrescentadas à entrada, de modo que ferramentas que usam colunas
+    diferentes do mesmo arquivo compartilham a mesma entrada. Uma leitura sem 'colunas' carrega
+    o arquivo inteiro. As entradas são descartadas na ordem LRU quando o uso de memória passa
+    do orçamento.
+
+    Os DataFrames devolvidos são cópias rasas: adicionar ou substituir colunas é seguro, mas
+    os valores não devem ser alterados in-place.
+    """
+
+    def __init__(self, orcamento_bytes=ORCAMENTO_PADRAO_MB * 1024 * 1024, carregador=carregar_dados):
+        self.orcamento_bytes = orcamento_bytes
+        self.carregador = carregador
+        self.acertos = 0
+        self.faltas = 0
+        self.uso_bytes = 0
+        self._entradas = OrderedDict()  # chave -> (DataFrame, tamanho em bytes, arquivo inteiro?)
+        self._trava = threading.RLock()
+        self._travas_carga = {}  # Uma trava por chave, para que cada arquivo seja lido uma única vez
+
+    def obter(self, caminho, colunas=None, **opcoes):
+        """
+        Retorna os dados do arquivo (apenas 'colunas', se informado), lendo com o carregador
+        somente as colunas que ainda não estão no cache.
+        """
+        caminho = os.path.abspath(caminho)
+        chave = (caminho, os.stat(caminho).st_mtime_ns, tuple(sorted(opcoes.items())))
+        colunas = None if colunas is None else list(colunas)
+
+        with self._trava:
+            df = self._buscar(chave, colunas)
+            if df is None:
+                trava_carga = self._travas_carga.setdefault(chave, threading.Lock())
+
+        if df is None:
+            # Leituras concorrentes do mesmo arquivo esperam a primeira em vez de repetir a leitura
+            with trava_carga:
+                with self._trava:
+                    df = self._buscar(chave, colunas)
+                    entrada = self._entradas.get(chave)
+                if df is None:
+                    if colunas is None:
+                        df, completo = self.carregador(caminho, **opcoes), True
+                    else:
+                        # Lê do disco só as colunas que faltam e as junta às já guardadas
+                        existente = entrada[0] if entrada is not None else None
+                        faltantes = [c for c in colunas if existente is None or c not in existente.columns]
+                        novas = self.carregador(caminho, colunas=faltantes, **opcoes)
+                        df = novas if existente is None else existente.assign(**{c: novas[c].to_numpy() for c in faltantes})
+                        completo = False
+                    with self._trava:
+                        self.faltas += 1
+                        self._guardar(chave, df, completo)
+                        self._travas_carga.pop(chave, None)
+
+        if colunas is not None:
+            return df[colunas]
+        return df.copy(deep=False)
+
+    def _buscar(self, chave, colunas=None):
+        # Acerto só quando a entrada tem todas as colunas pedidas (ou o arquivo inteiro)
+        entrada = self._entradas.get(chave)
+        if entrada is None:
+            return None
+        df, _, completo = entrada
+        if not completo and (colunas is None or any(c not in df.columns for c in colunas)):
+            return None
+        self._entradas.move_to_end(chave)
+        self.acertos += 1
+        return df
+
+    def _guardar(self, chave, df, completo=True):
+        # Entradas de versões anteriores do mesmo arquivo não serão mais usadas
+        for antiga in [c for c in self._entradas if c[0] == chave[0] and c[1] != chave[1]]:
+            self._remover(antiga)
+        # A entrada com menos colunas da mesma versão é substituída
+        if chave in self._entradas:
+            self._remover(chave)
+
+        # Um DataFrame maior que o orçamento inteiro é devolvido sem ser guardado
+        tamanho = int(df.memory_usage(deep=True).sum())
+        if tamanho > self.orcamento_bytes:
+            return
+
+        self._entradas[chave] = (df, tamanho, completo)
+        self.uso_bytes += tamanho
+        while self.uso_bytes > self.orcamento_bytes:
+            self._remover(next(iter(self._entradas)))
+
+    def _remover(self, chave):
+        _, tamanho, _ = self._entradas.pop(chave)
+        self.uso_bytes -= tamanho
+
+    def limpar(self):
+        """
+        Remove todas as entradas e zera os contadores.
+        """
+        with self._trava:
+            self._entradas.clear()
+            self.uso_bytes = 0
+            self.acertos = 0
+            self.faltas = 0
+
+    def estatisticas(self):
+        """
+        Retorna os contadores de acertos/faltas e o uso de memória do cache.
+        """
+        with self._trava:
+            return {
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "entradas": len(self._entradas),
+                "uso_bytes": self.uso_bytes,
+                "orcamento_bytes": self.orcamento_bytes,
+            }
+
+
+# Cache único do processo, compartilhado por todas as ferramentas
+cache_dados = CacheDados()
+
+
+# Função de leitura usada pelas ferramentas no lugar de pd.read_csv
+def ler_dados(caminho, colunas=None, **opcoes):
+    return cache_dados.obter(caminho, colunas, **opcoes)
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+import threading
+import pandas as pd
+
+
+class CachePrevisoes:
+    """
+    Cache persistente (arquivo JSON) das previsões por série.
+
+    A chave é a impressão digital da série mensal do produto (datas e quantidades) junto com
+    os hiperparâmetros do modelo: se nem a série nem os parâmetros mudaram, a previsão
+    guardada é reaproveitada e o modelo não precisa ser ajustado novamente.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.acertos = 0
+        self.faltas = 0
+        self._entradas = {}
+        if os.path.exists(caminho):
+            with open(caminho, 'r', encoding='utf-8') as arquivo:
+                self._entradas = json.load(arquivo)
+
+    @staticmethod
+    def impressao_digital(serie, parametros):
+        """
+        Calcula o hash SHA-256 da série (colunas 'ds' e 'y') e dos parâmetros do modelo.
+        """
+        hash_serie = hashlib.sha256()
+        hash_serie.update(json.dumps(parametros, sort_keys=True, default=str).encode('utf-8'))
+        hash_serie.update(pd.util.hash_pandas_object(serie[['ds', 'y']], index=False).to_numpy().tobytes())
+        return hash_serie.hexdigest()
+
+    def obter(self, chave):
+        """
+        Retorna as previsões guardadas da série (lista de {'ds', 'horizonte', 'yhat',
+        'yhat_lower', 'yhat_upper'}) ou None se a chave não estiver no cache.
+        """
+        registros = self._entradas.get(chave)
+        # Entradas do formato antigo (um único mês, sem intervalos) contam como ausentes
+        if not isinstance(registros, list):
+            self.faltas += 1
+            return None
+        self.acertos += 1
+        return [{**registro, 'ds': pd.Timestamp(registro['ds'])} for registro in registros]
+
+    def guardar(self, chave, previsoes):
+        self._entradas[chave] = [
+            {
+                'ds': pd.Timestamp(previsao['ds']).isoformat(),
+                'horizonte': int(previsao['horizonte']),
+                'yhat': float(previsao['yhat']),
+                'yhat_lower': float(previsao['yhat_lower']),
+                'yhat_upper': float(previsao['yhat_upper']),
+            }
+            for previsao in previsoes
+        ]
+
+    def podar(self, chaves):
+        """
+        Mantém apenas as chaves informadas (ex.: as séries usadas na execução atual),
+        evitando que o arquivo cresça com séries antigas.
+        """
+        chaves = set(chaves)
+        self._entradas = {chave: valor for chave, valor in self._entradas.items() if chave in chaves}
+
+    def salvar(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+        temporario = f"{self.caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(self._entradas, arquivo)
+        os.replace(temporario, self.caminho)
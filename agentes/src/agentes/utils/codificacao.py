@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Modos de codificação suportados
+MODOS_CODIFICACAO = ('ordinal', 'onehot')
+
+
+class CodificadorCategorico:
+    """
+    Codifica colunas categóricas com um vocabulário fixo, aprendido no treino e persistido junto
+    com o modelo (para_dict/de_dict), de modo que a previsão usa exatamente as mesmas colunas.
+
+    modo='ordinal': uma coluna int32 por variável com o índice do valor no vocabulário; a
+    memória cresce só com o número de linhas, não com o de produtos.
+    modo='onehot': uma matriz esparsa CSR (scipy) com um 1 por variável em cada linha, no lugar
+    das colunas densas do pd.get_dummies.
+
+    Valores fora do vocabulário (produtos novos) viram -1 no modo ordinal e uma linha sem
+    nenhum 1 no modo onehot.
+    """
+
+    def __init__(self, colunas, modo='ordinal', vocabulario=None):
+        if modo not in MODOS_CODIFICACAO:
+            raise ValueError(f"Modo de codificação inválido: {modo}. Use um de {MODOS_CODIFICACAO}.")
+        self.colunas = list(colunas)
+        self.modo = modo
+        self.vocabulario = vocabulario
+
+    def ajustar(self, df):
+        """
+        Aprende o vocabulário (valores distintos, ordenados) de cada coluna.
+        """
+        self.vocabulario = {
+            coluna: sorted(str(valor) for valor in pd.unique(df[coluna].dropna()))
+            for coluna in self.colunas
+        }
+        return self
+
+    def codigos(self, df, coluna):
+        """
+        Retorna o índice de cada valor da coluna no vocabulário (-1 se desconhecido).
+        """
+        serie = df[coluna]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            # Converte apenas as categorias para texto, não cada linha
+            serie = serie.cat.rename_categories(serie.cat.categories.astype(str))
+        else:
+            serie = serie.astype(str)
+        return pd.Categorical(serie, categories=self.vocabulario[coluna]).codes.astype(np.int32)
+
+    def transformar(self, df):
+        """
+        Codifica as colunas: DataFrame de códigos (ordinal) ou matriz CSR (onehot).
+        """
+        if self.vocabulario is None:
+            raise ValueError("O codificador precisa ser ajustado (ajustar) ou carregado antes de transformar.")
+
+        if self.modo == 'ordinal':
+            return pd.DataFrame({coluna: self.codigos(df, coluna) for coluna in self.colunas})
+
+        linhas, indices = [], []
+        deslocamento = 0
+        for coluna in self.colunas:
+            codigos = self.codigos(df, coluna)
+            conhecidos = np.flatnonzero(codigos >= 0)
+            linhas.append(conhecidos)
+            indices.append(codigos[conhecidos] + deslocamento)
+            deslocamento += len(self.vocabulario[coluna])
+        linhas = np.concatenate(linhas)
+        return sparse.csr_matrix(
+            (np.ones(len(linhas), dtype=np.float32), (linhas, np.concatenate(indices))),
+            shape=(len(df), deslocamento)
+        )
+
+    def nomes_colunas(self):
+        """
+        Nomes das colunas geradas, na ordem de transformar().
+        """
+        if self.modo == 'ordinal':
+            return list(self.colunas)
+        return [f"{coluna}_{valor}" for coluna in self.colunas for valor in self.vocabulario[coluna]]
+
+    def para_dict(self):
+        return {'colunas': self.colunas, 'modo': self.modo, 'vocabulario': self.vocabulario}
+
+    @classmethod
+    def de_dict(cls, dados):
+        return cls(dados['colunas'], modo=dados['modo'], vocabulario=dados['vocabulario'])
@@ -0,0 +1,166 @@
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+
+from utils.particoes import DIRETORIO_LOJAS, COLUNA_LOJA, caminho_particao, listar_lojas, ler_particoes
+
+# Diretório dos resultados por loja (um subdiretório por loja) e dos consolidados
+DIRETORIO_RESULTADOS_LOJAS = "../resultados/lojas"
+
+# Arquivos de resultado de cada loja que são consolidados entre as lojas
+ARQUIVOS_CONSOLIDADOS = ('previsoes_horizonte.csv', 'plano_reposicao.csv')
+
+logger = logging.getLogger(__name__)
+
+
+# Função executada nos processos de trabalho: previsão e plano de reposição de uma loja
+def processar_loja(loja_id, diretorio=DIRETORIO_LOJAS, diretorio_resultados=DIRETORIO_RESULTADOS_LOJAS,
+                   modelo='prophet', horizonte=6, max_workers_modelo=1):
+    """
+    Roda o PredictToolMain e a FerramentaAnaliseInventario sobre a partição da loja, gravando
+    tudo em <diretorio_resultados>/<loja_id>/. Os totais mensais agregados e o cache de
+    previsões também ficam por loja, então a reexecução de uma loja só reprocessa o que
+    mudou nela. 'max_workers_modelo' limita os processos do ajuste paralelo do Prophet dentro
+    de cada loja (as lojas já rodam em paralelo).
+
+    Retorna o resumo da loja (quantidades de produtos previstos e de itens a repor).
+    """
+    # Importadas aqui para que o processo principal não precise carregar as ferramentas
+    from tools.custom_tool import PredictToolMain
+    from tools.analise_inventario import FerramentaAnaliseInventario
+    from tools.analise_dados import FerramentaAnaliseDados
+
+    inicio = time.perf_counter()
+    resultados = os.path.join(diretorio_resultados, loja_id)
+    os.makedirs(resultados, exist_ok=True)
+
+    previsao = PredictToolMain(
+        vendas=caminho_particao(loja_id, 'dados_vendas.csv', diretorio),
+        historico=caminho_particao(loja_id, 'historico_vendas.csv', diretorio),
+        diretorio_agregados=caminho_particao(loja_id, '.agregados', diretorio),
+        cache_previsoes=os.path.join(resultados, '.cache_previsoes.json'),
+        diretorio_resultados=resultados,
+        modelo=modelo,
+        horizonte=horizonte,
+        max_workers=max_workers_modelo
+    )
+    relatorio_previsao = previsao._run(previsao.name, previsao.description, previsao.vendas, previsao.historico)
+
+    inventario = FerramentaAnaliseInventario(
+        inventario=caminho_particao(loja_id, 'inventario.csv', diretorio),
+        previsoes=os.path.join(resultados, 'previsoes_vendas.csv'),
+        diretorio_resultados=resultados
+    )
+    relatorio_inventario = inventario._run(inventario.name, inventario.description, inventario.inventario)
+
+    # Gráficos da loja no próprio processo: as lojas já são renderizadas em paralelo
+    analise = FerramentaAnaliseDados(
+        vendas=caminho_particao(loja_id, 'dados_vendas.csv', diretorio),
+        previsoes=os.path.join(resultados, 'previsoes_vendas.csv'),
+        diretorio_graficos=resultados,
+        max_workers=1
+    )
+    analise._run(analise.name, analise.description, analise.vendas, analise.previsoes)
+
+    for nome, conteudo in (('relatorio_previsao.md', relatorio_previsao), ('relatorio_inventario.md', relatorio_inventario)):
+        with open(os.path.join(resultados, nome), 'w', encoding='utf-8') as arquivo:
+            arquivo.write(conteudo)
+
+    plano = pd.read_csv(os.path.join(resultados, 'plano_reposicao.csv'), usecols=['repor', 'quantidade_sugerida'])
+    previsoes = pd.read_csv(os.path.join(resultados, 'previsoes_vendas.csv'), usecols=['yhat'])
+    return {
+        COLUNA_LOJA: loja_id,
+        'produtos_previstos': len(previsoes),
+        'vendas_previstas': float(previsoes['yhat'].sum()),
+        'itens_inventario': len(plano),
+        'itens_a_repor': int(plano['repor'].sum()),
+        'quantidade_sugerida': int(plano['quantidade_sugerida'].sum()),
+        'tempo_s': time.perf_counter() - inicio,
+    }
+
+
+# Função para consolidar os resultados de todas as lojas
+def consolidar_resultados(diretorio_resultados=DIRETORIO_RESULTADOS_LOJAS, lojas=None):
+    """
+    Junta os arquivos de ARQUIVOS_CONSOLIDADOS de cada loja em <diretorio_resultados>/<arquivo>,
+    com a coluna loja_id. Usa os resultados já gravados de cada loja, então depois de
+    reprocessar uma única loja os consolidados refletem todas as lojas. Retorna os caminhos.
+    """
+    caminhos = []
+    for arquivo in ARQUIVOS_CONSOLIDADOS:
+        consolidado = ler_particoes(arquivo, lojas, diretorio_resultados)
+        caminho = os.path.join(diretorio_resultados, arquivo)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        consolidado.to_csv(temporario, index=False)
+        os.replace(temporario, caminho)
+        caminhos.append(caminho)
+    return caminhos
+
+
+# Função para processar várias lojas em paralelo e consolidar os resultados
+def executar_lojas(lojas=None, diretorio=DIRETORIO_LOJAS, diretorio_resultados=DIRETORIO_RESULTADOS_LOJAS,
+                   max_workers=None, modelo='prophet', horizonte=6, max_workers_modelo=1):
+    """
+    Distribui as lojas ('lojas', ou todas as partições de 'diretorio') entre processos de um
+    ProcessPoolExecutor, uma loja por tarefa. A falha de uma loja não interrompe as demais.
+    No final, consolida os resultados de todas as lojas com resultados gravados e atualiza o
+    resumo por loja (resumo_lojas.csv), de modo que uma loja pode ser reprocessada sozinha.
+    O andamento e as falhas de cada loja vão para o log do módulo.
+
+    Retorna (resumo DataFrame, falhas [{'loja_id', 'erro'}]).
+    """
+    lojas = listar_lojas(diretorio) if lojas is None else list(lojas)
+    resumos, falhas = [], []
+    if lojas:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futuros = {
+                executor.submit(processar_loja, loja_id, diretorio, diretorio_resultados, modelo, horizonte, max_workers_modelo): loja_id
+                for loja_id in lojas
+            }
+            for futuro in as_completed(futuros):
+                loja_id = futuros[futuro]
+                try:
+                    resumos.append(futuro.result())
+                    logger.info("Loja %s processada.", loja_id)
+                except Exception as e:
+                    falhas.append({COLUNA_LOJA: loja_id, 'erro': f"{type(e).__name__}: {e}"})
+                    logger.warning("Falha na loja %s: %s: %s", loja_id, type(e).__name__, e)
+
+    resumo = pd.DataFrame(resumos, columns=[
+        COLUNA_LOJA, 'produtos_previstos', 'vendas_previstas', 'itens_inventario', 'itens_a_repor', 'quantidade_sugerida', 'tempo_s'
+    ])
+
+    # O resumo gravado mantém as lojas não reprocessadas nesta execução
+    os.makedirs(diretorio_resultados, exist_ok=True)
+    caminho_resumo = os.path.join(diretorio_resultados, 'resumo_lojas.csv')
+    if os.path.exists(caminho_resumo):
+        anterior = pd.read_csv(caminho_resumo, dtype={COLUNA_LOJA: str})
+        resumo = pd.concat([anterior[~anterior[COLUNA_LOJA].isin(lojas)], resumo], ignore_index=True)
+    resumo = resumo.sort_values(COLUNA_LOJA).reset_index(drop=True)
+    resumo.to_csv(caminho_resumo, index=False)
+    consolidar_resultados(diretorio_resultados)
+    return resumo, falhas
+
+
+if __name__ == "__main__":
+    # Executar a partir de src/agentes: python -m utils.execucao_lojas [--lojas loja_001 loja_002]
+    parser = argparse.ArgumentParser(description="Previsão e reposição por loja, em paralelo, com resultados consolidados.")
+    parser.add_argument("--lojas", nargs="*", help="Lojas a reprocessar (padrão: todas)")
+    parser.add_argument("--diretorio", default=DIRETORIO_LOJAS)
+    parser.add_argument("--resultados", default=DIRETORIO_RESULTADOS_LOJAS)
+    parser.add_argument("--processos", type=int, default=None, help="Lojas processadas ao mesmo tempo")
+    parser.add_argument("--modelo", default="prophet")
+    parser.add_argument("--horizonte", type=int, default=6)
+    argumentos = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    resumo, falhas = executar_lojas(
+        argumentos.lojas or None, argumentos.diretorio, argumentos.resultados,
+        max_workers=argumentos.processos, modelo=argumentos.modelo, horizonte=argumentos.horizonte
+    )
+    print(resumo.to_string(index=False))
+    for falha in falhas:
+        print(f"Falha na loja {falha[COLUNA_LOJA]}: {falha['erro']}")
@@ -0,0 +1,102 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+
+# Nomes dos arquivos gerados para cada conjunto de gráficos
+ARQUIVO_GRAFICO_PRODUTOS = 'grafico_receitas_por_produto.png'
+ARQUIVO_GRAFICO_CATEGORIAS = 'grafico_receitas_por_categoria.png'
+ARQUIVO_RELATORIO_PDF = 'relatorio_analise.pdf'
+
+
+# Função para criar uma figura desenhada pelo Agg, sem passar pelo pyplot
+def criar_figura(figsize=(10, 6)):
+    """
+    A figura não é registrada no pyplot (sem figura corrente global nem backend interativo),
+    então várias threads ou processos podem desenhar ao mesmo tempo.
+    """
+    figura = Figure(figsize=figsize)
+    FigureCanvasAgg(figura)
+    return figura
+
+
+# Função para desenhar um gráfico de barras de receitas estimadas
+def grafico_barras(rotulos, valores, titulo, rotulo_x, cor):
+    figura = criar_figura()
+    eixo = figura.add_subplot()
+    eixo.bar(rotulos, valores, color=cor)
+    eixo.set_xlabel(rotulo_x)
+    eixo.set_ylabel('Receita Estimada')
+    eixo.set_title(titulo)
+    eixo.grid(True)
+    return figura
+
+
+# Função para desenhar a página de resumo do relatório
+def pagina_resumo(produtos, receitas, categorias_agrupadas, titulo='Relatório de Análise de Dados'):
+    figura = criar_figura(figsize=(8, 6))
+    figura.text(0.1, 0.8, titulo, fontsize=18, ha='left')
+    figura.text(0.1, 0.6, f'Total de Produtos Analisados: {len(produtos)}', fontsize=12, ha='left')
+    figura.text(0.1, 0.5, f'Receita Estimada Total: R$ {sum(receitas):,.2f}', fontsize=12, ha='left')
+    figura.text(0.1, 0.4, 'Categorias Analisadas:', fontsize=12, ha='left')
+    for i, (categoria, receita) in enumerate(categorias_agrupadas.items()):
+        figura.text(0.1, 0.3 - i * 0.05, f'  - {categoria}: R$ {receita:,.2f}', fontsize=10, ha='left')
+    return figura
+
+
+# Função para gerar os PNGs e o PDF de um conjunto de gráficos
+def renderizar_relatorio(produtos, receitas, categorias_agrupadas, diretorio='.', titulo='Relatório de Análise de Dados'):
+    """
+    Desenha cada gráfico uma única vez e grava a mesma figura no PNG e na página do PDF
+    (produtos, categorias e resumo), em 'diretorio'. As figuras são liberadas ao final,
+    mesmo em caso de erro. Retorna os caminhos gravados.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    figuras = []
+    try:
+        figura_produtos = grafico_barras(produtos, receitas, 'Análise de Receitas Estimadas por Produto', 'Produto', 'blue')
+        figuras.append(figura_produtos)
+        figura_categorias = grafico_barras(
+            list(categorias_agrupadas.keys()), list(categorias_agrupadas.values()),
+            'Análise de Receitas Estimadas por Categoria', 'Categoria', 'green'
+        )
+        figuras.append(figura_categorias)
+        figura_resumo = pagina_resumo(produtos, receitas, categorias_agrupadas, titulo)
+        figuras.append(figura_resumo)
+
+        caminhos = [
+            os.path.join(diretorio, ARQUIVO_GRAFICO_PRODUTOS),
+            os.path.join(diretorio, ARQUIVO_GRAFICO_CATEGORIAS),
+            os.path.join(diretorio, ARQUIVO_RELATORIO_PDF),
+        ]
+        figura_produtos.savefig(caminhos[0])
+        figura_categorias.savefig(caminhos[1])
+        with PdfPages(caminhos[2]) as pdf:
+            for figura in figuras:
+                pdf.savefig(figura)
+        return caminhos
+    finally:
+        for figura in figuras:
+            figura.clear()
+
+
+# Função executada nos processos de trabalho: renderiza um conjunto descrito por um dicionário
+def _renderizar_conjunto(conjunto):
+    return renderizar_relatorio(**conjunto)
+
+
+# Função para renderizar vários conjuntos de gráficos (por categoria, por loja) em paralelo
+def renderizar_em_paralelo(conjuntos, max_workers=None):
+    """
+    conjuntos: lista de dicionários com os argumentos de renderizar_relatorio (produtos,
+    receitas, categorias_agrupadas, diretorio e, opcionalmente, titulo), cada um com o seu
+    próprio diretório. Com um único conjunto, ou max_workers=1, renderiza no próprio processo.
+
+    Retorna os caminhos gravados de cada conjunto, na mesma ordem de 'conjuntos'.
+    """
+    conjuntos = list(conjuntos)
+    if len(conjuntos) <= 1 or max_workers == 1:
+        return [_renderizar_conjunto(conjunto) for conjunto in conjuntos]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_renderizar_conjunto, conjuntos))
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import lsqr
+
+# Níveis da hierarquia, do mais agregado ao produto
+NIVEIS = ('total', 'categoria', 'produto_id')
+
+# Métodos de reconciliação disponíveis
+METODOS_RECONCILIACAO = ('bottom_up', 'ols')
+
+
+class Hierarquia:
+    """
+    Hierarquia produto -> categoria -> total representada pela matriz de soma S (esparsa),
+    com uma linha por nó (total, cada categoria e cada produto) e uma coluna por produto:
+    os valores de todos os nós são S @ valores dos produtos.
+
+    Com ela as previsões são feitas uma única vez, por produto, e somadas para categorias e
+    total; assim os números dos três níveis batem entre si e nenhum modelo extra é ajustado
+    para as categorias.
+    """
+
+    def __init__(self, produtos, categorias):
+        """
+        produtos e categorias: sequências alinhadas com o produto_id e a categoria de cada produto.
+        """
+        self.produtos = pd.Index(produtos, name='produto_id')
+        codigos_categoria, self.categorias = pd.factorize(pd.Series(categorias).astype(str), sort=True)
+        n_produtos, n_categorias = len(self.produtos), len(self.categorias)
+
+        # Linha 0: total; linhas 1..n_categorias: categorias; demais: identidade dos produtos
+        colunas = np.arange(n_produtos)
+        linhas = np.concatenate([np.zeros(n_produtos, dtype=int), 1 + codigos_categoria, 1 + n_categorias + colunas])
+        self.S = sparse.csr_matrix(
+            (np.ones(len(linhas)), (linhas, np.tile(colunas, 3))),
+            shape=(1 + n_categorias + n_produtos, n_produtos)
+        )
+        self.rotulos = pd.DataFrame({
+            'nivel': ['total'] + ['categoria'] * n_categorias + ['produto_id'] * n_produtos,
+            'chave': ['total'] + list(self.categorias) + list(self.produtos),
+        })
+
+    @classmethod
+    def de_dados(cls, df):
+        """
+        Monta a hierarquia a partir de um DataFrame com as colunas produto_id e categoria
+        (ex.: as vendas), usando a primeira categoria de cada produto.
+        """
+        produtos = df.drop_duplicates('produto_id')
+        return cls(produtos['produto_id'].to_numpy(), produtos['categoria'].to_numpy())
+
+    def _alinhar(self, previsoes_produto):
+        # Series (ou DataFrame) indexada por produto_id -> matriz produtos x colunas; ausentes valem 0
+        alinhadas = previsoes_produto.reindex(self.produtos).fillna(0)
+        return alinhadas.to_numpy(dtype=float).reshape(len(self.produtos), -1)
+
+    def _resultado(self, valores, colunas):
+        resultado = self.rotulos.copy()
+        for i, coluna in enumerate(colunas):
+            resultado[coluna] = valores[:, i]
+        return resultado
+
+    def agregar(self, previsoes_produto):
+        """
+        Soma as previsões dos produtos para categorias e total (bottom-up).
+
+        previsoes_produto: Series ou DataFrame indexado por produto_id (ex.: uma coluna por mês
+        do horizonte). Retorna um DataFrame com nivel, chave e os valores de cada nó.
+        """
+        colunas = list(previsoes_produto.columns) if isinstance(previsoes_produto, pd.DataFrame) else ['previsao']
+        return self._resultado(self.S @ self._alinhar(previsoes_produto), colunas)
+
+    def reconciliar(self, previsoes_base, metodo='ols'):
+        """
+        Torna coerentes previsões feitas de forma independente em vários níveis.
+
+        previsoes_base: Series ou DataFrame indexado como self.rotulos (um valor por nó; NaN
+        onde não houver previsão própria). 'bottom_up' usa apenas as previsões dos produtos;
+        'ols' usa todos os nós e projeta as previsões sobre as combinações coerentes,
+        S (S'S)^-1 S' y, resolvendo os mínimos quadrados esparsos com lsqr.
+        """
+        if metodo not in METODOS_RECONCILIACAO:
+            raise ValueError(f"Método de reconciliação inválido: {metodo}. Use um de {METODOS_RECONCILIACAO}.")
+        colunas = list(previsoes_base.columns) if isinstance(previsoes_base, pd.DataFrame) else ['previsao']
+        base = previsoes_base.to_numpy(dtype=float).reshape(len(self.rotulos), -1)
+
+        produtos = (self.rotulos['nivel'] == 'produto_id').to_numpy()
+        if metodo == 'bottom_up':
+            return self._resultado(self.S @ np.nan_to_num(base[produtos]), colunas)
+
+        # Nós sem previsão própria ficam fora do ajuste
+        reconciliadas = np.empty((len(self.rotulos), base.shape[1]))
+        for i in range(base.shape[1]):
+            existentes = ~np.isnan(base[:, i])
+            solucao = lsqr(self.S[existentes], base[existentes, i])[0]
+            reconciliadas[:, i] = self.S @ solucao
+        return self._resultado(reconciliadas, colunas)
+
+    @staticmethod
+    def nivel(resultado, nivel, coluna='previsao'):
+        """
+        Retorna a Series (indexada pela chave) de um nível do resultado de agregar/reconciliar.
+        """
+        selecionados = resultado[resultado['nivel'] == nivel]
+        return pd.Series(selecionados[coluna].to_numpy(), index=selecionados['chave'].to_numpy())
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+
+class IndiceVendas:
+    """
+    Índice de um DataFrame por uma coluna-chave (ex.: 'produto_id').
+
+    As linhas são ordenadas uma única vez pela chave (ordenação estável) e o início e o fim
+    de cada chave são guardados em um vetor de deslocamentos. A fatia de uma chave passa a
+    ser um iloc sobre um intervalo contíguo, sem varrer o DataFrame inteiro como em
+    df[df['produto_id'] == produto_id].
+
+    Por padrão as chaves seguem a ordem de primeira aparição, a mesma de df[coluna].unique().
+    """
+
+    def __init__(self, df, coluna, ordenar=False):
+        codigos, chaves = pd.factorize(df[coluna], sort=ordenar)
+        ordem = np.argsort(codigos, kind='stable')
+
+        # Linhas com chave nula (código -1) ficam no início e não pertencem a nenhuma chave
+        n_nulos = int((codigos < 0).sum())
+        contagens = np.bincount(codigos[codigos >= 0], minlength=len(chaves))
+
+        self.coluna = coluna
+        self.df = df.iloc[ordem]
+        self.chaves = pd.Index(chaves, name=coluna)
+        self.deslocamentos = n_nulos + np.concatenate(([0], np.cumsum(contagens)))
+        self._posicoes = {chave: i for i, chave in enumerate(self.chaves)}
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def __contains__(self, chave):
+        return chave in self._posicoes
+
+    def __iter__(self):
+        """
+        Percorre as chaves na ordem do índice, devolvendo (chave, fatia).
+        """
+        for i, chave in enumerate(self.chaves):
+            yield chave, self.df.iloc[self.deslocamentos[i]:self.deslocamentos[i + 1]]
+
+    def fatia(self, chave):
+        """
+        Retorna as linhas da chave (DataFrame vazio se a chave não existir).
+        """
+        i = self._posicoes.get(chave)
+        if i is None:
+            return self.df.iloc[0:0]
+        return self.df.iloc[self.deslocamentos[i]:self.deslocamentos[i + 1]]
+
+    def primeiro(self, chave, coluna):
+        """
+        Retorna o valor de 'coluna' na primeira linha da chave.
+        """
+        i = self._posicoes[chave]
+        return self.df[coluna].iat[self.deslocamentos[i]]
+
+    def tamanhos(self):
+        """
+        Retorna uma Series com a quantidade de linhas de cada chave.
+        """
+        return pd.Series(np.diff(self.deslocamentos), index=self.chaves)
@@ -0,0 +1,131 @@
+import csv
+import io
+import pandas as pd
+
+# Quantidade padrão de linhas lidas por vez dos CSVs de vendas
+TAMANHO_CHUNK_PADRAO = 500_000
+
+# Colunas que identificam cada total mensal
+COLUNAS_CHAVE = ['data', 'produto_id', 'nome_produto', 'categoria']
+
+# Frequência de fim de mês: 'ME' no pandas >= 2.2, onde 'M' gera FutureWarning; 'M' nas versões anteriores
+try:
+    pd.tseries.frequencies.to_offset('ME')
+    FREQUENCIA_MENSAL = 'ME'
+except ValueError:
+    FREQUENCIA_MENSAL = 'M'
+
+# Tamanho do bloco lido de trás para frente ao procurar a última quebra de linha
+BLOCO_BUSCA = 64 * 1024
+
+
+class _LeitorLimitado(io.RawIOBase):
+    """
+    Expõe apenas os próximos 'limite' bytes de um arquivo binário já posicionado,
+    para que o pd.read_csv pare no fim da última linha completa.
+    """
+
+    def __init__(self, arquivo, limite):
+        self.arquivo = arquivo
+        self.restante = limite
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.restante <= 0:
+            return 0
+        dados = self.arquivo.read(min(len(buffer), self.restante))
+        buffer[:len(dados)] = dados
+        self.restante -= len(dados)
+        return len(dados)
+
+
+# Função para encontrar o fim da última linha completa (terminada em '\n') do arquivo
+def fim_ultima_linha_completa(arquivo, inicio):
+    """
+    Procura a última quebra de linha a partir do fim do arquivo, lendo blocos de trás para
+    frente, sem carregar o arquivo em memória. Retorna a posição logo após ela (ou 'inicio').
+    """
+    fim = arquivo.seek(0, io.SEEK_END)
+    posicao = fim
+    while posicao > inicio:
+        tamanho = min(BLOCO_BUSCA, posicao - inicio)
+        posicao -= tamanho
+        arquivo.seek(posicao)
+        indice = arquivo.read(tamanho).rfind(b'\n')
+        if indice >= 0:
+            return posicao + indice + 1
+    return inicio
+
+
+# Função para ler, em partes, as linhas de um CSV entre duas posições em bytes
+def ler_csv_em_chunks(caminho, colunas_arquivo, inicio, fim, usecols=None, tamanho_chunk=TAMANHO_CHUNK_PADRAO):
+    """
+    Gera DataFrames de até 'tamanho_chunk' linhas com as linhas do CSV entre 'inicio' e 'fim'
+    (posições em bytes, sem o cabeçalho). O pico de memória depende do tamanho do chunk e não
+    do tamanho do arquivo.
+    """
+    if fim <= inicio:
+        return
+    with open(caminho, 'rb') as arquivo:
+        arquivo.seek(inicio)
+        leitor = io.BufferedReader(_LeitorLimitado(arquivo, fim - inicio))
+        for chunk in pd.read_csv(leitor, header=None, names=colunas_arquivo, usecols=usecols,
+                                 parse_dates=['data'], chunksize=tamanho_chunk):
+            yield chunk
+
+
+# Função para agregar vendas diárias em totais mensais por produto
+def agregar_mensal(linhas):
+    return linhas.groupby([pd.Grouper(key='data', freq=FREQUENCIA_MENSAL)] + COLUNAS_CHAVE[1:], observed=True).agg({
+        'quantidade_vendida': 'sum'
+    }).reset_index()
+
+
+# Função para somar totais mensais parciais
+def combinar_agregados(parciais):
+    if not parciais:
+        return pd.DataFrame(columns=COLUNAS_CHAVE + ['quantidade_vendida'])
+    return pd.concat(parciais, ignore_index=True).groupby(COLUNAS_CHAVE, observed=True).agg({
+        'quantidade_vendida': 'sum'
+    }).reset_index()
+
+
+# Função para agregar por mês e produto um fluxo de chunks, mantendo apenas o acumulado em memória
+def agregar_chunks(chunks):
+    """
+    Agrega cada chunk assim que é lido e soma o resultado ao acumulado. Retorna
+    (totais mensais, maior data vista); a maior data é None se não houver linhas.
+    """
+    acumulado = None
+    ultima_data = None
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        parcial = agregar_mensal(chunk)
+        acumulado = parcial if acumulado is None else combinar_agregados([acumulado, parcial])
+        maior = chunk['data'].max()
+        if ultima_data is None or maior > ultima_data:
+            ultima_data = maior
+    return acumulado, ultima_data
+
+
+# Função para agregar CSVs de vendas inteiros, em chunks, direto em séries mensais por produto
+def agregar_csvs_em_chunks(caminhos_csv, tamanho_chunk=TAMANHO_CHUNK_PADRAO):
+    """
+    Lê os CSVs de vendas em partes de 'tamanho_chunk' linhas e devolve apenas os totais
+    mensais por produto, prontos para os modelos de previsão.
+    """
+    parciais = []
+    for caminho in caminhos_csv:
+        with open(caminho, 'rb') as arquivo:
+            colunas = next(csv.reader([arquivo.readline().decode('utf-8').rstrip('\r\n')]))
+            inicio = arquivo.tell()
+            fim = fim_ultima_linha_completa(arquivo, inicio)
+        totais, _ = agregar_chunks(ler_csv_em_chunks(
+            caminho, colunas, inicio, fim, usecols=COLUNAS_CHAVE + ['quantidade_vendida'], tamanho_chunk=tamanho_chunk
+        ))
+        if totais is not None:
+            parciais.append(totais)
+    return combinar_agregados(parciais)
@@ -0,0 +1,175 @@
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.metrics import mean_squared_error
+from utils.ingestao import FREQUENCIA_MENSAL
+
+# Defasagens (em meses) usadas como variáveis do modelo
+DEFASAGENS = (1, 2, 3, 12)
+
+# Hiperparâmetros padrão do HistGradientBoostingRegressor
+PARAMETROS_PADRAO = {'max_iter': 300, 'learning_rate': 0.05, 'random_state': 42}
+
+# Limite de categorias que o HistGradientBoosting aceita como variável categórica
+MAX_CATEGORIAS_NATIVAS = 255
+
+# Probabilidade coberta pelos intervalos de previsão (a mesma do interval_width padrão do Prophet)
+NIVEL_INTERVALO_PADRAO = 0.8
+
+# Colunas das previsões em formato longo: uma linha por produto e mês do horizonte
+COLUNAS_PREVISAO = ['ds', 'horizonte', 'yhat', 'yhat_lower', 'yhat_upper', 'produto_id', 'nome_produto', 'categoria']
+
+
+# Função para montar a matriz produtos x meses das vendas mensais
+def montar_painel(dados_mensais):
+    """
+    Retorna (produtos, meses, Y): o DataFrame com produto_id, nome_produto e categoria de cada
+    linha de Y, os meses (fim de mês) de cada coluna e a matriz de vendas. Antes da primeira
+    venda de um produto o valor é NaN (o produto ainda não existia); depois dela, meses sem
+    venda contam como 0.
+    """
+    dados = dados_mensais.assign(produto_id=dados_mensais['produto_id'].astype(str))
+    produtos = dados.drop_duplicates('produto_id')[['produto_id', 'nome_produto', 'categoria']].reset_index(drop=True)
+    meses = pd.date_range(dados['data'].min(), dados['data'].max(), freq=FREQUENCIA_MENSAL)
+
+    linhas = pd.Categorical(dados['produto_id'], categories=produtos['produto_id']).codes
+    colunas = meses.get_indexer(dados['data'])
+    Y = np.zeros((len(produtos), len(meses)))
+    np.add.at(Y, (linhas, colunas), dados['quantidade_vendida'].to_numpy(dtype=float))
+
+    primeira_venda = np.full(len(produtos), len(meses))
+    np.minimum.at(primeira_venda, linhas, colunas)
+    Y[np.arange(len(meses))[None, :] < primeira_venda[:, None]] = np.nan
+    return produtos, meses, Y
+
+
+# Função para montar as previsões em formato longo a partir das matrizes produtos x horizonte
+def montar_previsoes_longas(produtos, ultimo_mes, previsoes, erros_padrao, nivel_intervalo=NIVEL_INTERVALO_PADRAO):
+    """
+    produtos: DataFrame de montar_painel; previsoes e erros_padrao: arrays produtos x horizonte.
+    O intervalo é yhat ± z * erro padrão (distribuição normal com 'nivel_intervalo' de
+    cobertura); previsões e limites negativos viram 0.
+    """
+    n_produtos, horizonte = previsoes.shape
+    z = NormalDist().inv_cdf(0.5 + nivel_intervalo / 2)
+    passos = np.tile(np.arange(1, horizonte + 1), n_produtos)
+    previsoes_df = produtos.loc[np.repeat(np.arange(n_produtos), horizonte)].reset_index(drop=True)
+    meses_futuros = pd.date_range(ultimo_mes, periods=horizonte + 1, freq=FREQUENCIA_MENSAL)[1:]
+    previsoes_df['ds'] = meses_futuros[passos - 1]
+    previsoes_df['horizonte'] = passos
+    previsoes_df['yhat'] = np.clip(previsoes.ravel(), 0, None)
+    previsoes_df['yhat_lower'] = np.clip((previsoes - z * erros_padrao).ravel(), 0, None)
+    previsoes_df['yhat_upper'] = np.clip((previsoes + z * erros_padrao).ravel(), 0, None)
+    return previsoes_df[COLUNAS_PREVISAO]
+
+
+# Função para calcular as variáveis de todos os produtos para o mês de índice t
+def _variaveis_mes(Y, t, mes, codigos_produto, codigos_categoria, soma, contagem):
+    """
+    Usa apenas os meses anteriores a t: defasagens, média dos últimos 3 meses, média e
+    tamanho do histórico, mês do ano e os códigos de produto e categoria.
+    """
+    n = Y.shape[0]
+    vazio = np.full(n, np.nan)
+    variaveis = {f'lag_{k}': Y[:, t - k] if t - k >= 0 else vazio for k in DEFASAGENS}
+
+    janela = Y[:, max(t - 3, 0):t]
+    existentes = (~np.isnan(janela)).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variaveis['media_3'] = np.where(existentes > 0, np.nansum(janela, axis=1) / existentes, np.nan)
+        variaveis['media_historica'] = np.where(contagem[:, t - 1] > 0, soma[:, t - 1] / contagem[:, t - 1], np.nan)
+    variaveis['meses_historico'] = contagem[:, t - 1]
+    variaveis['mes'] = np.full(n, mes)
+    variaveis['produto'] = codigos_produto
+    variaveis['categoria'] = codigos_categoria
+    return pd.DataFrame(variaveis)
+
+
+# Função para ajustar o HistGradientBoosting, retornando também as colunas usadas
+def _ajustar(parametros, X, y, categoria_nativa):
+    # Defasagens que ainda não existem em nenhuma linha (histórico curto) ficam de fora
+    colunas = list(X.columns[X.notna().any()])
+    parametros = dict(parametros)
+    if categoria_nativa:
+        parametros.setdefault('categorical_features', [colunas.index('categoria')])
+    return HistGradientBoostingRegressor(**parametros).fit(X[colunas], y), colunas
+
+
+# Função para treinar um único modelo para todos os produtos e prever o próximo mês de cada um
+def prever_modelo_global(dados_mensais, parametros=None, validar=True, horizonte=1, nivel_intervalo=NIVEL_INTERVALO_PADRAO):
+    """
+    Treina um HistGradientBoostingRegressor sobre todas as séries mensais de uma vez (uma linha
+    por produto e mês) e prevê o mês seguinte de todos os produtos numa única chamada. O custo
+    do treino cresce com o número de linhas, sem custo fixo por série, e produtos com
+    histórico curto (até um único mês) também recebem previsão.
+
+    dados_mensais: colunas data (fim de mês), produto_id, nome_produto, categoria e
+    quantidade_vendida. Com 'validar', o último mês é separado para medir o MSE antes do
+    ajuste final com todos os meses.
+
+    Os meses 2..'horizonte' são previstos recursivamente com o mesmo modelo (a previsão de um
+    mês entra como defasagem do seguinte), sem novos ajustes. O erro padrão do intervalo é o
+    desvio dos resíduos do último mês da validação (ou do treino, sem validação), ampliado por
+    raiz(h) no passo h.
+
+    Retorna (previsoes_df em formato longo com as colunas de COLUNAS_PREVISAO, metricas).
+    """
+    produtos, meses, Y = montar_painel(dados_mensais)
+    if len(meses) < 2:
+        raise ValueError("O modelo global precisa de pelo menos dois meses de vendas.")
+
+    codigos_produto = np.arange(len(produtos))
+    categorias = pd.Categorical(produtos['categoria'].astype(str))
+    codigos_categoria = categorias.codes
+
+    existentes = ~np.isnan(Y)
+    soma = np.cumsum(np.where(existentes, Y, 0), axis=1)
+    contagem = np.cumsum(existentes, axis=1)
+
+    # Uma linha por (produto, mês) com histórico anterior e venda conhecida no mês
+    blocos, alvos, indices_mes = [], [], []
+    for t in range(1, len(meses)):
+        validos = (contagem[:, t - 1] > 0) & existentes[:, t]
+        variaveis = _variaveis_mes(Y, t, meses[t].month, codigos_produto, codigos_categoria, soma, contagem)
+        blocos.append(variaveis[validos])
+        alvos.append(Y[validos, t])
+        indices_mes.append(np.full(validos.sum(), t))
+    X = pd.concat(blocos, ignore_index=True)
+    y = np.concatenate(alvos)
+    indices_mes = np.concatenate(indices_mes)
+
+    parametros = {**PARAMETROS_PADRAO, **(parametros or {})}
+    categoria_nativa = len(categorias.categories) <= MAX_CATEGORIAS_NATIVAS
+
+    metricas = {'linhas_treino': int(len(X)), 'produtos': int(len(produtos))}
+    ultimo = indices_mes == len(meses) - 1
+    residuos = None
+    if validar and ultimo.any() and (~ultimo).any():
+        modelo, colunas = _ajustar(parametros, X[~ultimo], y[~ultimo], categoria_nativa)
+        previsto = modelo.predict(X.loc[ultimo, colunas])
+        metricas['mse_ultimo_mes'] = float(mean_squared_error(y[ultimo], previsto))
+        residuos = y[ultimo] - previsto
+
+    modelo, colunas = _ajustar(parametros, X, y, categoria_nativa)
+    if residuos is None:
+        residuos = y - modelo.predict(X[colunas])
+    desvio = float(np.sqrt(np.mean(residuos ** 2)))
+    metricas['desvio_residuos'] = desvio
+
+    # Um mês por vez: as variáveis de todos os produtos e uma única previsão por mês, que é
+    # acrescentada ao painel para servir de defasagem ao mês seguinte
+    futuro = Y
+    previsoes = np.empty((len(produtos), horizonte))
+    for h in range(horizonte):
+        futuro = np.concatenate([futuro, np.full((len(produtos), 1), np.nan)], axis=1)
+        existentes = ~np.isnan(futuro[:, :-1])
+        soma = np.cumsum(np.where(existentes, futuro[:, :-1], 0), axis=1)
+        contagem = np.cumsum(existentes, axis=1)
+        mes = meses[-1] + pd.offsets.MonthEnd(h + 1)
+        X_futuro = _variaveis_mes(futuro, futuro.shape[1] - 1, mes.month, codigos_produto, codigos_categoria, soma, contagem)
+        previsoes[:, h] = np.clip(modelo.predict(X_futuro[colunas]), 0, None)
+        futuro[:, -1] = previsoes[:, h]
+
+    erros_padrao = np.tile(desvio * np.sqrt(np.arange(1, horizonte + 1)), (len(produtos), 1))
+    return montar_previsoes_longas(produtos, meses[-1], previsoes, erros_padrao, nivel_intervalo), metricas
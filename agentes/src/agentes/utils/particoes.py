@@ -0,0 +1,142 @@
+import argparse
+import os
+import pandas as pd
+
+from utils.ingestao import TAMANHO_CHUNK_PADRAO
+
+# Diretório padrão das partições: um subdiretório por loja com os mesmos arquivos de data/
+# (inventario.csv, dados_vendas.csv e historico_vendas.csv), cada um com a coluna loja_id
+DIRETORIO_LOJAS = "../data/lojas"
+
+# Coluna que identifica a loja nas partições e nos arquivos consolidados
+COLUNA_LOJA = 'loja_id'
+
+
+# Função para listar as lojas (partições) existentes
+def listar_lojas(diretorio=DIRETORIO_LOJAS):
+    if not os.path.isdir(diretorio):
+        return []
+    return sorted(
+        entrada for entrada in os.listdir(diretorio)
+        if not entrada.startswith('.') and os.path.isdir(os.path.join(diretorio, entrada))
+    )
+
+
+# Função para obter o caminho de um arquivo dentro da partição de uma loja
+def caminho_particao(loja_id, arquivo, diretorio=DIRETORIO_LOJAS):
+    return os.path.join(diretorio, str(loja_id), arquivo)
+
+
+# Função para dividir um CSV consolidado (com a coluna loja_id) em um arquivo por loja
+def particionar_csv(caminho_csv, diretorio=DIRETORIO_LOJAS, arquivo=None, tamanho_chunk=TAMANHO_CHUNK_PADRAO):
+    """
+    Lê o CSV em chunks e grava as linhas de cada loja em <diretorio>/<loja_id>/<arquivo>
+    (por padrão, o mesmo nome do CSV), mantendo a coluna loja_id, no mesmo formato das
+    partições do gerar_inventário.py. Os arquivos de cada loja são
+    montados em temporários e só substituem os anteriores no final, então uma execução
+    interrompida não deixa partições pela metade. Retorna a lista das lojas gravadas.
+    """
+    arquivo = arquivo or os.path.basename(caminho_csv)
+    temporarios = {}
+    try:
+        for chunk in pd.read_csv(caminho_csv, chunksize=tamanho_chunk, dtype={COLUNA_LOJA: str}):
+            for loja_id, linhas in chunk.groupby(COLUNA_LOJA, sort=False):
+                if loja_id not in temporarios:
+                    os.makedirs(os.path.join(diretorio, loja_id), exist_ok=True)
+                    temporarios[loja_id] = f"{caminho_particao(loja_id, arquivo, diretorio)}.{os.getpid()}.tmp"
+                    escrever_cabecalho = True
+                else:
+                    escrever_cabecalho = False
+                linhas.to_csv(
+                    temporarios[loja_id], mode='w' if escrever_cabecalho else 'a', header=escrever_cabecalho, index=False
+                )
+        for loja_id, temporario in temporarios.items():
+            os.replace(temporario, caminho_particao(loja_id, arquivo, diretorio))
+    finally:
+        for temporario in temporarios.values():
+            if os.path.exists(temporario):
+                os.remove(temporario)
+    return sorted(temporarios)
+
+
+# Função para gravar em cada loja uma cópia de um CSV sem a coluna loja_id
+def replicar_csv(caminho_csv, lojas, diretorio=DIRETORIO_LOJAS, arquivo=None, tamanho_chunk=TAMANHO_CHUNK_PADRAO):
+    """
+    Para arquivos de uma única loja (como data/dados_vendas.csv): grava em
+    <diretorio>/<loja_id>/<arquivo> todas as linhas do CSV com a coluna loja_id na frente,
+    para cada loja de 'lojas' (por exemplo, as partições de inventário do gerar_inventário.py).
+    Assim como em particionar_csv, os arquivos só substituem os anteriores no final.
+    Retorna a lista das lojas gravadas.
+    """
+    arquivo = arquivo or os.path.basename(caminho_csv)
+    lojas = [str(loja_id) for loja_id in lojas]
+    temporarios = {}
+    try:
+        for loja_id in lojas:
+            os.makedirs(os.path.join(diretorio, loja_id), exist_ok=True)
+            temporarios[loja_id] = f"{caminho_particao(loja_id, arquivo, diretorio)}.{os.getpid()}.tmp"
+        for numero, chunk in enumerate(pd.read_csv(caminho_csv, chunksize=tamanho_chunk)):
+            chunk.insert(0, COLUNA_LOJA, '')
+            for loja_id, temporario in temporarios.items():
+                chunk[COLUNA_LOJA] = loja_id
+                chunk.to_csv(temporario, mode='w' if numero == 0 else 'a', header=numero == 0, index=False)
+        for loja_id, temporario in temporarios.items():
+            os.replace(temporario, caminho_particao(loja_id, arquivo, diretorio))
+    finally:
+        for temporario in temporarios.values():
+            if os.path.exists(temporario):
+                os.remove(temporario)
+    return sorted(temporarios)
+
+
+# Função para acrescentar loja_id às colunas lidas de um arquivo quando ele tem essa coluna
+def colunas_com_loja(caminho, colunas):
+    """
+    Partições e arquivos consolidados têm a coluna loja_id; arquivos de uma única loja, não.
+    Retorna [loja_id] + colunas se o cabeçalho do CSV tiver loja_id, senão as próprias colunas.
+    """
+    cabecalho = pd.read_csv(caminho, nrows=0).columns
+    return [COLUNA_LOJA] + list(colunas) if COLUNA_LOJA in cabecalho else list(colunas)
+
+
+# Função para ler um arquivo de várias lojas lendo apenas as partições pedidas
+def ler_particoes(arquivo, lojas=None, diretorio=DIRETORIO_LOJAS, leitor=pd.read_csv, **opcoes):
+    """
+    Concatena <diretorio>/<loja_id>/<arquivo> das 'lojas' informadas (todas, se None),
+    acrescentando a coluna loja_id; as partições das demais lojas nem são abertas. Lojas sem
+    o arquivo são ignoradas. 'leitor' recebe o caminho e as 'opcoes' (ex.: ler_dados).
+    """
+    partes = []
+    for loja_id in (listar_lojas(diretorio) if lojas is None else lojas):
+        caminho = caminho_particao(loja_id, arquivo, diretorio)
+        if os.path.exists(caminho):
+            df = leitor(caminho, **opcoes)
+            partes.append(df.assign(**{COLUNA_LOJA: loja_id})[[COLUNA_LOJA] + [c for c in df.columns if c != COLUNA_LOJA]])
+    if not partes:
+        return pd.DataFrame(columns=[COLUNA_LOJA])
+    return pd.concat(partes, ignore_index=True)
+
+
+if __name__ == "__main__":
+    # Executar a partir de src/agentes: python -m utils.particoes [--lojas loja_001 loja_002]
+    parser = argparse.ArgumentParser(
+        description="Grava os CSVs de vendas nas partições por loja usadas pelo utils.execucao_lojas."
+    )
+    parser.add_argument("arquivos", nargs="*", default=["../data/dados_vendas.csv", "../data/historico_vendas.csv"],
+                        help="CSVs a particionar (padrão: dados_vendas.csv e historico_vendas.csv de data/)")
+    parser.add_argument("--diretorio", default=DIRETORIO_LOJAS)
+    parser.add_argument("--lojas", nargs="*",
+                        help="Lojas que recebem os CSVs sem loja_id (padrão: as partições já existentes, "
+                             "por exemplo as geradas por 'python gerar_inventário.py <num_lojas>')")
+    argumentos = parser.parse_args()
+
+    for caminho_csv in argumentos.arquivos:
+        # CSVs consolidados são divididos pela coluna loja_id; os de uma única loja vão para todas as lojas
+        if COLUNA_LOJA in pd.read_csv(caminho_csv, nrows=0).columns:
+            lojas = particionar_csv(caminho_csv, argumentos.diretorio)
+        else:
+            lojas = argumentos.lojas or listar_lojas(argumentos.diretorio)
+            if not lojas:
+                parser.error(f"{caminho_csv} não tem a coluna {COLUNA_LOJA} e nenhuma loja foi informada ou encontrada em {argumentos.diretorio}.")
+            lojas = replicar_csv(caminho_csv, lojas, argumentos.diretorio)
+        print(f"{caminho_csv}: {len(lojas)} lojas gravadas em {argumentos.diretorio}.")
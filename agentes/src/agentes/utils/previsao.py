@@ -1,7 +1,8 @@
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error
+from utils.regressao_lote import calcular_meses_venda, regressao_linear_em_lote, prever_em_lote
+from utils.indice_vendas import IndiceVendas
+from utils.hierarquia import Hierarquia
+from utils.ranking import top_n_itens
 
 # Função para preparar os dados de vendas por produto
 def preparar_dados_vendas_por_produto(sales_df, produto_id):
@@ -13,18 +14,17 @@ def preparar_dados_vendas_por_produto(sales_df, produto_id):
 
 # Função para prever vendas por produto usando Regressão Linear
 def prever_vendas_por_produto(sales_df):
-    previsoes_produtos = {}
-    for produto_id in sales_df['produto_id'].unique():
-        X, y = preparar_dados_vendas_por_produto(sales_df, produto_id)
-        if len(X) < 2:  # Garantir que haja dados suficientes para treinar o modelo
-            continue
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        modelo = LinearRegression()
-        modelo.fit(X_train, y_train)
-        proximo_mes = X['meses_venda'].max() + 1
-        previsao_proximo_mes = modelo.predict([[proximo_mes]])[0]
-        previsoes_produtos[produto_id] = previsao_proximo_mes
-    return previsoes_produtos
+    """
+    Ajusta a regressão linear de todos os produtos numa única passada (utils.regressao_lote)
+    e prevê as vendas do mês seguinte à última venda de cada produto.
+    """
+    meses_venda = calcular_meses_venda(sales_df, 'produto_id')
+    coeficientes = regressao_linear_em_lote(sales_df['produto_id'], meses_venda, sales_df['quantidade_vendida'])
+
+    # Garantir que haja dados suficientes para treinar o modelo
+    coeficientes = coeficientes[coeficientes['n_observacoes'] >= 2]
+    previsoes = prever_em_lote(coeficientes, coeficientes['x_max'] + 1)
+    return previsoes.to_dict()
 
 # Função para preparar os dados de vendas por categoria
 def preparar_dados_vendas_por_categoria(sales_df, categoria):
@@ -35,20 +35,19 @@ def preparar_dados_vendas_por_categoria(sales_df, categoria):
     y = vendas_agrupadas['quantidade_vendida']
     return X, y
 
-# Função para prever vendas por categoria usando Regressão Linear
-def prever_vendas_por_categoria(sales_df):
-    previsoes_categorias = {}
-    for categoria in sales_df['categoria'].unique():
-        X, y = preparar_dados_vendas_por_categoria(sales_df, categoria)
-        if len(X) < 2:  # Garantir que haja dados suficientes para treinar o modelo
-            continue
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        modelo = LinearRegression()
-        modelo.fit(X_train, y_train)
-        proximo_mes = X['meses_venda'].max() + 1
-        previsao_proximo_mes = modelo.predict([[proximo_mes]])[0]
-        previsoes_categorias[categoria] = previsao_proximo_mes
-    return previsoes_categorias
+# Função para prever vendas por categoria somando as previsões dos produtos
+def prever_vendas_por_categoria(sales_df, previsoes_produtos=None):
+    """
+    Previsão de cada categoria como a soma das previsões dos seus produtos (utils.hierarquia),
+    sem ajustar modelos próprios para as categorias; assim as previsões de categoria batem
+    com as dos produtos. 'previsoes_produtos' (de prever_vendas_por_produto) evita refazer
+    os ajustes quando já estiver calculado.
+    """
+    if previsoes_produtos is None:
+        previsoes_produtos = prever_vendas_por_produto(sales_df)
+    hierarquia = Hierarquia.de_dados(sales_df)
+    agregadas = hierarquia.agregar(pd.Series(previsoes_produtos, dtype=float))
+    return Hierarquia.nivel(agregadas, 'categoria').to_dict()
 
 import os
 
@@ -72,9 +71,10 @@ def gerar_conteudo_relatorio_md(relatorio, sales_df):
     conteudo_md += "## Top 10 Produtos com Maiores Previsões de Vendas\n"
     conteudo_md += "| Produto ID | Nome do Produto | Categoria | Previsão de Vendas |\n"
     conteudo_md += "|------------|-----------------|-----------|--------------------|\n"
+    indice = IndiceVendas(sales_df, 'produto_id')
     for produto_id, previsao in relatorio['top_10_produtos']:
-        nome_produto = sales_df[sales_df['produto_id'] == produto_id]['nome_produto'].iloc[0]
-        categoria_produto = sales_df[sales_df['produto_id'] == produto_id]['categoria'].iloc[0]
+        nome_produto = indice.primeiro(produto_id, 'nome_produto')
+        categoria_produto = indice.primeiro(produto_id, 'categoria')
         conteudo_md += f"| {produto_id} | {nome_produto} | {categoria_produto} | {previsao:.2f} |\n"
 
     conteudo_md += "\n\n"
@@ -86,8 +86,11 @@ def gerar_conteudo_relatorio_md(relatorio, sales_df):
     for categoria, previsao in relatorio['top_10_categorias']:
         conteudo_md += f"| {categoria} | {previsao:.2f} |\n"
 
+    conteudo_md += f"\n**Previsão total:** {relatorio['total']:.2f}\n"
+
     conteudo_md += "\n\n"
     conteudo_md += "> **Nota:** As previsões são baseadas em modelos de regressão linear usando dados históricos de vendas.\n"
+    conteudo_md += "> As previsões de categoria e o total são as somas das previsões dos produtos.\n"
     conteudo_md += "> Relatório gerado automaticamente.\n"
 
     return conteudo_md
@@ -97,16 +100,17 @@ def gerar_relatorio_previsoes(sales_df, caminho_arquivo="results/relatorio_previ
     print(sales_df)
     # Prever vendas por produto
     previsoes_produtos = prever_vendas_por_produto(sales_df)
-    top_10_produtos = sorted(previsoes_produtos.items(), key=lambda x: x[1], reverse=True)[:10]
+    top_10_produtos = top_n_itens(previsoes_produtos, 10)
 
-    # Prever vendas por categoria
-    previsoes_categorias = prever_vendas_por_categoria(sales_df)
-    top_10_categorias = sorted(previsoes_categorias.items(), key=lambda x: x[1], reverse=True)[:10]
+    # Prever vendas por categoria (soma das previsões dos produtos)
+    previsoes_categorias = prever_vendas_por_categoria(sales_df, previsoes_produtos)
+    top_10_categorias = top_n_itens(previsoes_categorias, 10)
 
     # Gerar relatório
     relatorio = {
         "top_10_produtos": top_10_produtos,
-        "top_10_categorias": top_10_categorias
+        "top_10_categorias": top_10_categorias,
+        "total": sum(previsoes_categorias.values())
     }
 
     # Gerar o conteúdo do relatório em Markdown
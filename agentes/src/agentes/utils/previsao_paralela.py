@@ -0,0 +1,97 @@
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from prophet import Prophet
+from utils.ingestao import FREQUENCIA_MENSAL
+
+
+# Função executada nos processos de trabalho: ajusta um Prophet para cada série do lote
+def ajustar_lote_prophet(lote, parametros_modelo=None, horizonte=1):
+    """
+    Ajusta um modelo Prophet para cada série do lote e devolve, na mesma ordem do lote,
+    uma tupla (status, valor): ('ok', previsões dos próximos 'horizonte' meses) ou
+    ('erro', mensagem). Cada item do lote é uma tupla (produto_id, nome_produto, categoria,
+    serie), onde serie é um DataFrame com as colunas 'ds' e 'y'. parametros_modelo são
+    repassados ao Prophet.
+    """
+    resultados = []
+    for produto_id, nome_produto, categoria, serie in lote:
+        try:
+            modelo = Prophet(**(parametros_modelo or {}))
+            modelo.fit(serie)
+
+            # Previsão dos próximos meses, com intervalos, a partir do mesmo ajuste
+            futuro = modelo.make_future_dataframe(periods=horizonte, freq=FREQUENCIA_MENSAL)
+            previsao = modelo.predict(futuro)
+
+            registros = previsao[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(horizonte).to_dict('records')
+            for passo, registro in enumerate(registros, start=1):
+                registro['horizonte'] = passo
+                registro['produto_id'] = produto_id
+                registro['nome_produto'] = nome_produto
+                registro['categoria'] = categoria
+            resultados.append(('ok', registros))
+        except Exception as e:
+            resultados.append(('erro', f"{type(e).__name__}: {e}"))
+    return resultados
+
+
+# Função para encerrar à força os processos que estouraram o tempo limite
+def _encerrar_processos(executor):
+    # O ProcessPoolExecutor não interrompe tarefas em execução; sem isso o
+    # interpretador esperaria o ajuste travado terminar ao finalizar
+    for processo in list((executor._processes or {}).values()):
+        processo.terminate()
+
+
+# Função para ajustar os modelos Prophet de vários produtos em paralelo
+def prever_produtos_em_paralelo(series, max_workers=None, chunksize=1, timeout_ajuste=None, parametros_modelo=None, horizonte=1):
+    """
+    Distribui o ajuste de um Prophet por produto entre processos de um ProcessPoolExecutor.
+
+    series: lista de tuplas (produto_id, nome_produto, categoria, serie com colunas 'ds'/'y').
+    max_workers: número de processos (None usa a quantidade de CPUs).
+    chunksize: quantidade de produtos enviados a cada processo por tarefa.
+    timeout_ajuste: tempo limite em segundos por ajuste (None espera indefinidamente).
+    parametros_modelo: hiperparâmetros repassados a cada Prophet().
+    horizonte: meses previstos a partir de cada ajuste.
+
+    Retorna (previsoes, falhas): as previsões (uma por produto e mês do horizonte) na mesma
+    ordem de 'series' e a lista de falhas por produto ({'produto_id', 'erro'}), sem
+    interromper os demais ajustes.
+    """
+    if chunksize < 1:
+        raise ValueError("O chunksize deve ser maior ou igual a 1.")
+
+    lotes = [series[i:i + chunksize] for i in range(0, len(series), chunksize)]
+    previsoes = []
+    falhas = []
+    if not lotes:
+        return previsoes, falhas
+
+    houve_timeout = False
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        futuros = [executor.submit(ajustar_lote_prophet, lote, parametros_modelo, horizonte) for lote in lotes]
+
+        # Os resultados são coletados na ordem de submissão, garantindo saída determinística
+        for lote, futuro in zip(lotes, futuros):
+            timeout = None if timeout_ajuste is None else timeout_ajuste * len(lote)
+            try:
+                resultados = futuro.result(timeout=timeout)
+            except FuturesTimeoutError:
+                houve_timeout = True
+                futuro.cancel()
+                resultados = [('erro', f"Tempo limite de {timeout_ajuste}s por ajuste excedido.")] * len(lote)
+            except Exception as e:
+                resultados = [('erro', f"{type(e).__name__}: {e}")] * len(lote)
+
+            for (produto_id, _, _, _), (status, valor) in zip(lote, resultados):
+                if status == 'ok':
+                    previsoes.extend(valor)
+                else:
+                    falhas.append({'produto_id': produto_id, 'erro': valor})
+    finally:
+        if houve_timeout:
+            _encerrar_processos(executor)
+        executor.shutdown(wait=not houve_timeout, cancel_futures=True)
+
+    return previsoes, falhas
@@ -0,0 +1,246 @@
+import argparse
+import os
+import time
+from abc import ABC, abstractmethod
+import pandas as pd
+from utils.indice_vendas import IndiceVendas
+from utils.cache_previsoes import CachePrevisoes
+from utils.modelo_global import (
+    COLUNAS_PREVISAO, NIVEL_INTERVALO_PADRAO, montar_painel, montar_previsoes_longas, prever_modelo_global
+)
+from utils.suavizacao import suavizar
+from utils.ingestao import FREQUENCIA_MENSAL
+
+
+class Previsor(ABC):
+    """
+    Interface dos modelos de previsão usados pelo PredictToolMain.
+
+    prever(dados_mensais, horizonte, nivel_intervalo) recebe os totais mensais por produto
+    (colunas data, produto_id, nome_produto, categoria e quantidade_vendida) e retorna
+    (previsoes_df, falhas): as previsões dos meses 1..horizonte de cada produto em formato
+    longo (uma linha por produto e mês, com as colunas de COLUNAS_PREVISAO e intervalos com
+    'nivel_intervalo' de cobertura), obtidas de um único ajuste por série, e a lista de falhas
+    por produto ({'produto_id', 'erro'}).
+    """
+
+    nome = None
+
+    @abstractmethod
+    def prever(self, dados_mensais, horizonte=1, nivel_intervalo=NIVEL_INTERVALO_PADRAO):
+        pass
+
+
+class PrevisorProphet(Previsor):
+    """
+    Um Prophet por produto, ajustados em paralelo (utils.previsao_paralela), com as previsões
+    de séries inalteradas reaproveitadas do cache (utils.cache_previsoes).
+    """
+
+    nome = 'prophet'
+
+    # Mínimo de meses de vendas para ajustar o Prophet de um produto
+    MINIMO_OBSERVACOES = 6
+
+    def __init__(self, parametros_modelo=None, max_workers=None, chunksize=1, timeout_ajuste=None, cache_previsoes=None):
+        self.parametros_modelo = parametros_modelo or {}
+        self.max_workers = max_workers
+        self.chunksize = chunksize
+        self.timeout_ajuste = timeout_ajuste
+        self.cache_previsoes = cache_previsoes
+
+    def prever(self, dados_mensais, horizonte=1, nivel_intervalo=NIVEL_INTERVALO_PADRAO):
+        # Importado aqui para que os demais previsores funcionem sem o prophet instalado
+        from utils.previsao_paralela import prever_produtos_em_paralelo
+
+        # O nível do intervalo vira o interval_width do Prophet, salvo se já vier nos parâmetros
+        parametros_prophet = {'interval_width': nivel_intervalo, **self.parametros_modelo}
+
+        # Separar a série mensal de cada produto com dados suficientes para o Prophet
+        series = []
+        for produto_id, df_produto in IndiceVendas(dados_mensais, 'produto_id'):
+            df_produto = df_produto.rename(columns={'data': 'ds', 'quantidade_vendida': 'y'})
+            
+            # Verificar se há dados suficientes para o Prophet (mínimo de 6 observações)
+            if len(df_produto) < self.MINIMO_OBSERVACOES:
+                continue
+
+            series.append((
+                produto_id,
+                df_produto['nome_produto'].iloc[0],
+                df_produto['categoria'].iloc[0],
+                df_produto[['ds', 'y']]
+            ))
+
+        # Reaproveitar as previsões de produtos cuja série e parâmetros não mudaram
+        cache = CachePrevisoes(self.cache_previsoes) if self.cache_previsoes else None
+        parametros = {'modelo': 'prophet', 'periods': horizonte, 'freq': FREQUENCIA_MENSAL, 'parametros': parametros_prophet}
+        chaves = {}
+        previsoes_cache = {}
+        pendentes = []
+        for item in series:
+            produto_id, nome_produto, categoria, serie = item
+            if cache is None:
+                pendentes.append(item)
+                continue
+            chaves[produto_id] = cache.impressao_digital(serie, parametros)
+            registros = cache.obter(chaves[produto_id])
+            if registros is None:
+                pendentes.append(item)
+            else:
+                for registro in registros:
+                    registro.update(produto_id=produto_id, nome_produto=nome_produto, categoria=categoria)
+                previsoes_cache[produto_id] = registros
+
+        # Treinar em paralelo apenas os modelos Prophet sem previsão em cache (todo o horizonte)
+        previsoes_novas, falhas = prever_produtos_em_paralelo(
+            pendentes,
+            max_workers=self.max_workers,
+            chunksize=self.chunksize,
+            timeout_ajuste=self.timeout_ajuste,
+            parametros_modelo=parametros_prophet,
+            horizonte=horizonte
+        )
+
+        # Agrupar as previsões novas por produto
+        por_produto = {}
+        for previsao in previsoes_novas:
+            por_produto.setdefault(previsao['produto_id'], []).append(previsao)
+
+        if cache is not None:
+            for produto_id, registros in por_produto.items():
+                cache.guardar(chaves[produto_id], registros)
+            cache.podar(chaves.values())
+            cache.salvar()
+
+        # Manter a ordem original dos produtos
+        previsoes = []
+        for produto_id, _, _, _ in series:
+            previsoes.extend(previsoes_cache.get(produto_id, por_produto.get(produto_id, [])))
+
+        # Converter previsões para DataFrame e garantir que todas as colunas estejam incluídas
+        return pd.DataFrame(previsoes, columns=COLUNAS_PREVISAO), falhas
+
+
+class PrevisorGlobal(Previsor):
+    """
+    Um único modelo para todos os produtos (utils.modelo_global). As métricas de validação do
+    último ajuste ficam em 'metricas'.
+    """
+
+    nome = 'global'
+
+    def __init__(self, parametros_modelo=None):
+        self.parametros_modelo = parametros_modelo or {}
+        self.metricas = None
+
+    def prever(self, dados_mensais, horizonte=1, nivel_intervalo=NIVEL_INTERVALO_PADRAO):
+        previsoes_df, self.metricas = prever_modelo_global(
+            dados_mensais, self.parametros_modelo, horizonte=horizonte, nivel_intervalo=nivel_intervalo
+        )
+        return previsoes_df, []
+
+
+class PrevisorSuavizacao(Previsor):
+    """
+    Suavização exponencial (simples, Holt ou sazonal) ou média móvel calculada com NumPy para
+    todas as séries de uma vez (utils.suavizacao), sem ajuste de modelo por produto.
+    'parametros_modelo' aceita 'metodo' e os demais argumentos de suavizar().
+    """
+
+    nome = 'suavizacao'
+
+    def __init__(self, parametros_modelo=None):
+        self.parametros_modelo = dict(parametros_modelo or {})
+
+    def prever(self, dados_mensais, horizonte=1, nivel_intervalo=NIVEL_INTERVALO_PADRAO):
+        produtos, meses, Y = montar_painel(dados_mensais)
+        previsoes, erros_padrao = suavizar(Y, horizonte=horizonte, **self.parametros_modelo)
+        return montar_previsoes_longas(produtos, meses[-1], previsoes, erros_padrao, nivel_intervalo), []
+
+
+# Previsores disponíveis, pelo nome usado no campo 'modelo' do PredictToolMain
+PREVISORES = {previsor.nome: previsor for previsor in (PrevisorProphet, PrevisorSuavizacao, PrevisorGlobal)}
+
+
+# Função para criar o previsor pelo nome; as opções de execução só se aplicam ao Prophet
+def criar_previsor(nome, parametros_modelo=None, max_workers=None, chunksize=1, timeout_ajuste=None, cache_previsoes=None):
+    if nome not in PREVISORES:
+        raise ValueError(f"Modelo de previsão desconhecido: {nome}. Use um de {sorted(PREVISORES)}.")
+    if nome == 'prophet':
+        return PrevisorProphet(parametros_modelo, max_workers, chunksize, timeout_ajuste, cache_previsoes)
+    return PREVISORES[nome](parametros_modelo)
+
+
+# Função para comparar previsores prevendo o último mês a partir dos meses anteriores
+def comparar_previsores(dados_mensais, previsores):
+    """
+    Separa o último mês dos totais mensais, prevê esse mês com cada previsor usando apenas os
+    meses anteriores e mede o tempo total e os erros: MAE, RMSE e WAPE (soma dos erros
+    absolutos sobre a soma das vendas) nos produtos previstos, além da cobertura (fração dos
+    produtos do último mês que receberam previsão).
+    """
+    ultimo_mes = dados_mensais['data'].max()
+    treino = dados_mensais[dados_mensais['data'] < ultimo_mes]
+    real = dados_mensais[dados_mensais['data'] == ultimo_mes]
+    real = real.assign(produto_id=real['produto_id'].astype(str))[['produto_id', 'quantidade_vendida']]
+
+    resultados = []
+    for nome, previsor in previsores.items():
+        inicio = time.perf_counter()
+        previsoes_df, falhas = previsor.prever(treino)
+        tempo = time.perf_counter() - inicio
+
+        previsoes_df = previsoes_df.assign(produto_id=previsoes_df['produto_id'].astype(str))
+        comparacao = real.merge(previsoes_df[['produto_id', 'yhat']], on='produto_id', how='left')
+        previstos = comparacao.dropna(subset=['yhat'])
+        erro = previstos['yhat'] - previstos['quantidade_vendida']
+        resultados.append({
+            'previsor': nome,
+            'tempo_s': tempo,
+            'mae': erro.abs().mean(),
+            'rmse': (erro ** 2).mean() ** 0.5,
+            'wape': erro.abs().sum() / previstos['quantidade_vendida'].sum(),
+            'cobertura': len(previstos) / len(comparacao) if len(comparacao) else float('nan'),
+            'falhas': len(falhas),
+        })
+    return pd.DataFrame(resultados), ultimo_mes
+
+
+# Função para formatar a comparação dos previsores em Markdown
+def gerar_relatorio_comparacao(comparacao, ultimo_mes, caminho_dados):
+    markdown = "# Comparação dos Modelos de Previsão\n\n"
+    markdown += f"Dados: `{caminho_dados}`. Mês previsto (retirado do treino): {ultimo_mes:%Y-%m}.\n\n"
+    markdown += "| Previsor | Tempo (s) | MAE | RMSE | WAPE | Cobertura | Falhas |\n"
+    markdown += "|----------|-----------|-----|------|------|-----------|--------|\n"
+    for _, row in comparacao.iterrows():
+        markdown += (f"| {row['previsor']} | {row['tempo_s']:.2f} | {row['mae']:.2f} | {row['rmse']:.2f} "
+                     f"| {row['wape']:.1%} | {row['cobertura']:.0%} | {row['falhas']} |\n")
+    markdown += "\n_Gerado automaticamente pela comparação de modelos de previsão._\n"
+    return markdown
+
+
+if __name__ == "__main__":
+    # Executar a partir de src/agentes: python -m utils.previsores
+    from utils.ingestao import agregar_csvs_em_chunks
+
+    parser = argparse.ArgumentParser(description="Compara a precisão e o tempo dos modelos de previsão.")
+    parser.add_argument("--dados", default="../data/historico_vendas.csv")
+    parser.add_argument("--relatorio", default="../resultados/previsoes/comparacao_previsores.md")
+    argumentos = parser.parse_args()
+
+    dados_mensais = agregar_csvs_em_chunks([argumentos.dados])
+    previsores = {
+        'prophet': PrevisorProphet(),
+        'suavizacao (simples)': PrevisorSuavizacao({'metodo': 'simples'}),
+        'suavizacao (holt)': PrevisorSuavizacao({'metodo': 'holt'}),
+        'suavizacao (sazonal)': PrevisorSuavizacao({'metodo': 'sazonal'}),
+        'media_movel (3 meses)': PrevisorSuavizacao({'metodo': 'media_movel', 'janela': 3}),
+        'global': PrevisorGlobal(),
+    }
+    comparacao, ultimo_mes = comparar_previsores(dados_mensais, previsores)
+    relatorio = gerar_relatorio_comparacao(comparacao, ultimo_mes, argumentos.dados)
+    os.makedirs(os.path.dirname(argumentos.relatorio) or '.', exist_ok=True)
+    with open(argumentos.relatorio, 'w', encoding='utf-8') as arquivo:
+        arquivo.write(relatorio)
+    print(relatorio)
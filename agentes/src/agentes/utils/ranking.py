@@ -0,0 +1,89 @@
+import heapq
+import itertools
+import numpy as np
+import pandas as pd
+
+
+# Função para normalizar o desempate em uma lista de colunas
+def _colunas_desempate(desempate):
+    if desempate is None:
+        return []
+    return [desempate] if isinstance(desempate, str) else list(desempate)
+
+
+# Função para selecionar as n maiores (ou menores) linhas de um DataFrame sem ordenar tudo
+def top_n(df, coluna, n=10, maior=True, desempate=None):
+    """
+    Equivalente a df.sort_values(coluna, ascending=not maior).head(n), em O(len(df)).
+
+    np.argpartition separa os candidatos (as n primeiras posições e todos os empatados com a
+    n-ésima) e só eles são ordenados. Empates são resolvidos pelas colunas de 'desempate'
+    (em ordem crescente) e, por fim, pela ordem original das linhas, então o resultado é
+    determinístico. Valores NaN ficam por último. O índice original é preservado.
+    """
+    desempate = _colunas_desempate(desempate)
+    if n <= 0 or df.empty:
+        return df.iloc[:0]
+
+    valores = df[coluna].to_numpy(dtype=float)
+    chave = np.where(np.isnan(valores), np.inf, -valores if maior else valores)
+    if n < len(chave):
+        limite = chave[np.argpartition(chave, n - 1)[n - 1]]
+        candidatos = df.iloc[np.flatnonzero(chave <= limite)]
+    else:
+        candidatos = df
+
+    # Ordenação estável apenas dos candidatos
+    return candidatos.sort_values(
+        [coluna] + desempate, ascending=[not maior] + [True] * len(desempate),
+        kind='mergesort', na_position='last'
+    ).head(n)
+
+
+# Função para selecionar os n pares (chave, valor) de maior (ou menor) valor de um dicionário
+def top_n_itens(itens, n=10, maior=True):
+    """
+    Substitui sorted(itens.items(), key=..., reverse=True)[:n] usando um heap de tamanho n
+    (O(len(itens) * log n)). Empates mantêm a ordem de inserção do dicionário.
+    """
+    pares = itens.items() if isinstance(itens, dict) else itens
+    selecionar = heapq.nlargest if maior else heapq.nsmallest
+    return selecionar(n, pares, key=lambda par: par[1])
+
+
+class TopNStreaming:
+    """
+    Mantém as n maiores (ou menores) linhas de uma sequência de DataFrames (ex.: chunks de
+    um CSV grande) sem guardar os dados inteiros: cada chunk é reduzido com top_n e seus
+    candidatos disputam as n posições num heap de tamanho n.
+
+    Empates são resolvidos pela ordem de chegada (a primeira linha vista fica).
+    """
+
+    def __init__(self, coluna, n=10, maior=True):
+        self.coluna = coluna
+        self.n = n
+        self.maior = maior
+        self._heap = []
+        self._ordem = itertools.count()
+
+    def atualizar(self, chunk):
+        # No heap (mínimo) fica no topo a pior linha entre as n melhores: o menor valor quando
+        # 'maior' e, entre empatados, a que chegou por último
+        for registro in top_n(chunk, self.coluna, self.n, self.maior).to_dict('records'):
+            valor = registro[self.coluna]
+            if pd.isna(valor):
+                continue
+            item = (valor if self.maior else -valor, -next(self._ordem), registro)
+            if len(self._heap) < self.n:
+                heapq.heappush(self._heap, item)
+            elif item[:2] > self._heap[0][:2]:
+                heapq.heapreplace(self._heap, item)
+        return self
+
+    def resultado(self):
+        """
+        Retorna um DataFrame com as n linhas selecionadas, da melhor para a pior.
+        """
+        melhores = sorted(self._heap, key=lambda item: item[:2], reverse=True)
+        return pd.DataFrame([registro for _, _, registro in melhores])
@@ -0,0 +1,124 @@
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import threading
+import joblib
+import pandas as pd
+
+# Nome dos arquivos de cada versão registrada
+ARQUIVO_MODELO = 'modelo.joblib'
+ARQUIVO_METADADOS = 'metadados.json'
+
+
+# Função para calcular a impressão digital do conteúdo de um DataFrame de treino
+def impressao_digital_dados(df):
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(coluna), str(tipo)] for coluna, tipo in df.dtypes.items()]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class RegistroModelos:
+    """
+    Registro em disco de modelos versionados. Cada versão fica em
+    '<diretorio>/<nome>/v0001/' com o modelo (joblib, sem compressão) e um metadados.json com a impressão digital dos dados de treino, a lista de
+    colunas de entrada, as métricas e os parâmetros do modelo.
+
+    Versões são gravadas em um diretório temporário e renomeadas no fim, então uma versão
+    visível no registro está sempre completa.
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+
+    def _diretorio_modelo(self, nome):
+        return os.path.join(self.diretorio, nome)
+
+    def versoes(self, nome):
+        """
+        Retorna os metadados de todas as versões do modelo, da mais recente para a mais antiga.
+        """
+        diretorio = self._diretorio_modelo(nome)
+        if not os.path.isdir(diretorio):
+            return []
+        metadados = []
+        for entrada in sorted(os.listdir(diretorio), reverse=True):
+            caminho = os.path.join(diretorio, entrada, ARQUIVO_METADADOS)
+            if entrada.startswith('v') and os.path.exists(caminho):
+                with open(caminho, 'r', encoding='utf-8') as arquivo:
+                    metadados.append(json.load(arquivo))
+        return metadados
+
+    def registrar(self, nome, modelo, colunas, metricas=None, impressao_digital=None, parametros=None, extras=None):
+        """
+        Grava uma nova versão do modelo e retorna os seus metadados. 'extras' são informações
+        adicionais guardadas nos metadados (por exemplo, o vocabulário da codificação).
+        """
+        diretorio = self._diretorio_modelo(nome)
+        os.makedirs(diretorio, exist_ok=True)
+        temporario = os.path.join(diretorio, f".tmp.{os.getpid()}.{threading.get_ident()}")
+        os.makedirs(temporario, exist_ok=True)
+        try:
+            joblib.dump(modelo, os.path.join(temporario, ARQUIVO_MODELO))
+            metadados = {
+                'nome': nome,
+                'versao': None,
+                'criado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+                'impressao_digital': impressao_digital,
+                'colunas': list(colunas),
+                'metricas': dict(metricas or {}),
+                'parametros': dict(parametros or {}),
+                **dict(extras or {}),
+            }
+
+            # A versão só é conhecida ao renomear: outro processo pode ter registrado a mesma antes
+            while True:
+                versao = (self.versoes(nome)[0]['versao'] if self.versoes(nome) else 0) + 1
+                metadados['versao'] = versao
+                with open(os.path.join(temporario, ARQUIVO_METADADOS), 'w', encoding='utf-8') as arquivo:
+                    json.dump(metadados, arquivo, ensure_ascii=False, indent=2)
+                try:
+                    os.rename(temporario, os.path.join(diretorio, f"v{versao:04d}"))
+                    return metadados
+                except OSError:
+                    if not os.path.exists(os.path.join(diretorio, f"v{versao:04d}")):
+                        raise
+        finally:
+            shutil.rmtree(temporario, ignore_errors=True)
+
+    def buscar_compativel(self, nome, colunas=None, impressao_digital=None, parametros=None):
+        """
+        Retorna os metadados da versão mais recente cujas colunas, impressão digital dos dados
+        e parâmetros coincidem com os informados (os critérios None são ignorados), ou None.
+        """
+        for metadados in self.versoes(nome):
+            if colunas is not None and metadados['colunas'] != list(colunas):
+                continue
+            if impressao_digital is not None and metadados['impressao_digital'] != impressao_digital:
+                continue
+            if parametros is not None and metadados['parametros'] != dict(parametros):
+                continue
+            return metadados
+        return None
+
+    def carregar(self, nome, versao=None, mmap_mode=None):
+        """
+        Carrega uma versão do modelo (a mais recente, se 'versao' for None) e retorna
+        (modelo, metadados). 'mmap_mode' é repassado ao joblib.load: arrays NumPy guardados
+        diretamente no modelo ficam mapeados do arquivo, somente leitura. As árvores do
+        scikit-learn (ex.: RandomForest) copiam os nós para a memória ao serem carregadas, então
+        para elas o custo da carga continua proporcional ao tamanho do modelo.
+        """
+        if versao is None:
+            versoes = self.versoes(nome)
+            if not versoes:
+                raise FileNotFoundError(f"Nenhuma versão registrada do modelo '{nome}' em {self.diretorio}.")
+            versao = versoes[0]['versao']
+
+        caminho = os.path.join(self._diretorio_modelo(nome), f"v{versao:04d}")
+        with open(os.path.join(caminho, ARQUIVO_METADADOS), 'r', encoding='utf-8') as arquivo:
+            metadados = json.load(arquivo)
+        modelo = joblib.load(os.path.join(caminho, ARQUIVO_MODELO), mmap_mode=mmap_mode)
+        return modelo, metadados
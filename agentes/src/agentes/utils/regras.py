@@ -0,0 +1,141 @@
+import ast
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+import yaml
+
+# Nós de sintaxe aceitos nas expressões das regras
+NOS_PERMITIDOS = (
+    ast.Expression, ast.Compare, ast.BoolOp, ast.UnaryOp, ast.BinOp, ast.Name, ast.Constant, ast.Load,
+    ast.And, ast.Or, ast.Not, ast.USub, ast.UAdd, ast.Add, ast.Sub, ast.Mult, ast.Div,
+    ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq,
+)
+
+
+class _ParaOperadoresVetoriais(ast.NodeTransformer):
+    """
+    Reescreve 'and'/'or'/'not' e comparações encadeadas (a < b < c) em &, | e ~, que operam
+    elemento a elemento sobre os arrays das colunas.
+    """
+
+    def visit_BoolOp(self, no):
+        self.generic_visit(no)
+        operador = ast.BitAnd() if isinstance(no.op, ast.And) else ast.BitOr()
+        resultado = no.values[0]
+        for valor in no.values[1:]:
+            resultado = ast.BinOp(left=resultado, op=operador, right=valor)
+        return resultado
+
+    def visit_UnaryOp(self, no):
+        self.generic_visit(no)
+        if isinstance(no.op, ast.Not):
+            return ast.UnaryOp(op=ast.Invert(), operand=no.operand)
+        return no
+
+    def visit_Compare(self, no):
+        self.generic_visit(no)
+        esquerda = no.left
+        partes = []
+        for operador, direita in zip(no.ops, no.comparators):
+            partes.append(ast.Compare(left=esquerda, ops=[operador], comparators=[direita]))
+            esquerda = direita
+        resultado = partes[0]
+        for parte in partes[1:]:
+            resultado = ast.BinOp(left=resultado, op=ast.BitAnd(), right=parte)
+        return resultado
+
+
+class RegraCompilada:
+    """
+    Uma regra de marketing com a expressão já validada e compilada para bytecode.
+    """
+
+    def __init__(self, nome, expressao, contexto, parametros=None, informa_vencimento=False):
+        self.nome = nome
+        self.expressao = expressao
+        self.contexto = contexto
+        self.parametros = dict(parametros or {})
+        self.informa_vencimento = bool(informa_vencimento)
+
+        try:
+            arvore = ast.parse(str(expressao), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Regra '{nome}': expressão inválida: {expressao}") from e
+        for no in ast.walk(arvore):
+            if not isinstance(no, NOS_PERMITIDOS):
+                raise ValueError(f"Regra '{nome}': construção não permitida na expressão: {type(no).__name__}")
+
+        self.nomes = {no.id for no in ast.walk(arvore) if isinstance(no, ast.Name)}
+        self.colunas = self.nomes - set(self.parametros)
+        arvore = ast.fix_missing_locations(_ParaOperadoresVetoriais().visit(arvore))
+        self.codigo = compile(arvore, f"<regra {nome}>", 'eval')
+
+
+class PlanoRegras:
+    """
+    Conjunto de regras compiladas, avaliadas juntas sobre um DataFrame: cada coluna usada por
+    alguma regra é convertida para array uma única vez e compartilhada por todas as regras.
+    """
+
+    def __init__(self, regras):
+        self.regras = list(regras)
+        self.colunas = set().union(*(regra.colunas for regra in self.regras)) if self.regras else set()
+
+    def avaliar(self, dados):
+        """
+        Retorna (mascaras, estatisticas): a matriz booleana linhas x regras e, para cada regra,
+        a quantidade de linhas sinalizadas e o tempo de avaliação em milissegundos.
+        """
+        faltando = self.colunas - set(dados.columns)
+        if faltando:
+            raise ValueError(f"Colunas usadas pelas regras e ausentes nos dados: {sorted(faltando)}")
+
+        colunas = {coluna: dados[coluna].to_numpy() for coluna in self.colunas}
+        mascaras = np.zeros((len(dados), len(self.regras)), dtype=bool)
+        estatisticas = []
+        for i, regra in enumerate(self.regras):
+            inicio = time.perf_counter()
+            resultado = eval(regra.codigo, {"__builtins__": {}}, {**colunas, **regra.parametros})
+            mascaras[:, i] = np.broadcast_to(np.asarray(resultado, dtype=bool), len(dados))
+            estatisticas.append({
+                "regra": regra.nome,
+                "sinalizados": int(mascaras[:, i].sum()),
+                "tempo_ms": (time.perf_counter() - inicio) * 1000,
+            })
+        return mascaras, estatisticas
+
+
+# Função para compilar as regras definidas em um dicionário (como o carregado do YAML)
+def compilar_regras(definicoes):
+    return PlanoRegras(
+        RegraCompilada(
+            nome=nome,
+            expressao=definicao['expressao'],
+            contexto=definicao['contexto'],
+            parametros=definicao.get('parametros'),
+            informa_vencimento=definicao.get('informa_vencimento', False),
+        )
+        for nome, definicao in definicoes.items()
+    )
+
+
+@lru_cache(maxsize=8)
+def _compilar_arquivo(caminho, mtime):
+    with open(caminho, 'r', encoding='utf-8') as arquivo:
+        return compilar_regras(yaml.safe_load(arquivo) or {})
+
+
+# Função para carregar e compilar as regras de um arquivo YAML (recompila apenas se o arquivo mudar)
+def carregar_regras(caminho):
+    caminho = os.path.abspath(caminho)
+    return _compilar_arquivo(caminho, os.stat(caminho).st_mtime_ns)
+
+
+# Função para formatar as estatísticas de avaliação em uma tabela Markdown
+def formatar_estatisticas(estatisticas):
+    linhas = ["| Regra | Sinalizados | Tempo (ms) |", "|-------|-------------|------------|"]
+    for estatistica in estatisticas:
+        linhas.append(f"| {estatistica['regra']} | {estatistica['sinalizados']} | {estatistica['tempo_ms']:.2f} |")
+    return "\n".join(linhas)
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+
+# Função para calcular o número de meses desde a primeira venda de cada grupo
+def calcular_meses_venda(df, coluna_grupo, coluna_data='data'):
+    """
+    Equivalente vetorizado de (data - data.min()).dt.days / 30 aplicado a cada grupo.
+    """
+    inicio = df.groupby(coluna_grupo, sort=False, observed=True)[coluna_data].transform('min')
+    return (df[coluna_data] - inicio).dt.days / 30
+
+
+# Função para ajustar uma regressão linear por grupo numa única passada NumPy
+def regressao_linear_em_lote(grupos, x, y, test_size=0.2):
+    """
+    Ajusta y = intercepto + inclinacao * x para todos os grupos de uma só vez, usando a
+    solução fechada dos mínimos quadrados calculada com somas agrupadas (np.bincount).
+
+    Em cada grupo, as últimas ceil(test_size * n) observações em ordem de x formam o
+    conjunto de teste (validação temporal) e as demais o de treino, como no
+    train_test_split usado anteriormente. Grupos com uma única observação não têm teste.
+
+    Linhas com a chave do grupo nula são ignoradas.
+
+    Retorna um DataFrame indexado pela chave do grupo com as colunas:
+    inclinacao, intercepto, mse, n_observacoes e x_max.
+    """
+    codigos, chaves = pd.factorize(pd.Series(grupos), sort=True)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n_grupos = len(chaves)
+
+    # Linhas sem grupo (chave nula, código -1) ficam de fora, como no groupby
+    validos = codigos >= 0
+    codigos, x, y = codigos[validos], x[validos], y[validos]
+
+    # Ordenar por grupo e, dentro do grupo, por x para definir a posição de cada observação
+    ordem = np.lexsort((x, codigos))
+    codigos, x, y = codigos[ordem], x[ordem], y[ordem]
+    n = np.bincount(codigos, minlength=n_grupos)
+    inicio = np.cumsum(n) - n
+    posicao = np.arange(len(codigos)) - inicio[codigos]
+
+    n_teste = np.where(n > 1, np.ceil(test_size * n), 0).astype(int)
+    teste = posicao >= (n - n_teste)[codigos]
+    treino = ~teste
+    n_treino = np.bincount(codigos, weights=treino, minlength=n_grupos)
+
+    # Médias de treino por grupo e somas centradas (mais estáveis numericamente)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media_x = np.bincount(codigos, weights=x * treino, minlength=n_grupos) / n_treino
+        media_y = np.bincount(codigos, weights=y * treino, minlength=n_grupos) / n_treino
+        dx = (x - media_x[codigos]) * treino
+        dy = (y - media_y[codigos]) * treino
+        sxx = np.bincount(codigos, weights=dx * dx, minlength=n_grupos)
+        sxy = np.bincount(codigos, weights=dx * dy, minlength=n_grupos)
+
+        # Sem variação em x (ex.: uma única observação de treino) a reta é horizontal
+        inclinacao = np.where(sxx > 0, sxy / np.where(sxx > 0, sxx, 1), 0.0)
+        intercepto = media_y - inclinacao * media_x
+
+        # Erro quadrático médio no conjunto de teste de cada grupo
+        residuo = y - (intercepto[codigos] + inclinacao[codigos] * x)
+        soma_erro = np.bincount(codigos, weights=residuo * residuo * teste, minlength=n_grupos)
+        mse = np.where(n_teste > 0, soma_erro / np.maximum(n_teste, 1), np.nan)
+
+    # Como x está ordenado dentro do grupo, o maior valor é a última observação
+    x_max = x[inicio + n - 1]
+
+    return pd.DataFrame({
+        'inclinacao': inclinacao,
+        'intercepto': intercepto,
+        'mse': mse,
+        'n_observacoes': n,
+        'x_max': x_max
+    }, index=pd.Index(chaves, name='grupo'))
+
+
+# Função para prever o valor de cada grupo em um ponto futuro de x
+def prever_em_lote(coeficientes, x_futuro):
+    """
+    Aplica os coeficientes de regressao_linear_em_lote a x_futuro (escalar ou um valor por grupo).
+    """
+    return coeficientes['intercepto'] + coeficientes['inclinacao'] * x_futuro
@@ -0,0 +1,107 @@
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+from utils.modelo_global import NIVEL_INTERVALO_PADRAO
+
+# Parâmetros padrão da política de reposição
+NIVEL_SERVICO_PADRAO = 0.95  # Probabilidade de não faltar estoque durante o tempo de proteção
+PRAZO_ENTREGA_PADRAO_DIAS = 7  # Dias entre o pedido e a chegada da mercadoria
+CICLO_REVISAO_PADRAO_DIAS = 7  # Dias entre duas revisões do estoque
+ERRO_RELATIVO_PADRAO = 0.25  # Erro padrão da demanda (fração da demanda) quando não há intervalo de previsão
+DIAS_POR_MES = 30
+
+
+# Função para calcular o desvio padrão mensal da previsão a partir do intervalo de previsão
+def desvio_da_previsao(previsoes, nivel_intervalo=NIVEL_INTERVALO_PADRAO):
+    """
+    Para um intervalo normal com 'nivel_intervalo' de cobertura, o desvio padrão é a largura
+    do intervalo dividida por 2 * z. Usa a coluna 'erro_padrao' se ela existir e a cobertura
+    da coluna 'nivel_intervalo' (gravada pelo PredictToolMain) no lugar do parâmetro.
+    """
+    if 'erro_padrao' in previsoes.columns:
+        return previsoes['erro_padrao'].to_numpy(dtype=float)
+    niveis = np.full(len(previsoes), nivel_intervalo, dtype=float)
+    if 'nivel_intervalo' in previsoes.columns:
+        niveis = previsoes['nivel_intervalo'].fillna(nivel_intervalo).to_numpy(dtype=float)
+    # Um z por cobertura distinta (em geral, uma só), sem calcular a inversa linha a linha
+    unicos, posicoes = np.unique(niveis, return_inverse=True)
+    z = np.array([NormalDist().inv_cdf(0.5 + nivel / 2) for nivel in unicos], dtype=float)[posicoes]
+    return (previsoes['yhat_upper'].to_numpy(dtype=float) - previsoes['yhat_lower'].to_numpy(dtype=float)) / (2 * z)
+
+
+# Função para calcular o plano de reposição de todos os itens do inventário
+def calcular_plano_reposicao(inventario, previsoes=None, nivel_servico=NIVEL_SERVICO_PADRAO,
+                             prazo_entrega_dias=PRAZO_ENTREGA_PADRAO_DIAS, ciclo_revisao_dias=CICLO_REVISAO_PADRAO_DIAS,
+                             nivel_intervalo=NIVEL_INTERVALO_PADRAO, erro_relativo=ERRO_RELATIVO_PADRAO, lote_minimo=1):
+    """
+    Política de revisão periódica com estoque de segurança, calculada coluna a coluna (sem
+    laços por item), para cada linha do inventário (produto, ou loja e produto).
+
+    inventario: colunas produto_id, quantidade e predicted_demand (demanda mensal estática,
+    usada quando o produto não tem previsão), além de loja_id quando houver várias lojas.
+    previsoes: previsões do próximo mês por produto (produto_id, yhat e, de preferência,
+    yhat_lower/yhat_upper e a coluna nivel_intervalo com a cobertura deles, ou erro_padrao);
+    'nivel_intervalo' só vale para previsões sem essa coluna. Com loja_id, a junção usa loja e
+    produto.
+
+    Com demanda diária d, desvio diário s (desvio mensal / raiz(30)), prazo de entrega L e
+    ciclo de revisão R:
+      estoque_seguranca = z(nivel_servico) * s * raiz(L + R)
+      ponto_pedido      = d * L + estoque_seguranca
+      estoque_alvo      = d * (L + R) + estoque_seguranca
+      dias_cobertura    = quantidade / d
+    Itens com quantidade <= ponto_pedido são repostos até o estoque alvo, em múltiplos de
+    'lote_minimo'.
+
+    Retorna o inventário com as colunas do plano, na mesma ordem das linhas de entrada.
+    """
+    chaves = ['loja_id', 'produto_id'] if previsoes is not None and 'loja_id' in inventario.columns \
+        and 'loja_id' in previsoes.columns else ['produto_id']
+    plano = inventario.reset_index(drop=True)
+
+    demanda_mensal = plano['predicted_demand'].to_numpy(dtype=float)
+    desvio_mensal = erro_relativo * demanda_mensal
+    com_previsao = np.zeros(len(plano), dtype=bool)
+    if previsoes is not None and len(previsoes):
+        # Uma previsão por chave, alinhada às linhas do inventário por posição
+        previsoes = previsoes.drop_duplicates(chaves, keep='last')
+        indice = pd.MultiIndex.from_frame(previsoes[chaves].astype(str)) if len(chaves) > 1 \
+            else pd.Index(previsoes['produto_id'].astype(str))
+        alvo = pd.MultiIndex.from_frame(plano[chaves].astype(str)) if len(chaves) > 1 \
+            else pd.Index(plano['produto_id'].astype(str))
+        posicoes = indice.get_indexer(alvo)
+        com_previsao = posicoes >= 0
+
+        yhat = previsoes['yhat'].to_numpy(dtype=float)
+        tem_intervalo = {'yhat_lower', 'yhat_upper'} <= set(previsoes.columns) or 'erro_padrao' in previsoes.columns
+        desvio = desvio_da_previsao(previsoes, nivel_intervalo) if tem_intervalo else erro_relativo * yhat
+        demanda_mensal = np.where(com_previsao, yhat[posicoes], demanda_mensal)
+        desvio_mensal = np.where(com_previsao, desvio[posicoes], desvio_mensal)
+
+    demanda_diaria = np.maximum(demanda_mensal, 0) / DIAS_POR_MES
+    desvio_diario = np.maximum(np.nan_to_num(desvio_mensal), 0) / np.sqrt(DIAS_POR_MES)
+    protecao = prazo_entrega_dias + ciclo_revisao_dias
+    z = NormalDist().inv_cdf(nivel_servico)
+
+    estoque_seguranca = z * desvio_diario * np.sqrt(protecao)
+    ponto_pedido = demanda_diaria * prazo_entrega_dias + estoque_seguranca
+    estoque_alvo = demanda_diaria * protecao + estoque_seguranca
+    quantidade = plano['quantidade'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dias_cobertura = np.where(demanda_diaria > 0, quantidade / demanda_diaria, np.inf)
+
+    repor = quantidade <= ponto_pedido
+    falta = np.maximum(estoque_alvo - quantidade, 0)
+    quantidade_sugerida = np.where(repor, np.ceil(falta / lote_minimo) * lote_minimo, 0)
+
+    return plano.assign(
+        fonte_demanda=np.where(com_previsao, 'previsao', 'inventario'),
+        demanda_mensal=demanda_mensal,
+        demanda_diaria=demanda_diaria,
+        estoque_seguranca=estoque_seguranca,
+        ponto_pedido=ponto_pedido,
+        estoque_alvo=estoque_alvo,
+        dias_cobertura=dias_cobertura,
+        repor=repor,
+        quantidade_sugerida=quantidade_sugerida.astype(np.int64),
+    )
@@ -0,0 +1,281 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+# Endereço padrão do serviço, configurável pelas variáveis de ambiente AGENTES_SERVICO_HOST e AGENTES_SERVICO_PORTA
+HOST_PADRAO = os.environ.get("AGENTES_SERVICO_HOST", "127.0.0.1")
+PORTA_PADRAO = int(os.environ.get("AGENTES_SERVICO_PORTA", "8765"))
+URL_PADRAO = f"http://{HOST_PADRAO}:{PORTA_PADRAO}"
+
+# Intervalo (s) entre as verificações de dados novos de vendas
+INTERVALO_RECARGA_PADRAO = 30
+
+logger = logging.getLogger(__name__)
+
+
+class ServicoPrevisao:
+    """
+    Mantém em memória as previsões do PredictToolMain e responde consultas por produto,
+    categoria e top-N sem reler CSVs nem ajustar modelos a cada chamada.
+
+    'ferramenta' é um PredictToolMain (ou objeto com vendas, historico e calcular_previsoes()).
+    Quando os CSVs de vendas mudam em disco as previsões são recalculadas; como a agregação
+    mensal é incremental e as previsões de séries inalteradas vêm do cache, só os produtos com
+    vendas novas são reajustados. O novo resultado substitui o anterior de uma só vez, então as
+    consultas feitas durante a recarga continuam sendo atendidas com a versão anterior.
+    Se uma recarga falhar, a versão anterior continua valendo e o erro aparece em saude().
+    """
+
+    def __init__(self, ferramenta, intervalo_recarga=INTERVALO_RECARGA_PADRAO):
+        self.ferramenta = ferramenta
+        self.intervalo_recarga = intervalo_recarga
+        self.versao = 0
+        self.carregado_em = None
+        self.ultimo_erro = None
+        self.ultimo_erro_em = None
+        self._assinatura_fontes = None
+        self._dados = None
+        self._trava_recarga = threading.Lock()
+        self._parar = threading.Event()
+        self._observador = None
+
+    def _assinar_fontes(self):
+        assinatura = []
+        for caminho in (self.ferramenta.vendas, self.ferramenta.historico):
+            estado = os.stat(caminho)
+            assinatura.append((os.path.abspath(caminho), estado.st_mtime_ns, estado.st_size))
+        return assinatura
+
+    def recarregar(self, forcar=False):
+        """
+        Recalcula as previsões se os CSVs de vendas mudaram desde a última carga (ou se
+        'forcar'). Retorna True se houve recarga. Em caso de falha o erro fica registrado em
+        ultimo_erro/ultimo_erro_em e é repassado; uma recarga bem-sucedida limpa o registro.
+        """
+        with self._trava_recarga:
+            try:
+                assinatura = self._assinar_fontes()
+                if not forcar and self._dados is not None and assinatura == self._assinatura_fontes:
+                    return False
+
+                previsoes_df, falhas = self.ferramenta.calcular_previsoes()
+                self._dados = self._indexar(previsoes_df, falhas)
+            except Exception as e:
+                self.ultimo_erro = f"{type(e).__name__}: {e}"
+                self.ultimo_erro_em = time.time()
+                raise
+            self._assinatura_fontes = assinatura
+            self.versao += 1
+            self.carregado_em = time.time()
+            self.ultimo_erro = None
+            self.ultimo_erro_em = None
+            return True
+
+    @staticmethod
+    def _indexar(previsoes_horizonte, falhas):
+        # Registros prontos para JSON, índices por produto e categoria e rankings já ordenados;
+        # produtos e rankings usam o próximo mês e cada produto leva todo o horizonte previsto
+        previsoes_horizonte = previsoes_horizonte.assign(ds=previsoes_horizonte['ds'].astype(str))
+        horizonte_produto = {}
+        for registro in previsoes_horizonte[['produto_id', 'ds', 'horizonte', 'yhat', 'yhat_lower', 'yhat_upper']].to_dict('records'):
+            horizonte_produto.setdefault(str(registro.pop('produto_id')), []).append(registro)
+
+        previsoes_df = previsoes_horizonte[previsoes_horizonte['horizonte'] == 1]
+        registros = previsoes_df.to_dict('records')
+        produtos = {str(registro['produto_id']): {**registro, 'previsoes': horizonte_produto[str(registro['produto_id'])]}
+                    for registro in registros}
+
+        por_categoria = previsoes_df.groupby('categoria', observed=True).agg(
+            yhat=('yhat', 'sum'), produtos=('produto_id', 'count')
+        ).reset_index()
+        por_categoria['produtos'] = por_categoria['produtos'].astype(int)
+        categorias = {str(registro['categoria']): registro for registro in por_categoria.to_dict('records')}
+
+        return {
+            'produtos': produtos,
+            'categorias': categorias,
+            'top_produtos': sorted(produtos.values(), key=lambda registro: registro['yhat'], reverse=True),
+            'top_categorias': sorted(categorias.values(), key=lambda registro: registro['yhat'], reverse=True),
+            'falhas': list(falhas),
+        }
+
+    def _dados_atuais(self):
+        if self._dados is None:
+            self.recarregar()
+        return self._dados
+
+    def produto(self, produto_id):
+        return self._dados_atuais()['produtos'].get(str(produto_id))
+
+    def categoria(self, categoria):
+        return self._dados_atuais()['categorias'].get(str(categoria))
+
+    def top(self, n=10, por='produto'):
+        if por not in ('produto', 'categoria'):
+            raise ValueError("O parâmetro 'por' deve ser 'produto' ou 'categoria'.")
+        return self._dados_atuais()[f'top_{por}s'][:max(int(n), 0)]
+
+    def saude(self):
+        dados = self._dados_atuais()
+        return {
+            'versao': self.versao,
+            'carregado_em': self.carregado_em,
+            'produtos': len(dados['produtos']),
+            'categorias': len(dados['categorias']),
+            'falhas': len(dados['falhas']),
+            'ultimo_erro': self.ultimo_erro,
+            'ultimo_erro_em': self.ultimo_erro_em,
+        }
+
+    def iniciar_observador(self):
+        """
+        Inicia uma thread que verifica, a cada 'intervalo_recarga' segundos, se chegaram dados
+        novos de vendas e recarrega as previsões. Recargas e falhas vão para o log do módulo.
+        """
+        def observar():
+            while not self._parar.wait(self.intervalo_recarga):
+                try:
+                    if self.recarregar():
+                        logger.info("Previsões recarregadas (versão %d).", self.versao)
+                except Exception:
+                    logger.exception("Falha ao recarregar as previsões.")
+
+        self._observador = threading.Thread(target=observar, name="observador-previsoes", daemon=True)
+        self._observador.start()
+
+    def parar(self):
+        self._parar.set()
+
+
+class _ManipuladorPrevisao(BaseHTTPRequestHandler):
+    """
+    Rotas (respostas em JSON):
+      GET  /saude
+      GET  /produtos/<produto_id>
+      GET  /categorias/<categoria>
+      GET  /top?n=10&por=produto|categoria
+      POST /recarregar
+    """
+
+    def do_GET(self):
+        servico = self.server.servico
+        url = urlparse(self.path)
+        partes = [unquote(parte) for parte in url.path.strip('/').split('/')]
+        parametros = parse_qs(url.query)
+        try:
+            if partes == ['saude']:
+                return self._responder(200, servico.saude())
+            if len(partes) == 2 and partes[0] == 'produtos':
+                return self._responder_registro(servico.produto(partes[1]), f"Produto '{partes[1]}' sem previsão.")
+            if len(partes) == 2 and partes[0] == 'categorias':
+                return self._responder_registro(servico.categoria(partes[1]), f"Categoria '{partes[1]}' sem previsão.")
+            if partes == ['top']:
+                n = parametros.get('n', ['10'])[0]
+                por = parametros.get('por', ['produto'])[0]
+                return self._responder(200, servico.top(n, por))
+        except ValueError as e:
+            return self._responder(400, {'erro': str(e)})
+        self._responder(404, {'erro': f"Rota não encontrada: {url.path}"})
+
+    def do_POST(self):
+        if urlparse(self.path).path.strip('/') != 'recarregar':
+            return self._responder(404, {'erro': f"Rota não encontrada: {self.path}"})
+        recarregado = self.server.servico.recarregar(forcar=True)
+        self._responder(200, {'recarregado': recarregado, 'versao': self.server.servico.versao})
+
+    def _responder_registro(self, registro, mensagem):
+        if registro is None:
+            return self._responder(404, {'erro': mensagem})
+        self._responder(200, registro)
+
+    def _responder(self, status, conteudo):
+        corpo = json.dumps(conteudo, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        # As consultas são frequentes; não registrar cada uma no terminal
+        pass
+
+
+# Função para criar o servidor HTTP do serviço de previsão (não bloqueia; use serve_forever())
+def criar_servidor(servico, host=HOST_PADRAO, porta=PORTA_PADRAO):
+    servidor = ThreadingHTTPServer((host, porta), _ManipuladorPrevisao)
+    servidor.daemon_threads = True
+    servidor.servico = servico
+    return servidor
+
+
+class ClientePrevisao:
+    """
+    Cliente do serviço de previsão, usado pelas ferramentas do crew. Retorna None quando o
+    produto ou a categoria não têm previsão e gera ConnectionError se o serviço não responder.
+    """
+
+    def __init__(self, url=URL_PADRAO, timeout=5):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def _requisitar(self, caminho, metodo='GET'):
+        requisicao = urllib.request.Request(f"{self.url}{caminho}", method=metodo)
+        try:
+            with urllib.request.urlopen(requisicao, timeout=self.timeout) as resposta:
+                return json.loads(resposta.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise ValueError(json.loads(e.read().decode('utf-8')).get('erro', str(e))) from e
+        except (urllib.error.URLError, OSError) as e:
+            raise ConnectionError(f"Serviço de previsão indisponível em {self.url}: {e}") from e
+
+    def produto(self, produto_id):
+        return self._requisitar(f"/produtos/{quote(str(produto_id), safe='')}")
+
+    def categoria(self, categoria):
+        return self._requisitar(f"/categorias/{quote(str(categoria), safe='')}")
+
+    def top(self, n=10, por='produto'):
+        return self._requisitar(f"/top?n={int(n)}&por={quote(por)}")
+
+    def saude(self):
+        return self._requisitar("/saude")
+
+    def recarregar(self):
+        return self._requisitar("/recarregar", metodo='POST')
+
+
+if __name__ == "__main__":
+    # Executar a partir de src/agentes: python -m utils.servico_previsao
+    from tools.custom_tool import PredictToolMain
+
+    parser = argparse.ArgumentParser(description="Serviço local de previsão de vendas com modelos em memória.")
+    parser.add_argument("--host", default=HOST_PADRAO)
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_RECARGA_PADRAO,
+                        help="Intervalo (s) entre as verificações de dados novos de vendas")
+    argumentos = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    servico = ServicoPrevisao(PredictToolMain(), intervalo_recarga=argumentos.intervalo)
+    servico.recarregar(forcar=True)
+    servico.iniciar_observador()
+
+    servidor = criar_servidor(servico, argumentos.host, argumentos.porta)
+    print(f"Serviço de previsão em http://{argumentos.host}:{argumentos.porta} ({servico.saude()['produtos']} produtos).")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servico.parar()
+        servidor.server_close()
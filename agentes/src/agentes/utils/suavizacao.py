@@ -0,0 +1,123 @@
+import numpy as np
+
+# Métodos disponíveis
+METODOS_SUAVIZACAO = ('simples', 'holt', 'sazonal', 'media_movel')
+
+# Valores testados para cada parâmetro; cada série fica com a combinação de menor erro
+ALPHAS_PADRAO = (0.1, 0.2, 0.3, 0.5, 0.7, 0.9)
+BETAS_PADRAO = (0.01, 0.05, 0.1, 0.2)
+
+
+# Função para prever os próximos meses de todas as séries por média móvel
+def media_movel(Y, janela=3, horizonte=1):
+    """
+    Média dos últimos 'janela' meses de cada série (ou dos meses existentes, se a série for
+    mais curta), repetida em todo o horizonte.
+
+    O erro padrão vem dos erros das médias móveis um passo à frente ao longo do histórico e
+    cresce com o horizonte como na suavização simples com alpha = 1 / janela.
+
+    Retorna (previsoes, erros_padrao), ambos séries x horizonte.
+    """
+    existentes = ~np.isnan(Y)
+    soma = np.concatenate([np.zeros((Y.shape[0], 1)), np.cumsum(np.where(existentes, Y, 0), axis=1)], axis=1)
+    contagem = np.concatenate([np.zeros((Y.shape[0], 1)), np.cumsum(existentes, axis=1)], axis=1)
+
+    # Média de cada janela [t - janela, t) para t = 0..n_meses; a última é a previsão
+    inicio = np.maximum(np.arange(Y.shape[1] + 1) - janela, 0)
+    soma_janela = soma - soma[:, inicio]
+    contagem_janela = contagem - contagem[:, inicio]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        medias = np.where(contagem_janela > 0, soma_janela / contagem_janela, np.nan)
+        erro = Y - medias[:, :-1]
+        avaliados = ~np.isnan(erro)
+        desvio = np.sqrt(np.where(avaliados, erro ** 2, 0).sum(axis=1) / avaliados.sum(axis=1))
+
+    passos = np.arange(horizonte)[None, :]
+    previsoes = np.repeat(medias[:, -1:], horizonte, axis=1)
+    return previsoes, desvio[:, None] * np.sqrt(1 + passos / janela ** 2)
+
+
+# Função para prever o próximo mês de todas as séries por suavização exponencial
+def suavizar(Y, metodo='holt', alphas=ALPHAS_PADRAO, betas=BETAS_PADRAO, gamma=0.1, periodo=12, janela=3, horizonte=1):
+    """
+    Suavização exponencial calculada para todas as séries de uma vez.
+
+    Y: matriz séries x meses, com NaN antes do início de cada série.
+    metodo: 'simples' (nível), 'holt' (nível e tendência), 'sazonal' (Holt-Winters aditivo com
+    sazonalidade de 'periodo' meses) ou 'media_movel'.
+
+    As recursões percorrem os meses uma única vez, atualizando ao mesmo tempo todas as séries
+    e todas as combinações de alpha/beta (arrays séries x combinações). Cada série usa a
+    combinação com menor soma dos erros quadráticos das previsões um passo à frente. Uma série
+    começa no seu primeiro mês com nível igual à primeira observação, então mesmo séries de um
+    único mês recebem previsão.
+
+    As previsões de 1 a 'horizonte' meses saem do mesmo estado final (nível, tendência e
+    sazonalidade), sem novo ajuste. O erro padrão de cada passo h usa a variância dos erros um
+    passo à frente da combinação escolhida, ampliada como nos modelos de espaço de estados
+    aditivos: sigma² * (1 + soma_{j<h} c_j²), com c_j = alpha * (1 + j * beta) mais gamma nos
+    passos múltiplos do período. Séries sem nenhum erro avaliado (um único mês) ficam com erro
+    padrão NaN.
+
+    Retorna (previsoes, erros_padrao), ambos séries x horizonte.
+    """
+    if metodo not in METODOS_SUAVIZACAO:
+        raise ValueError(f"Método de suavização inválido: {metodo}. Use um de {METODOS_SUAVIZACAO}.")
+    if metodo == 'media_movel':
+        return media_movel(Y, janela, horizonte)
+
+    usa_tendencia = metodo in ('holt', 'sazonal')
+    usa_sazonalidade = metodo == 'sazonal'
+    combinacoes = [(a, b) for a in alphas for b in (betas if usa_tendencia else (0.0,))]
+    alpha = np.array([a for a, _ in combinacoes])[None, :]
+    beta = np.array([b for _, b in combinacoes])[None, :]
+
+    n_series, n_meses = Y.shape
+    forma = (n_series, len(combinacoes))
+    nivel = np.full(forma, np.nan)
+    tendencia = np.zeros(forma)
+    sazonal = np.zeros(forma + (periodo,)) if usa_sazonalidade else None
+    sse = np.zeros(forma)
+    avaliados = np.zeros((n_series, 1))
+
+    with np.errstate(invalid='ignore'):
+        for t in range(n_meses):
+            y = Y[:, t][:, None]
+            observado = ~np.isnan(y)
+            inicio = observado & np.isnan(nivel)
+            ativo = observado & ~np.isnan(nivel)
+            s = sazonal[:, :, t % periodo] if usa_sazonalidade else 0.0
+
+            # Erro da previsão um passo à frente feita com o estado anterior
+            erro = np.where(ativo, y - (nivel + tendencia + s), 0.0)
+            sse += erro ** 2
+            avaliados += ativo[:, :1]
+
+            novo_nivel = alpha * (y - s) + (1 - alpha) * (nivel + tendencia)
+            if usa_tendencia:
+                tendencia = np.where(ativo, beta * (novo_nivel - nivel) + (1 - beta) * tendencia, tendencia)
+            if usa_sazonalidade:
+                sazonal[:, :, t % periodo] = np.where(ativo, gamma * (y - novo_nivel) + (1 - gamma) * s, s)
+            nivel = np.where(ativo, novo_nivel, np.where(inicio, y, nivel))
+
+    # Estado final e parâmetros da melhor combinação de cada série
+    linhas = np.arange(n_series)
+    melhor = np.argmin(sse, axis=1)
+    nivel, tendencia = nivel[linhas, melhor][:, None], tendencia[linhas, melhor][:, None]
+    alpha, beta = alpha[0, melhor][:, None], beta[0, melhor][:, None]
+
+    passos = np.arange(1, horizonte + 1)[None, :]
+    previsoes = nivel + passos * tendencia
+    if usa_sazonalidade:
+        previsoes = previsoes + sazonal[linhas, melhor][:, (n_meses + passos[0] - 1) % periodo]
+
+    # Coeficientes c_j dos erros passados (j = 1..horizonte - 1) na previsão de cada passo
+    j = passos[:, :-1]
+    c = alpha * (1 + j * beta) if usa_tendencia else np.repeat(alpha, horizonte - 1, axis=1)
+    if usa_sazonalidade:
+        c = c + gamma * (j % periodo == 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sigma2 = sse[linhas, melhor][:, None] / avaliados
+    variancia = sigma2 * (1 + np.concatenate([np.zeros((n_series, 1)), np.cumsum(c ** 2, axis=1)], axis=1))
+    return previsoes, np.sqrt(variancia)
@@ -0,0 +1,70 @@
+import time
+import tracemalloc
+import pandas as pd
+import yaml
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error
+
+
+# Função para ler o config/treinamento.yaml
+def carregar_configuracoes_treino(caminho):
+    """
+    Retorna (nome da configuração ativa, {nome: parâmetros do RandomForestRegressor}).
+    """
+    with open(caminho, 'r', encoding='utf-8') as arquivo:
+        configuracao = yaml.safe_load(arquivo) or {}
+    configuracoes = {nome: dict(parametros or {}) for nome, parametros in (configuracao.get('configuracoes') or {}).items()}
+    ativa = configuracao.get('ativa')
+    if ativa not in configuracoes:
+        raise ValueError(f"A configuração ativa '{ativa}' não está entre as configurações de {caminho}.")
+    return ativa, configuracoes
+
+
+# Função para treinar um RandomForestRegressor medindo tempo de ajuste, pico de memória e erro
+def treinar_e_medir(parametros, X_train, y_train, X_test, y_test):
+    """
+    Retorna (modelo, metricas) com 'tempo_ajuste_s', 'pico_memoria_mb' e 'mse'.
+
+    O pico de memória é medido com tracemalloc durante o fit e cobre as alocações feitas pelo
+    Python e pelo numpy (cópias dos dados, amostras de bootstrap), que são as que crescem com
+    o número de linhas; os nós das árvores, alocados diretamente em C, não entram na conta.
+    """
+    modelo = RandomForestRegressor(**parametros)
+
+    tracemalloc.start()
+    try:
+        inicio = time.perf_counter()
+        modelo.fit(X_train, y_train)
+        tempo_ajuste = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    mse = mean_squared_error(y_test, modelo.predict(X_test))
+    return modelo, {
+        'tempo_ajuste_s': tempo_ajuste,
+        'pico_memoria_mb': pico / (1024 * 1024),
+        'mse': float(mse),
+    }
+
+
+# Função para comparar várias configurações de treino sobre a mesma divisão treino/teste
+def comparar_configuracoes(configuracoes, X_train, y_train, X_test, y_test):
+    resultados = []
+    for nome, parametros in configuracoes.items():
+        _, metricas = treinar_e_medir(parametros, X_train, y_train, X_test, y_test)
+        resultados.append({'configuracao': nome, **metricas, 'parametros': parametros})
+    return pd.DataFrame(resultados)
+
+
+# Função para formatar a comparação das configurações em Markdown
+def gerar_relatorio_comparacao(comparacao, n_linhas):
+    markdown = "# Comparação das Configurações de Treino do RandomForest\n\n"
+    markdown += f"Linhas de treino: {n_linhas}\n\n"
+    markdown += "| Configuração | Tempo de ajuste (s) | Pico de memória (MB) | MSE | Parâmetros |\n"
+    markdown += "|--------------|---------------------|----------------------|-----|------------|\n"
+    for _, row in comparacao.iterrows():
+        markdown += (f"| {row['configuracao']} | {row['tempo_ajuste_s']:.2f} | {row['pico_memoria_mb']:.1f} "
+                     f"| {row['mse']:.2f} | {row['parametros']} |\n")
+    markdown += "\n_Gerado automaticamente pela comparação de configurações de treino._\n"
+    return markdown
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos são importados como no projeto (from utils.x import ...), a partir de src/agentes
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src', 'agentes'))
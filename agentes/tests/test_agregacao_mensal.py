@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from utils.agregacao_mensal import AgregacaoMensal
+from utils.ingestao import COLUNAS_CHAVE, FREQUENCIA_MENSAL, agregar_csvs_em_chunks
+
+
+def _vendas(n, seed):
+    rng = np.random.default_rng(seed)
+    produtos = rng.integers(1, 6, n)
+    return pd.DataFrame({
+        'data': (pd.Timestamp('2024-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 200, n)), unit='D')).strftime('%Y-%m-%d'),
+        'produto_id': [f'prod_{p:03d}' for p in produtos],
+        'nome_produto': [f'Produto {p}' for p in produtos],
+        'categoria': ['Par' if p % 2 == 0 else 'Impar' for p in produtos],
+        'quantidade_vendida': rng.integers(1, 20, n),
+        'preco_unitario': rng.uniform(1, 10, n).round(2),
+    })
+
+
+# Referência direta: o CSV inteiro lido de uma vez e agrupado por mês e produto
+def _referencia(*caminhos):
+    df = pd.concat([pd.read_csv(caminho, parse_dates=['data']) for caminho in caminhos])
+    return df.groupby([pd.Grouper(key='data', freq=FREQUENCIA_MENSAL)] + COLUNAS_CHAVE[1:]).agg(
+        {'quantidade_vendida': 'sum'}
+    ).reset_index()
+
+
+def _ordenar(df):
+    df = df.astype({'produto_id': str, 'nome_produto': str, 'categoria': str, 'quantidade_vendida': 'int64'})
+    return df.sort_values(COLUNAS_CHAVE).reset_index(drop=True)[COLUNAS_CHAVE + ['quantidade_vendida']]
+
+
+def test_agregar_csvs_em_chunks_igual_ao_agrupamento_completo(tmp_path):
+    caminho = tmp_path / 'vendas.csv'
+    _vendas(500, 1).to_csv(caminho, index=False)
+    pd.testing.assert_frame_equal(_ordenar(agregar_csvs_em_chunks([caminho], tamanho_chunk=37)), _ordenar(_referencia(caminho)))
+
+
+def test_incremental_igual_ao_reagrupamento_completo(tmp_path):
+    caminho = tmp_path / 'vendas.csv'
+    vendas = _vendas(600, 2)
+    vendas.iloc[:250].to_csv(caminho, index=False)
+    agregacao = AgregacaoMensal(tmp_path / 'agregados', tamanho_chunk=50)
+    agregacao.atualizar([caminho])
+
+    # Linhas acrescentadas ao fim: só elas são lidas e somadas aos totais guardados
+    vendas.iloc[250:].to_csv(caminho, mode='a', header=False, index=False)
+    incremental = AgregacaoMensal(tmp_path / 'agregados', tamanho_chunk=50).atualizar([caminho])
+    completo = AgregacaoMensal(tmp_path / 'completo').atualizar([caminho])
+
+    pd.testing.assert_frame_equal(_ordenar(incremental), _ordenar(_referencia(caminho)))
+    pd.testing.assert_frame_equal(_ordenar(incremental), _ordenar(completo))
+
+
+def test_marca_dagua_para_na_ultima_linha_completa(tmp_path):
+    caminho = tmp_path / 'vendas.csv'
+    vendas = _vendas(100, 3)
+    vendas.to_csv(caminho, index=False)
+    tamanho_completo = caminho.stat().st_size
+    esperado = _ordenar(_referencia(caminho))
+
+    # Última linha ainda sendo gravada (sem quebra de linha): fica para a próxima atualização
+    with open(caminho, 'a', encoding='utf-8') as arquivo:
+        arquivo.write('2024-12-01,prod_001,Produto 1,Impar,1000')
+    agregacao = AgregacaoMensal(tmp_path / 'agregados')
+    totais = agregacao.atualizar([caminho])
+    assert agregacao.estado['fontes'][str(caminho)]['posicao'] == tamanho_completo
+    pd.testing.assert_frame_equal(_ordenar(totais), esperado)
+    assert agregacao.mes_aberto() == pd.Timestamp(vendas['data'].max()) + pd.offsets.MonthEnd(0)
+
+    with open(caminho, 'a', encoding='utf-8') as arquivo:
+        arquivo.write(',5.0\n')
+    agregacao = AgregacaoMensal(tmp_path / 'agregados')
+    totais = agregacao.atualizar([caminho])
+    assert agregacao.estado['fontes'][str(caminho)]['posicao'] == caminho.stat().st_size
+    pd.testing.assert_frame_equal(_ordenar(totais), _ordenar(_referencia(caminho)))
+    assert agregacao.mes_aberto() == pd.Timestamp('2024-12-31')
+
+
+def test_arquivo_reescrito_reconstroi_os_totais(tmp_path):
+    caminho = tmp_path / 'vendas.csv'
+    _vendas(300, 4).to_csv(caminho, index=False)
+    AgregacaoMensal(tmp_path / 'agregados').atualizar([caminho])
+
+    # Conteúdo trocado (não apenas acrescentado): os totais anteriores não valem mais
+    _vendas(400, 5).to_csv(caminho, index=False)
+    totais = AgregacaoMensal(tmp_path / 'agregados').atualizar([caminho])
+    pd.testing.assert_frame_equal(_ordenar(totais), _ordenar(_referencia(caminho)))
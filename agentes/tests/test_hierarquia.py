@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.hierarquia import Hierarquia
+
+
+@pytest.fixture
+def vendas():
+    rng = np.random.default_rng(0)
+    produtos = [f'prod_{i:03d}' for i in range(12)]
+    categorias = {p: ['Bebidas', 'Higiene', 'Limpeza'][i % 3] for i, p in enumerate(produtos)}
+    escolhidos = rng.choice(produtos, 200)
+    return pd.DataFrame({'produto_id': escolhidos, 'categoria': [categorias[p] for p in escolhidos]})
+
+
+def _previsoes(vendas, seed=1):
+    produtos = vendas['produto_id'].drop_duplicates()
+    return pd.Series(np.random.default_rng(seed).uniform(0, 100, len(produtos)), index=produtos.to_numpy())
+
+
+def test_agregar_igual_ao_groupby(vendas):
+    hierarquia = Hierarquia.de_dados(vendas)
+    previsoes = _previsoes(vendas)
+    resultado = hierarquia.agregar(previsoes)
+
+    categoria_produto = vendas.drop_duplicates('produto_id').set_index('produto_id')['categoria']
+    referencia = previsoes.groupby(categoria_produto.reindex(previsoes.index)).sum()
+    pd.testing.assert_series_equal(
+        Hierarquia.nivel(resultado, 'categoria').sort_index(), referencia.sort_index(), check_names=False
+    )
+    assert Hierarquia.nivel(resultado, 'total')['total'] == pytest.approx(previsoes.sum())
+    pd.testing.assert_series_equal(
+        Hierarquia.nivel(resultado, 'produto_id').loc[previsoes.index], previsoes, check_names=False
+    )
+
+
+def test_agregar_varias_colunas_e_produto_ausente(vendas):
+    hierarquia = Hierarquia.de_dados(vendas)
+    horizonte = pd.DataFrame({1: _previsoes(vendas, 1), 2: _previsoes(vendas, 2)}).iloc[1:]
+    resultado = hierarquia.agregar(horizonte)
+    for coluna in (1, 2):
+        assert Hierarquia.nivel(resultado, 'total', coluna)['total'] == pytest.approx(horizonte[coluna].sum())
+    ausente = hierarquia.produtos[~hierarquia.produtos.isin(horizonte.index)][0]
+    assert Hierarquia.nivel(resultado, 'produto_id', 1)[ausente] == 0
+
+
+def test_reconciliar_bottom_up_igual_a_agregar(vendas):
+    hierarquia = Hierarquia.de_dados(vendas)
+    base = hierarquia.agregar(_previsoes(vendas))['previsao'] * 1.0
+    base[hierarquia.rotulos['nivel'] != 'produto_id'] = 123.0  # Ignorados pelo bottom-up
+    pd.testing.assert_frame_equal(hierarquia.reconciliar(base, 'bottom_up'), hierarquia.agregar(_previsoes(vendas)))
+
+
+def test_reconciliar_ols_igual_a_projecao_densa(vendas):
+    hierarquia = Hierarquia.de_dados(vendas)
+    y = np.random.default_rng(2).uniform(0, 100, len(hierarquia.rotulos))
+    y[1] = np.nan  # Categoria sem previsão própria
+    resultado = hierarquia.reconciliar(pd.Series(y), 'ols')
+
+    # Referência: S b com b = argmin ||S b - y|| nos nós com previsão (lstsq denso)
+    S = hierarquia.S.toarray()
+    existentes = ~np.isnan(y)
+    b = np.linalg.lstsq(S[existentes], y[existentes], rcond=None)[0]
+    np.testing.assert_allclose(resultado['previsao'], S @ b, rtol=1e-5, atol=1e-5)
+
+    # Coerência: cada nível soma o de baixo
+    produtos = Hierarquia.nivel(resultado, 'produto_id')
+    assert Hierarquia.nivel(resultado, 'total')['total'] == pytest.approx(produtos.sum())
+
+
+def test_reconciliar_metodo_invalido(vendas):
+    hierarquia = Hierarquia.de_dados(vendas)
+    with pytest.raises(ValueError):
+        hierarquia.reconciliar(pd.Series(np.zeros(len(hierarquia.rotulos))), 'media')
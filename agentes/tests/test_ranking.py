@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.ranking import TopNStreaming, top_n, top_n_itens
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    valores = rng.integers(0, 20, 300).astype(float)  # Muitos empates
+    valores[rng.choice(300, 15, replace=False)] = np.nan
+    return pd.DataFrame({
+        'produto_id': [f'prod_{i:03d}' for i in rng.permutation(300)],
+        'yhat': valores,
+    }, index=rng.permutation(300))
+
+
+@pytest.mark.parametrize('n', [0, 1, 10, 299, 300, 500])
+@pytest.mark.parametrize('maior', [True, False])
+def test_top_n_igual_a_ordenacao_estavel(df, n, maior):
+    referencia = df.sort_values('yhat', ascending=not maior, kind='mergesort', na_position='last').head(n)
+    pd.testing.assert_frame_equal(top_n(df, 'yhat', n, maior), referencia)
+
+
+def test_top_n_com_desempate(df):
+    referencia = df.sort_values(['yhat', 'produto_id'], ascending=[False, True], kind='mergesort').head(25)
+    pd.testing.assert_frame_equal(top_n(df, 'yhat', 25, desempate='produto_id'), referencia)
+
+
+def test_top_n_itens_igual_a_sorted():
+    itens = {f'prod_{i:03d}': float(i % 7) for i in range(50)}
+    assert top_n_itens(itens, 10) == sorted(itens.items(), key=lambda par: par[1], reverse=True)[:10]
+    assert top_n_itens(itens, 10, maior=False) == sorted(itens.items(), key=lambda par: par[1])[:10]
+
+
+@pytest.mark.parametrize('maior', [True, False])
+def test_top_n_streaming_igual_ao_dataframe_inteiro(df, maior):
+    ranking = TopNStreaming('yhat', 12, maior)
+    for inicio in range(0, len(df), 40):
+        ranking.atualizar(df.iloc[inicio:inicio + 40])
+    referencia = df.dropna(subset=['yhat']).sort_values('yhat', ascending=not maior, kind='mergesort').head(12)
+    pd.testing.assert_frame_equal(ranking.resultado(), referencia.reset_index(drop=True))
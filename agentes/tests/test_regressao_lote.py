@@ -0,0 +1,70 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.regressao_lote import calcular_meses_venda, regressao_linear_em_lote, prever_em_lote
+
+
+def _dados(n_grupos=8, seed=0):
+    rng = np.random.default_rng(seed)
+    linhas = []
+    for g in range(n_grupos):
+        n = int(rng.integers(1, 30))
+        datas = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 200, n), unit='D')
+        for data in datas:
+            linhas.append({'produto_id': f'prod_{g:03d}', 'data': data, 'quantidade_vendida': float(rng.integers(1, 50))})
+    return pd.DataFrame(linhas)
+
+
+# Referência direta: um ajuste por grupo com as últimas ceil(0.2 * n) observações (em x) como teste
+def _referencia(df, x):
+    resultado = {}
+    for chave, grupo in df.assign(x=x).groupby('produto_id'):
+        grupo = grupo.sort_values('x', kind='mergesort')
+        n = len(grupo)
+        n_teste = math.ceil(0.2 * n) if n > 1 else 0
+        treino, teste = grupo.iloc[:n - n_teste], grupo.iloc[n - n_teste:]
+        if treino['x'].nunique() > 1:
+            inclinacao, intercepto = np.polyfit(treino['x'], treino['quantidade_vendida'], 1)
+        else:
+            inclinacao, intercepto = 0.0, treino['quantidade_vendida'].mean()
+        mse = ((teste['quantidade_vendida'] - (intercepto + inclinacao * teste['x'])) ** 2).mean() if n_teste else np.nan
+        resultado[chave] = (inclinacao, intercepto, mse, n, grupo['x'].max())
+    return pd.DataFrame.from_dict(resultado, orient='index', columns=['inclinacao', 'intercepto', 'mse', 'n_observacoes', 'x_max'])
+
+
+def test_regressao_igual_ao_ajuste_por_grupo():
+    df = _dados()
+    x = calcular_meses_venda(df, 'produto_id')
+    coeficientes = regressao_linear_em_lote(df['produto_id'], x, df['quantidade_vendida'])
+    referencia = _referencia(df, x)
+
+    assert list(coeficientes.index) == list(referencia.index)
+    for coluna in ['inclinacao', 'intercepto', 'mse', 'x_max']:
+        np.testing.assert_allclose(coeficientes[coluna], referencia[coluna], rtol=1e-7, atol=1e-9)
+    assert (coeficientes['n_observacoes'] == referencia['n_observacoes']).all()
+
+
+def test_meses_venda_como_no_groupby():
+    df = _dados()
+    referencia = df.groupby('produto_id')['data'].transform(lambda d: (d - d.min()).dt.days / 30)
+    pd.testing.assert_series_equal(calcular_meses_venda(df, 'produto_id'), referencia, check_names=False)
+
+
+def test_chave_nula_ignorada():
+    df = _dados()
+    sem_nulos = regressao_linear_em_lote(df['produto_id'], calcular_meses_venda(df, 'produto_id'), df['quantidade_vendida'])
+
+    com_nulos = pd.concat([df, pd.DataFrame({
+        'produto_id': [None, np.nan], 'data': [pd.Timestamp('2024-02-01')] * 2, 'quantidade_vendida': [1000.0, 2000.0]
+    })], ignore_index=True)
+    x = calcular_meses_venda(com_nulos, 'produto_id').fillna(0)
+    coeficientes = regressao_linear_em_lote(com_nulos['produto_id'], x, com_nulos['quantidade_vendida'])
+
+    pd.testing.assert_frame_equal(coeficientes, sem_nulos)
+
+
+def test_prever_em_lote():
+    coeficientes = pd.DataFrame({'inclinacao': [2.0, -1.0], 'intercepto': [1.0, 10.0]}, index=['a', 'b'])
+    assert prever_em_lote(coeficientes, 3).tolist() == pytest.approx([7.0, 7.0])
@@ -0,0 +1,105 @@
+import math
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.reposicao import DIAS_POR_MES, calcular_plano_reposicao, desvio_da_previsao
+
+
+@pytest.fixture
+def inventario():
+    rng = np.random.default_rng(0)
+    n = 40
+    return pd.DataFrame({
+        'loja_id': np.repeat(['loja_001', 'loja_002'], n // 2),
+        'produto_id': [f'prod_{i % 20:03d}' for i in range(n)],
+        'quantidade': rng.integers(0, 300, n),
+        'predicted_demand': np.r_[0, rng.integers(20, 400, n - 1)],
+    })
+
+
+# Referência direta: junção com merge e as fórmulas aplicadas linha a linha
+def _referencia(inventario, previsoes, chaves, nivel_servico=0.95, prazo=7, ciclo=7, erro_relativo=0.25, lote=1, nivel_intervalo=0.8):
+    if previsoes is not None:
+        previsoes = previsoes.drop_duplicates(chaves, keep='last')
+        juntos = inventario.merge(previsoes, on=chaves, how='left')
+    else:
+        juntos = inventario.assign(yhat=np.nan)
+    z = NormalDist().inv_cdf(nivel_servico)
+    z_intervalo = NormalDist().inv_cdf(0.5 + nivel_intervalo / 2)
+    linhas = []
+    for _, linha in juntos.iterrows():
+        if pd.isna(linha['yhat']):
+            demanda, desvio = linha['predicted_demand'], erro_relativo * linha['predicted_demand']
+        else:
+            demanda = linha['yhat']
+            desvio = (linha['yhat_upper'] - linha['yhat_lower']) / (2 * z_intervalo)
+        diaria = max(demanda, 0) / DIAS_POR_MES
+        estoque_seguranca = z * max(desvio, 0) / math.sqrt(DIAS_POR_MES) * math.sqrt(prazo + ciclo)
+        ponto_pedido = diaria * prazo + estoque_seguranca
+        estoque_alvo = diaria * (prazo + ciclo) + estoque_seguranca
+        repor = linha['quantidade'] <= ponto_pedido
+        linhas.append({
+            'demanda_mensal': float(demanda),
+            'estoque_seguranca': estoque_seguranca,
+            'ponto_pedido': ponto_pedido,
+            'dias_cobertura': linha['quantidade'] / diaria if diaria > 0 else np.inf,
+            'repor': repor,
+            'quantidade_sugerida': math.ceil(max(estoque_alvo - linha['quantidade'], 0) / lote) * lote if repor else 0,
+        })
+    return pd.DataFrame(linhas)
+
+
+def _comparar(plano, referencia):
+    for coluna in ['demanda_mensal', 'estoque_seguranca', 'ponto_pedido', 'dias_cobertura']:
+        np.testing.assert_allclose(plano[coluna], referencia[coluna], rtol=1e-9)
+    assert plano['repor'].tolist() == referencia['repor'].tolist()
+    assert plano['quantidade_sugerida'].tolist() == referencia['quantidade_sugerida'].tolist()
+
+
+def test_sem_previsoes_usa_demanda_do_inventario(inventario):
+    plano = calcular_plano_reposicao(inventario)
+    _comparar(plano, _referencia(inventario, None, ['produto_id']))
+    assert (plano['fonte_demanda'] == 'inventario').all()
+    assert np.isinf(plano['dias_cobertura'].iloc[0])  # Demanda zero
+
+
+def test_previsoes_por_produto_com_intervalo(inventario):
+    rng = np.random.default_rng(1)
+    previsoes = pd.DataFrame({'produto_id': [f'prod_{i:03d}' for i in range(0, 20, 2)], 'yhat': rng.uniform(10, 300, 10)})
+    previsoes = previsoes.assign(yhat_lower=previsoes['yhat'] * 0.7, yhat_upper=previsoes['yhat'] * 1.4)
+    plano = calcular_plano_reposicao(inventario, previsoes, lote_minimo=12)
+    _comparar(plano, _referencia(inventario.drop(columns='loja_id'), previsoes, ['produto_id'], lote=12))
+    assert (plano['quantidade_sugerida'] % 12 == 0).all()
+    assert (plano['fonte_demanda'] == 'previsao').sum() == 20
+
+
+def test_previsoes_por_loja_e_produto(inventario):
+    rng = np.random.default_rng(2)
+    previsoes = inventario[['loja_id', 'produto_id']].sample(25, random_state=3).assign(yhat=rng.uniform(10, 300, 25))
+    previsoes = previsoes.assign(yhat_lower=previsoes['yhat'] - 20, yhat_upper=previsoes['yhat'] + 20)
+    plano = calcular_plano_reposicao(inventario, previsoes, nivel_servico=0.9, prazo_entrega_dias=3, ciclo_revisao_dias=14)
+    _comparar(plano, _referencia(inventario, previsoes, ['loja_id', 'produto_id'], nivel_servico=0.9, prazo=3, ciclo=14))
+
+
+def test_desvio_da_previsao():
+    previsoes = pd.DataFrame({'yhat_lower': [80.0, 0.0], 'yhat_upper': [120.0, 10.0]})
+    z = NormalDist().inv_cdf(0.9)
+    np.testing.assert_allclose(desvio_da_previsao(previsoes, 0.8), [40 / (2 * z), 10 / (2 * z)])
+    np.testing.assert_allclose(desvio_da_previsao(previsoes.assign(erro_padrao=[3.0, 4.0])), [3.0, 4.0])
+
+
+def test_nivel_intervalo_gravado_nas_previsoes(inventario):
+    # A cobertura gravada pelo PredictToolMain prevalece sobre o parâmetro
+    previsoes = inventario[['produto_id']].drop_duplicates().head(10).assign(yhat=100.0)
+    previsoes = previsoes.assign(yhat_lower=previsoes['yhat'] - 30, yhat_upper=previsoes['yhat'] + 30)
+    inventario = inventario.drop(columns='loja_id')
+    plano = calcular_plano_reposicao(inventario, previsoes.assign(nivel_intervalo=0.95), nivel_intervalo=0.8)
+    _comparar(plano, _referencia(inventario, previsoes, ['produto_id'], nivel_intervalo=0.95))
+
+    z = np.array([NormalDist().inv_cdf(0.5 + nivel / 2) for nivel in (0.8, 0.95)])
+    misturadas = pd.DataFrame({'yhat_lower': [80.0, 80.0, 80.0], 'yhat_upper': [120.0, 120.0, 120.0],
+                               'nivel_intervalo': [0.8, 0.95, np.nan]})
+    np.testing.assert_allclose(desvio_da_previsao(misturadas, 0.8), 40 / (2 * z[[0, 1, 0]]))
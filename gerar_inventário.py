@@ -1,4 +1,5 @@
 import random
+import sys
 from datetime import datetime, timedelta
 import os
 
@@ -27,7 +28,7 @@ def random_localizacao():
     prateleira = random.choice(['A', 'B', 'C', 'D'])
     return f"Corredor {corredor}, Prateleira {prateleira}"
 
-def gerar_inventario(num_registros=1000):
+def gerar_inventario(num_registros=1000, loja_id=None):
     inventario = {}
     id_counter = 1
 
@@ -50,18 +51,22 @@ def gerar_inventario(num_registros=1000):
             if len(inventario) >= num_registros:
                 break
 
-    # Criar o diretório data se não existir
-    os.makedirs("data", exist_ok=True)
+    # Uma loja: data/inventario.csv; várias lojas: uma partição por loja em data/lojas/<loja_id>/
+    diretorio = "data" if loja_id is None else os.path.join("data", "lojas", loja_id)
+    os.makedirs(diretorio, exist_ok=True)
     
-    # Salvar inventário no arquivo CSV
-    output_path = os.path.join("data", "inventario.csv")
+    # Salvar inventário no arquivo CSV (localizacao continua sendo a última coluna)
+    output_path = os.path.join(diretorio, "inventario.csv")
+    prefixo = "" if loja_id is None else f"{loja_id},"
     with open(output_path, 'w') as f:
-        f.write("produto_id,nome_produto,categoria,quantidade,predicted_demand,data_vencimento,localizacao\n")
+        f.write(("" if loja_id is None else "loja_id,") + "produto_id,nome_produto,categoria,quantidade,predicted_demand,data_vencimento,localizacao\n")
         for produto_id, dados in inventario.items():
-            f.write(f"{produto_id},{dados['nome_produto']},{dados['categoria']},{dados['quantidade']},{dados['predicted_demand']},{dados['data_vencimento']},{dados['localizacao']}\n")
+            f.write(f"{prefixo}{produto_id},{dados['nome_produto']},{dados['categoria']},{dados['quantidade']},{dados['predicted_demand']},{dados['data_vencimento']},{dados['localizacao']}\n")
 
     return inventario, f"Inventário gerado com {num_registros} produtos e salvo em {output_path}"
 
-# Gerar inventário robusto com 1000 produtos
-inventario, mensagem = gerar_inventario(num_registros=1000)
-print(mensagem)
+# Gerar inventário robusto com 1000 produtos por loja (uso: python gerar_inventário.py [num_lojas])
+num_lojas = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+for indice_loja in range(1, num_lojas + 1):
+    inventario, mensagem = gerar_inventario(num_registros=1000, loja_id=None if num_lojas == 1 else f"loja_{indice_loja:03d}")
+    print(mensagem)